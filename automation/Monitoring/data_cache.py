@@ -0,0 +1,135 @@
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+class MarketDataCache:
+    """Bounded in-memory cache of market data frames keyed by symbol.
+    
+    Entries expire after a per-entry TTL, and least recently used entries
+    are evicted once the frames exceed ``max_bytes``. With a ``spill_dir``,
+    evicted (but still fresh) frames are pickled to disk and reloaded on the
+    next hit instead of being downloaded again. Counters are exposed
+    through ``stats()`` for scraping.
+    
+    The cache keeps its own copy of every frame and hands out copies, so
+    callers that add columns in place cannot grow an entry past the size
+    it was accounted at.
+    """
+    
+    def __init__(self, max_bytes: int = 256 * 2**20, ttl: float = 86400.0,
+                 spill_dir: Optional[str] = None, clock: Callable[[], float] = time.time):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        
+        # symbol -> (stored_at, ttl, frame, nbytes), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # symbol -> (stored_at, ttl, path) for frames spilled to disk
+        self._spilled: Dict[str, tuple] = {}
+        self.nbytes = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.spills = 0
+        self.reloads = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, symbol: str):
+        return symbol in self._entries or symbol in self._spilled
+    
+    def _expired(self, stored_at: float, ttl: float, max_age: Optional[float]) -> bool:
+        limit = ttl if max_age is None else min(ttl, max_age)
+        return self.clock() - stored_at >= limit
+    
+    def _spill_path(self, symbol: str) -> Path:
+        return self.spill_dir / f"{symbol}.pkl"
+    
+    def _drop_spilled(self, symbol: str):
+        _, _, path = self._spilled.pop(symbol)
+        path.unlink(missing_ok=True)
+    
+    def get(self, symbol: str, max_age: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """Return a fresh frame for ``symbol`` or None.
+        
+        ``max_age`` (seconds) can tighten, but not extend, the entry's TTL.
+        """
+        if symbol in self._entries:
+            stored_at, ttl, frame, nbytes = self._entries[symbol]
+            if not self._expired(stored_at, ttl, max_age):
+                self._entries.move_to_end(symbol)
+                self.hits += 1
+                return frame.copy()
+            del self._entries[symbol]
+            self.nbytes -= nbytes
+            self.expirations += 1
+        
+        elif symbol in self._spilled:
+            stored_at, ttl, path = self._spilled[symbol]
+            if not self._expired(stored_at, ttl, max_age):
+                frame = pd.read_pickle(path)
+                self._drop_spilled(symbol)
+                self._insert(symbol, frame, stored_at, ttl)
+                self.hits += 1
+                self.reloads += 1
+                return frame.copy()
+            self._drop_spilled(symbol)
+            self.expirations += 1
+        
+        self.misses += 1
+        return None
+    
+    def put(self, symbol: str, frame: pd.DataFrame, ttl: Optional[float] = None):
+        """Store a frame, evicting least recently used entries to stay in budget."""
+        if symbol in self._entries:
+            self.nbytes -= self._entries.pop(symbol)[3]
+        if symbol in self._spilled:
+            self._drop_spilled(symbol)
+        self._insert(symbol, frame.copy(), self.clock(), self.ttl if ttl is None else ttl)
+    
+    def _insert(self, symbol: str, frame: pd.DataFrame, stored_at: float, ttl: float):
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        self._entries[symbol] = (stored_at, ttl, frame, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes and self._entries:
+            self._evict_one()
+    
+    def _evict_one(self):
+        symbol, (stored_at, ttl, frame, nbytes) = self._entries.popitem(last=False)
+        self.nbytes -= nbytes
+        self.evictions += 1
+        if self.spill_dir is not None and not self._expired(stored_at, ttl, None):
+            path = self._spill_path(symbol)
+            frame.to_pickle(path)
+            self._spilled[symbol] = (stored_at, ttl, path)
+            self.spills += 1
+    
+    def clear(self):
+        for symbol in list(self._spilled):
+            self._drop_spilled(symbol)
+        self._entries.clear()
+        self.nbytes = 0
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'spills': self.spills,
+            'reloads': self.reloads,
+            'entries': len(self._entries),
+            'spilled_entries': len(self._spilled),
+            'bytes': self.nbytes,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -5,14 +5,31 @@ from typing import Dict, Optional, List
 from datetime import datetime, timedelta
 import logging
 from ratelimit import limits, sleep_and_retry
+from requests.adapters import HTTPAdapter
+
+from preprocessing.ohlcv_store import OHLCVStore
+from preprocessing.async_fetcher import AsyncMarketFetcher, DAILY_ADJUSTED_COLUMNS, parse_time_series
+from utils.rate_limiter import TokenBucket
+from automation.Monitoring.data_cache import MarketDataCache
 
 class AlphaVantageAPI:
     """Handler for Alpha Vantage API requests with rate limiting."""
     
-    def __init__(self, api_key: str, calls_per_minute: int = 5):
+    def __init__(self, api_key: str, calls_per_minute: int = 5,
+                 limiter: Optional[TokenBucket] = None, pool_size: int = 4,
+                 timeout: float = 30.0):
         self.api_key = api_key
         self.base_url = "https://www.alphavantage.co/query"
         self.calls_per_minute = calls_per_minute
+        self.timeout = timeout
+        # Shared across processes; the decorator below only bounds this one
+        self.limiter = limiter
+        
+        # Keep-alive connection pool reused by every request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
@@ -23,8 +40,10 @@ class AlphaVantageAPI:
     def _make_request(self, params: Dict) -> Optional[Dict]:
         """Make rate-limited API request with error handling."""
         try:
+            if self.limiter is not None:
+                self.limiter.acquire()
             params['apikey'] = self.api_key
-            response = requests.get(self.base_url, params=params)
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             # Check for API-specific errors
@@ -44,73 +63,96 @@ class AlphaVantageAPI:
             self.logger.error(f"Unexpected error: {str(e)}")
             raise
             
-    def get_daily_adjusted(self, symbol: str) -> pd.DataFrame:
-        """Get daily adjusted price data for a symbol."""
+    def get_daily_adjusted(self, symbol: str, outputsize: str = "full") -> pd.DataFrame:
+        """Get daily adjusted price data for a symbol.
+        
+        ``outputsize`` is "full" for the whole history or "compact" for the
+        latest 100 bars.
+        """
         params = {
             "function": "TIME_SERIES_DAILY_ADJUSTED",
             "symbol": symbol,
-            "outputsize": "full"
+            "outputsize": outputsize
         }
         
         try:
             data = self._make_request(params)
-            time_series = data.get("Time Series (Daily)", {})
-            
-            if not time_series:
-                raise ValueError(f"No data returned for symbol {symbol}")
-                
-            # Convert to DataFrame
-            df = pd.DataFrame.from_dict(time_series, orient='index')
-            df.index = pd.to_datetime(df.index)
-            
-            # Rename columns
-            df.columns = ['open', 'high', 'low', 'close', 'adjusted_close', 
-                         'volume', 'dividend', 'split_coefficient']
-            
-            # Convert to numeric
-            for col in df.columns:
-                df[col] = pd.to_numeric(df[col])
-                
-            return df
+            return parse_time_series(data, symbol, DAILY_ADJUSTED_COLUMNS)
             
         except Exception as e:
             self.logger.error(f"Failed to fetch daily data for {symbol}: {str(e)}")
             raise
+    
+    def close(self):
+        """Release pooled connections."""
+        self.session.close()
 
 class MarketDataPipeline:
     """Pipeline for processing and storing market data."""
     
-    def __init__(self, api: AlphaVantageAPI):
+    def __init__(self, api: AlphaVantageAPI, store: Optional[OHLCVStore] = None,
+                 fetcher: Optional[AsyncMarketFetcher] = None,
+                 cache: Optional[MarketDataCache] = None):
         self.api = api
-        self.data_cache = {}
+        self.store = store
+        self.fetcher = fetcher
+        self.data_cache = cache if cache is not None else MarketDataCache()
         self.logger = logging.getLogger(__name__)
         
     def fetch_symbols(self, symbols: List[str], 
                      refresh_if_older_than: timedelta = timedelta(days=1)):
-        """Fetch data for multiple symbols with caching."""
+        """Fetch data for multiple symbols with caching.
+        
+        With a fetcher, every stale symbol is downloaded concurrently up front
+        instead of one request after another.
+        """
         results = {}
+        max_age = refresh_if_older_than.total_seconds()
         
+        # Check cache
+        stale = []
         for symbol in symbols:
+            data = self.data_cache.get(symbol, max_age)
+            if data is not None:
+                results[symbol] = data
+            else:
+                stale.append(symbol)
+        
+        prefetched = None
+        if self.fetcher is not None and stale:
+            if self.store is not None:
+                added = self.store.refresh_many(stale, self.fetcher.fetch_many)
+                prefetched = {s: self.store.read_frame(s) for s in added}
+            else:
+                prefetched = self.fetcher.fetch_symbols(stale)
+        
+        for symbol in stale:
             try:
-                # Check cache
-                if symbol in self.data_cache:
-                    last_update, data = self.data_cache[symbol]
-                    if datetime.now() - last_update < refresh_if_older_than:
-                        results[symbol] = data
+                # Fetch new data; with a store only the recent bars are downloaded
+                if prefetched is not None:
+                    if symbol not in prefetched:
                         continue
-                
-                # Fetch new data
-                self.logger.info(f"Fetching data for {symbol}")
-                data = self.api.get_daily_adjusted(symbol)
+                    data = prefetched[symbol]
+                elif self.store is not None:
+                    self.logger.info(f"Fetching data for {symbol}")
+                    added = self.store.refresh(
+                        symbol, lambda outputsize: self.api.get_daily_adjusted(symbol, outputsize)
+                    )
+                    self.logger.info(f"Appended {added} new bars for {symbol}")
+                    data = self.store.read_frame(symbol)
+                else:
+                    self.logger.info(f"Fetching data for {symbol}")
+                    data = self.api.get_daily_adjusted(symbol)
                 
                 # Update cache
-                self.data_cache[symbol] = (datetime.now(), data)
+                self.data_cache.put(symbol, data)
                 results[symbol] = data
                 
             except Exception as e:
                 self.logger.error(f"Failed to process {symbol}: {str(e)}")
                 continue
-                
+        
+        self.logger.info(f"Market data cache: {self.data_cache.stats()}")
         return results
     
     def process_market_data(self, data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
@@ -147,7 +189,8 @@ def main():
     # Setup API and pipeline
     api_key = "YOUR_API_KEY"
     api = AlphaVantageAPI(api_key)
-    pipeline = MarketDataPipeline(api)
+    cache = MarketDataCache(max_bytes=256 * 2**20, spill_dir="data/cache/market")
+    pipeline = MarketDataPipeline(api, OHLCVStore("data/raw/daily_adjusted"), cache=cache)
     
     # Define symbols to track
     symbols = ["AAPL", "MSFT", "GOOGL", "AMZN"]
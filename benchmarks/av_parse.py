@@ -0,0 +1,109 @@
+# 
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import requests
+
+from preprocessing.async_fetcher import DAILY_ADJUSTED_COLUMNS, parse_time_series
+
+def synthetic_response(n_bars: int) -> dict:
+    """TIME_SERIES_DAILY_ADJUSTED payload with the real layout, newest first."""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('1999-11-01', periods=n_bars)[::-1]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    series = {
+        d.strftime('%Y-%m-%d'): {
+            '1. open': f'{c:.4f}', '2. high': f'{c * 1.01:.4f}', '3. low': f'{c * 0.99:.4f}',
+            '4. close': f'{c:.4f}', '5. adjusted close': f'{c * 0.98:.4f}',
+            '6. volume': str(int(c * 1e4)), '7. dividend amount': '0.0000',
+            '8. split coefficient': '1.0'
+        }
+        for d, c in zip(dates, close)
+    }
+    return {'Meta Data': {'2. Symbol': 'SYN'}, 'Time Series (Daily)': series}
+
+def pandas_parse(data: dict) -> pd.DataFrame:
+    """Original get_daily_adjusted path: object frame, to_datetime, to_numeric loop."""
+    df = pd.DataFrame.from_dict(data['Time Series (Daily)'], orient='index')
+    df.index = pd.to_datetime(df.index)
+    df.columns = DAILY_ADJUSTED_COLUMNS
+    for col in df.columns:
+        df[col] = pd.to_numeric(df[col])
+    return df
+
+def best_of(fn, repeats):
+    """Return the best wall time of `repeats` calls and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def serve(body: bytes) -> ThreadingHTTPServer:
+    """Local HTTP/1.1 server returning `body` for every GET."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+        
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Alpha Vantage response parsing and session pooling')
+    parser.add_argument('--response', help='Recorded JSON response; synthetic if omitted')
+    parser.add_argument('--bars', type=int, default=6500, help='Bars in the synthetic response')
+    parser.add_argument('--requests', type=int, default=200, help='Requests for the pooling test')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    
+    if args.response:
+        with open(args.response) as f:
+            text = f.read()
+    else:
+        text = json.dumps(synthetic_response(args.bars))
+    data = json.loads(text)
+    
+    json_time, _ = best_of(lambda: json.loads(text), args.repeats)
+    old_time, old = best_of(lambda: pandas_parse(data), args.repeats)
+    new_time, new = best_of(lambda: parse_time_series(data, 'SYN', DAILY_ADJUSTED_COLUMNS), args.repeats)
+    old = old.sort_index()
+    
+    print(f"bars:            {len(new)} ({len(text) / 1e6:.1f} MB)")
+    print(f"json.loads:      {json_time * 1e3:9.1f} ms")
+    print(f"pandas parse:    {old_time * 1e3:9.1f} ms")
+    print(f"numpy parse:     {new_time * 1e3:9.1f} ms")
+    print(f"speedup:         {old_time / new_time:9.1f}x")
+    print(f"max abs diff:    {np.abs(old.to_numpy(float) - new.to_numpy()).max():.3e}")
+    print(f"same dates:      {bool((old.index.values == new.index.values).all())}")
+    
+    # Small payload so connection setup dominates
+    server = serve(b'{"ok": true}')
+    url = f'http://127.0.0.1:{server.server_address[1]}/query'
+    fresh_time, _ = best_of(lambda: [requests.get(url).json() for _ in range(args.requests)], 1)
+    with requests.Session() as session:
+        pooled_time, _ = best_of(lambda: [session.get(url).json() for _ in range(args.requests)], 1)
+    server.shutdown()
+    
+    print(f"requests.get:    {fresh_time / args.requests * 1e3:9.2f} ms/request")
+    print(f"pooled session:  {pooled_time / args.requests * 1e3:9.2f} ms/request")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# 
+
+import argparse
+import time
+
+import torch
+
+from models.generator import Generator
+
+def best_of(fn, repeats):
+    """Return the best wall time of `repeats` calls and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Eight-conv vs fused-gate ConvLSTM Generator.forward')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--seq-len', type=int, default=5)
+    parser.add_argument('--channels', type=int, default=3)
+    parser.add_argument('--image-size', type=int, default=60)
+    parser.add_argument('--hidden-channels', type=int, default=64)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    
+    torch.manual_seed(0)
+    kwargs = {'input_channels': args.channels, 'image_size': args.image_size,
+              'hidden_channels': args.hidden_channels}
+    unfused = Generator(fused_gates=False, **kwargs)
+    fused = Generator(**kwargs)
+    fused.load_state_dict(unfused.state_dict())
+    x = torch.randn(args.batch_size, args.seq_len, args.channels, args.image_size, args.image_size)
+    
+    with torch.no_grad():
+        unfused_time, expected = best_of(lambda: unfused(x), args.repeats)
+        fused_time, result = best_of(lambda: fused(x), args.repeats)
+    
+    def train_step(model):
+        model.zero_grad()
+        model(x).sum().backward()
+    
+    unfused_train, _ = best_of(lambda: train_step(unfused), args.repeats)
+    fused_train, _ = best_of(lambda: train_step(fused), args.repeats)
+    
+    print(f"threads:          {torch.get_num_threads()}")
+    print(f"input:            {tuple(x.shape)}")
+    print(f"8-conv forward:   {unfused_time * 1e3:9.1f} ms")
+    print(f"fused forward:    {fused_time * 1e3:9.1f} ms")
+    print(f"speedup:          {unfused_time / fused_time:9.2f}x")
+    print(f"8-conv fwd+bwd:   {unfused_train * 1e3:9.1f} ms")
+    print(f"fused fwd+bwd:    {fused_train * 1e3:9.1f} ms")
+    print(f"speedup:          {unfused_train / fused_train:9.2f}x")
+    print(f"max abs diff:     {(expected - result).abs().max().item():.3e}")
+
+if __name__ == "__main__":
+    main()
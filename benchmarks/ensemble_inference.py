@@ -0,0 +1,50 @@
+# 
+
+import argparse
+import time
+
+import torch
+
+from models.ensemble import GAFEWGANEnsemble
+
+def best_of(fn, repeats):
+    """Return the best wall time of `repeats` calls and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Looped vs vmapped ensemble inference')
+    parser.add_argument('--n-models', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--seq-len', type=int, default=5)
+    parser.add_argument('--channels', type=int, default=3)
+    parser.add_argument('--image-size', type=int, default=30)
+    parser.add_argument('--hidden-channels', type=int, default=16)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    
+    torch.manual_seed(0)
+    ensemble = GAFEWGANEnsemble(
+        n_models=args.n_models, device='cpu',
+        generator_kwargs={'input_channels': args.channels, 'image_size': args.image_size,
+                          'hidden_channels': args.hidden_channels}
+    )
+    x = torch.randn(args.batch_size, args.seq_len, args.channels, args.image_size, args.image_size)
+    ensemble.stack_generators()
+    
+    with torch.no_grad():
+        loop_time, loop = best_of(lambda: ensemble.base_predictions(x, vectorized=False), args.repeats)
+        vmap_time, stacked = best_of(lambda: ensemble.base_predictions(x, vectorized=True), args.repeats)
+    
+    print(f"threads:      {torch.get_num_threads()}")
+    print(f"loop:         {loop_time * 1e3:9.1f} ms")
+    print(f"vmap:         {vmap_time * 1e3:9.1f} ms")
+    print(f"speedup:      {loop_time / vmap_time:9.2f}x")
+    print(f"max abs diff: {(loop - stacked).abs().max().item():.3e}")
+
+if __name__ == "__main__":
+    main()
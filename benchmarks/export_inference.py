@@ -0,0 +1,75 @@
+# 
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import torch
+
+from models.ensemble import GAFEWGANEnsemble
+from models.export import FORMATS, load_exported
+
+def best_of(fn, repeats):
+    """Return the best wall time of `repeats` calls and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Eager vs exported ensemble inference latency')
+    parser.add_argument('--n-models', type=int, default=10)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--seq-len', type=int, default=5)
+    parser.add_argument('--channels', type=int, default=3)
+    parser.add_argument('--image-size', type=int, default=30)
+    parser.add_argument('--hidden-channels', type=int, default=16)
+    parser.add_argument('--formats', nargs='+', default=list(FORMATS))
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    
+    torch.manual_seed(0)
+    ensemble = GAFEWGANEnsemble(
+        n_models=args.n_models, device='cpu',
+        generator_kwargs={'input_channels': args.channels, 'image_size': args.image_size,
+                          'hidden_channels': args.hidden_channels}
+    )
+    ensemble.meta_learner.eval()
+    shape = (args.seq_len, args.channels, args.image_size, args.image_size)
+    
+    def eager(vectorized):
+        def run(x):
+            ensemble.vectorized_inference = vectorized
+            return ensemble.predict(x)
+        return run
+    runners = {'eager loop': eager(False), 'eager vmap': eager(True)}
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for format in args.formats:
+            path = Path(tmpdir) / f'ensemble_{format}.pt2'
+            start = time.perf_counter()
+            ensemble.export(path, torch.randn(2, *shape), format=format)
+            export_time = time.perf_counter() - start
+            runners[format], _ = load_exported(path)
+            print(f"{format} export: {export_time:.1f} s, {path.stat().st_size / 2**20:.1f} MB")
+        
+        print(f"threads: {torch.get_num_threads()}, {args.n_models} members, input (B, "
+              f"{', '.join(map(str, shape))}), best of {args.repeats}, ms per call")
+        print(f"{'batch':>5} " + ' '.join(f'{name:>11}' for name in runners) + '   max abs diff')
+        for batch_size in args.batch_sizes:
+            x = torch.randn(batch_size, *shape)
+            times, outputs = [], []
+            with torch.no_grad():
+                for run in runners.values():
+                    run(x)  # warm-up
+                    elapsed, output = best_of(lambda: run(x), args.repeats)
+                    times.append(elapsed)
+                    outputs.append(output)
+            diff = max((out - outputs[0]).abs().max().item() for out in outputs[1:])
+            print(f"{batch_size:5d} " + ' '.join(f'{t * 1e3:11.2f}' for t in times) + f'   {diff:.2e}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# 
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.gaf import GAFConverter
+
+def per_window_gaf(features: pd.DataFrame, converter: GAFConverter) -> np.ndarray:
+    """Original process_data path: one pandas slice and transform per window."""
+    gaf_data = []
+    for i in range(converter.size, len(features)):
+        sequence = features.iloc[i-converter.size:i]
+        gaf_data.append(converter.transform(sequence['close'].values))
+    return np.array(gaf_data)
+
+def batched_gaf(features: pd.DataFrame, converter: GAFConverter) -> np.ndarray:
+    """Strided-view path used by process_data."""
+    windows = converter.sliding_windows(features['close'].values)[:-1]
+    return converter.transform_batch(windows)
+
+def best_of(fn, repeats):
+    """Return the best wall time of `repeats` calls and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-window vs batched GAF benchmark')
+    parser.add_argument('--days', type=int, default=5000, help='Length of the synthetic series')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, args.days)))
+    features = pd.DataFrame({'close': close})
+    converter = GAFConverter()
+    
+    loop_time, loop_out = best_of(lambda: per_window_gaf(features, converter), args.repeats)
+    batch_time, batch_out = best_of(lambda: batched_gaf(features, converter), args.repeats)
+    
+    print(f"windows:      {len(batch_out)}")
+    print(f"per-window:   {loop_time * 1e3:9.1f} ms")
+    print(f"batched:      {batch_time * 1e3:9.1f} ms")
+    print(f"speedup:      {loop_time / batch_time:9.1f}x")
+    print(f"max abs diff: {np.abs(loop_out - batch_out).max():.3e}")
+
+if __name__ == "__main__":
+    main()
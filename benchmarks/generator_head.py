@@ -0,0 +1,110 @@
+# 
+
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from models.generator import Generator
+from preprocessing.gaf import GAFConverter
+
+def best_of(fn, repeats):
+    """Return the best wall time of `repeats` calls and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def synthetic_task(n_samples, size, seed=0):
+    """GAF windows of random noisy trends/cycles and the next value on each window's scale."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(size + 1)
+    freq = rng.uniform(0.05, 0.4, (n_samples, 1))
+    phase = rng.uniform(0, 2 * np.pi, (n_samples, 1))
+    trend = rng.normal(0, 0.02, (n_samples, 1))
+    series = np.sin(freq * t + phase) + trend * t + rng.normal(0, 0.02, (n_samples, size + 1))
+    history, following = series[:, :-1], series[:, -1]
+    lo, hi = history.min(axis=1), history.max(axis=1)
+    target = 2 * (following - lo) / (hi - lo) - 1
+    last = 2 * (history[:, -1] - lo) / (hi - lo) - 1
+    
+    gaf = GAFConverter(size).transform_batch(history).astype(np.float32)
+    x = torch.from_numpy(gaf)[:, None, None]  # (n, time_steps=1, channels=1, size, size)
+    return (x, torch.from_numpy(target.astype(np.float32))[:, None],
+            torch.from_numpy(last.astype(np.float32))[:, None])
+
+def weight_megabytes(model):
+    return sum(p.numel() * p.element_size() for p in model.parameters()) / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare Generator heads: accuracy, size and latency')
+    parser.add_argument('--heads', nargs='+', default=list(Generator.heads))
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--image-size', type=int, default=30)
+    parser.add_argument('--hidden-channels', type=int, default=16)
+    parser.add_argument('--epochs', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--full-image-size', type=int, default=60)
+    parser.add_argument('--full-hidden-channels', type=int, default=64)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    
+    x, y, last = synthetic_task(args.samples, args.image_size)
+    split = int(0.8 * len(x))
+    print(f"threads: {torch.get_num_threads()}, train/val samples: {split}/{len(x) - split}, "
+          f"{args.image_size}x{args.image_size} GAF, {args.hidden_channels} hidden channels")
+    print(f"{'head':8} {'params':>10} {'weights MB':>11} {'val MSE':>9} {'direction':>10} "
+          f"{'train s':>8} {'infer ms/b':>10}")
+    baseline = ((y[split:] - y[:split].mean()) ** 2).mean().item()
+    print(f"{'mean':8} {'':>10} {'':>11} {baseline:9.4f}")
+    for head in args.heads:
+        torch.manual_seed(0)
+        model = Generator(input_channels=1, image_size=args.image_size,
+                          hidden_channels=args.hidden_channels, head=head, pool_size=args.pool_size)
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+        
+        start = time.perf_counter()
+        for _ in range(args.epochs):
+            order = torch.randperm(split)
+            for i in range(0, split, args.batch_size):
+                idx = order[i:i + args.batch_size]
+                loss = nn.MSELoss()(model(x[idx]), y[idx])
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+        train_time = time.perf_counter() - start
+        
+        with torch.no_grad():
+            pred = model(x[split:])
+            mse = nn.MSELoss()(pred, y[split:]).item()
+            direction = ((pred > last[split:]) == (y[split:] > last[split:])).float().mean().item()
+            batch = x[split:split + args.batch_size]
+            infer_time, _ = best_of(lambda: model(batch), args.repeats)
+        
+        n_params = sum(p.numel() for p in model.parameters())
+        print(f"{head:8} {n_params:10,d} {weight_megabytes(model):11.2f} {mse:9.4f} {direction:10.1%} "
+              f"{train_time:8.1f} {infer_time * 1e3:10.1f}")
+    
+    # Size and single-sample latency at the production image size
+    size, hidden = args.full_image_size, args.full_hidden_channels
+    sample = torch.randn(1, 1, 3, size, size)
+    print(f"\nat {size}x{size}, {hidden} hidden channels, 3 input channels, batch 1 "
+          f"(weights + Adam state = 3x weights):")
+    print(f"{'head':8} {'params':>12} {'weights MB':>11} {'+Adam MB':>9} {'infer ms':>9}")
+    for head in args.heads:
+        torch.manual_seed(0)
+        model = Generator(input_channels=3, image_size=size, hidden_channels=hidden,
+                          head=head, pool_size=args.pool_size)
+        with torch.no_grad():
+            infer_time, _ = best_of(lambda: model(sample), args.repeats)
+        n_params = sum(p.numel() for p in model.parameters())
+        mb = weight_megabytes(model)
+        print(f"{head:8} {n_params:12,d} {mb:11.1f} {3 * mb:9.1f} {infer_time * 1e3:9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# 
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+
+from models.discriminator import Discriminator
+from models.gaf_wgan import GAFWGAN
+
+def real_batch(batch_size, seq_len):
+    """Random-phase, random-amplitude sine windows shaped like critic input (B, 1, seq_len)."""
+    t = torch.arange(seq_len, dtype=torch.float32)
+    amplitude = torch.rand(batch_size, 1) * 0.5 + 0.5
+    phase = torch.rand(batch_size, 1) * 2 * torch.pi
+    return (amplitude * torch.sin(0.5 * t + phase)).unsqueeze(1)
+
+def sequence_generator(seq_len):
+    """Small latent -> sequence generator matching GAFWGAN's (B, 100) noise."""
+    return nn.Sequential(nn.Linear(100, 64), nn.ReLU(), nn.Linear(64, 64), nn.ReLU(),
+                         nn.Linear(64, seq_len), nn.Unflatten(1, (1, seq_len)))
+
+def sample_distance(model, reference, seq_len):
+    """Mean per-position 1-D Wasserstein distance between generated and real samples."""
+    with torch.no_grad():
+        fake = model.generator(torch.randn(len(reference), 100)).squeeze(1)
+    return (fake.sort(dim=0).values - reference.sort(dim=0).values).abs().mean().item()
+
+def main():
+    parser = argparse.ArgumentParser(description='Always-on vs lazy GP and the cheaper critic penalties')
+    parser.add_argument('--modes', nargs='+', default=['gp:1', 'gp:4', 'gp:16', 'r1:1', 'r1:4', 'lp:1'],
+                        help='penalty:interval pairs')
+    parser.add_argument('--steps', type=int, default=3000)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seq-len', type=int, default=11)
+    parser.add_argument('--checkpoints', type=int, default=4)
+    args = parser.parse_args()
+    
+    torch.manual_seed(1234)
+    reference = real_batch(4096, args.seq_len).squeeze(1)
+    marks = [args.steps * (i + 1) // args.checkpoints for i in range(args.checkpoints)]
+    print(f"threads: {torch.get_num_threads()}, {args.steps} critic steps of batch {args.batch_size}")
+    print(f"{'mode':8} {'ms/step':>8} {'total s':>8}  sample W1 after "
+          + ' '.join(f'{m:>6}' for m in marks))
+    
+    for mode in args.modes:
+        penalty, interval = mode.split(':')
+        torch.manual_seed(0)
+        model = GAFWGAN(sequence_generator(args.seq_len), Discriminator(args.seq_len), 'cpu',
+                        penalty=penalty, penalty_interval=int(interval))
+        distances, elapsed = [], 0.0
+        for step in range(1, args.steps + 1):
+            batch = real_batch(args.batch_size, args.seq_len)
+            start = time.perf_counter()
+            model.train_step(batch, None)
+            elapsed += time.perf_counter() - start
+            if step in marks:
+                distances.append(sample_distance(model, reference, args.seq_len))
+        
+        print(f"{mode:8} {elapsed / args.steps * 1e3:8.2f} {elapsed:8.1f}  {'':15}"
+              + ' '.join(f'{d:6.3f}' for d in distances))
+    
+    torch.manual_seed(0)
+    untrained = GAFWGAN(sequence_generator(args.seq_len), Discriminator(args.seq_len), 'cpu')
+    print(f"untrained generator W1: {sample_distance(untrained, reference, args.seq_len):.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# 
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from models.ensemble import GAFEWGANEnsemble
+from models.inference import TorchPredictor, load_predictor
+
+def best_of(fn, repeats):
+    """Return the best wall time of `repeats` calls and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Ensemble throughput of each predict(batch) backend')
+    parser.add_argument('--n-models', type=int, default=10)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--seq-len', type=int, default=5)
+    parser.add_argument('--channels', type=int, default=3)
+    parser.add_argument('--image-size', type=int, default=30)
+    parser.add_argument('--hidden-channels', type=int, default=16)
+    parser.add_argument('--formats', nargs='+', default=['export', 'onnx'])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    
+    torch.manual_seed(0)
+    ensemble = GAFEWGANEnsemble(
+        n_models=args.n_models, device='cpu',
+        generator_kwargs={'input_channels': args.channels, 'image_size': args.image_size,
+                          'hidden_channels': args.hidden_channels}
+    )
+    shape = (args.seq_len, args.channels, args.image_size, args.image_size)
+    predictors = {'eager': TorchPredictor(ensemble)}
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for format in args.formats:
+            suffix = 'onnx' if format == 'onnx' else 'pt2'
+            path = Path(tmpdir) / f'ensemble_{format}.{suffix}'
+            start = time.perf_counter()
+            ensemble.export(path, torch.randn(2, *shape), format=format)
+            print(f"{format} export: {time.perf_counter() - start:.1f} s")
+            predictors[format] = load_predictor(path)
+        
+        print(f"threads: {torch.get_num_threads()}, {args.n_models} members, input (B, "
+              f"{', '.join(map(str, shape))}), best of {args.repeats}, samples per second")
+        print(f"{'batch':>5} " + ' '.join(f'{name:>10}' for name in predictors) + '   max abs diff')
+        rng = np.random.default_rng(0)
+        for batch_size in args.batch_sizes:
+            x = rng.standard_normal((batch_size, *shape), dtype=np.float32)
+            rates, outputs = [], []
+            for predictor in predictors.values():
+                predictor.predict(x)  # warm-up
+                elapsed, output = best_of(lambda: predictor.predict(x), args.repeats)
+                rates.append(batch_size / elapsed)
+                outputs.append(output)
+            diff = max(np.abs(out - outputs[0]).max() for out in outputs[1:])
+            print(f"{batch_size:5d} " + ' '.join(f'{r:10.1f}' for r in rates) + f'   {diff:.2e}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# 
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+
+from benchmarks.gradient_penalty import real_batch, sequence_generator
+from models.discriminator import Discriminator
+from models.ensemble import GAFEWGANEnsemble
+from models.gaf_wgan import GAFWGAN
+from models.generator import Generator
+
+def best_of(fn, repeats):
+    """Return the best wall time of `repeats` calls and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def autocast(enabled):
+    return torch.autocast('cpu', dtype=torch.bfloat16, enabled=enabled)
+
+def relative_error(result, reference):
+    return ((result.float() - reference).norm() / reference.norm()).item()
+
+def main():
+    parser = argparse.ArgumentParser(description='float32 vs bfloat16 autocast parity and speed on CPU')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--seq-len', type=int, default=5)
+    parser.add_argument('--channels', type=int, default=3)
+    parser.add_argument('--image-size', type=int, default=60)
+    parser.add_argument('--hidden-channels', type=int, default=64)
+    parser.add_argument('--n-models', type=int, default=3)
+    parser.add_argument('--train-steps', type=int, default=10)
+    parser.add_argument('--gan-steps', type=int, default=500)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    
+    torch.manual_seed(0)
+    kwargs = {'input_channels': args.channels, 'image_size': args.image_size,
+              'hidden_channels': args.hidden_channels}
+    shape = (args.seq_len, args.channels, args.image_size, args.image_size)
+    print(f"threads: {torch.get_num_threads()}, "
+          f"bf16 kernels: {torch.ops.mkldnn._is_mkldnn_bf16_supported()}, "
+          f"input (B, {', '.join(map(str, shape))})")
+    
+    # Generator inference; parity on the ConvLSTM features feeding dense1 and on the output
+    generator = Generator(**kwargs).eval()
+    features = {}
+    generator.dense1.register_forward_hook(lambda m, inputs, out: features.update(x=inputs[0]))
+    print("\nGenerator.forward (no_grad)")
+    print(f"{'batch':>5} {'fp32 ms':>9} {'bf16 ms':>9} {'speedup':>8} {'feature rel err':>16} {'output max abs':>15}")
+    for batch_size in args.batch_sizes:
+        x = torch.randn(batch_size, *shape)
+        with torch.no_grad():
+            fp32_time, fp32 = best_of(lambda: generator(x), args.repeats)
+            fp32_features = features['x']
+            with autocast(True):
+                bf16_time, bf16 = best_of(lambda: generator(x), args.repeats)
+        print(f"{batch_size:5d} {fp32_time * 1e3:9.1f} {bf16_time * 1e3:9.1f} "
+              f"{fp32_time / bf16_time:7.2f}x {relative_error(features['x'], fp32_features):16.2e} "
+              f"{(bf16.float() - fp32).abs().max().item():15.2e}")
+    
+    # Generator regression training: identical copies, same batches
+    batch_size = args.batch_sizes[-1]
+    torch.manual_seed(1)
+    batches = [(torch.randn(batch_size, *shape), torch.randn(batch_size, 1))
+               for _ in range(args.train_steps)]
+    losses, times = {}, {}
+    for enabled in (False, True):
+        torch.manual_seed(0)
+        model = Generator(**kwargs)
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-4)
+        losses[enabled], start = [], time.perf_counter()
+        for x, y in batches:
+            with autocast(enabled):
+                pred = model(x)
+            loss = nn.MSELoss()(pred.float(), y)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            losses[enabled].append(loss.item())
+        times[enabled] = (time.perf_counter() - start) / args.train_steps
+    drift = max(abs(a - b) / abs(a) for a, b in zip(losses[False], losses[True]))
+    print(f"\nGenerator training step (fwd+bwd+Adam), batch {batch_size}, {args.train_steps} steps")
+    print(f"fp32 {times[False] * 1e3:.1f} ms, bf16 {times[True] * 1e3:.1f} ms "
+          f"({times[False] / times[True]:.2f}x); max relative loss difference {drift:.2e}")
+    
+    # GAFWGAN.train_step: WGAN-GP stays float32 inside the autocast step
+    print(f"\nGAFWGAN.train_step with WGAN-GP, stand-in sequence generator, {args.gan_steps} steps of batch 64")
+    results = {}
+    for enabled in (False, True):
+        torch.manual_seed(0)
+        gan = GAFWGAN(sequence_generator(11), Discriminator(11), 'cpu', mixed_precision=enabled)
+        data = [real_batch(64, 11) for _ in range(args.gan_steps)]
+        start = time.perf_counter()
+        d_losses = [gan.train_step(batch, None)[0] for batch in data]
+        results[enabled] = ((time.perf_counter() - start) / args.gan_steps,
+                            sum(d_losses[-50:]) / 50)
+    for enabled, name in ((False, 'fp32'), (True, 'bf16')):
+        step, d_loss = results[enabled]
+        print(f"{name} {step * 1e3:6.2f} ms/step, mean D loss over last 50 steps {d_loss:8.4f}")
+    
+    # Ensemble inference
+    ensemble = GAFEWGANEnsemble(n_models=args.n_models, device='cpu', generator_kwargs=kwargs)
+    ensemble.meta_learner.eval()
+    x = torch.randn(batch_size, *shape)
+    with torch.no_grad():
+        fp32_time, fp32 = best_of(lambda: ensemble.predict(x), args.repeats)
+        fp32_base = ensemble.base_predictions(x)
+        ensemble.mixed_precision = True
+        bf16_time, bf16 = best_of(lambda: ensemble.predict(x), args.repeats)
+        bf16_base = ensemble.base_predictions(x)
+    print(f"\nGAFEWGANEnsemble.predict, {args.n_models} members, batch {batch_size}")
+    print(f"fp32 {fp32_time * 1e3:.1f} ms, bf16 {bf16_time * 1e3:.1f} ms ({fp32_time / bf16_time:.2f}x); "
+          f"base prediction max abs diff {(bf16_base - fp32_base).abs().max().item():.2e}, "
+          f"prediction max abs diff {(bf16 - fp32).abs().max().item():.2e}")
+
+if __name__ == "__main__":
+    main()
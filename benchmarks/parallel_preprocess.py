@@ -0,0 +1,56 @@
+# 
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.data_loader import StockDataLoader
+from preprocessing.parallel import ParallelPreprocessor
+
+def synthetic_bars(n_days: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_days)))
+    return pd.DataFrame({
+        'open': close,
+        'high': close * (1 + rng.uniform(0, 0.02, n_days)),
+        'low': close * (1 - rng.uniform(0, 0.02, n_days)),
+        'close': close,
+        'volume': rng.uniform(1e5, 1e6, n_days)
+    }, index=pd.date_range('2000-01-01', periods=n_days, freq='B'))
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial vs process-pool preprocessing scaling')
+    parser.add_argument('--symbols', type=int, default=16)
+    parser.add_argument('--days', type=int, default=3000)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        help='Pool sizes to try (default: powers of two up to the core count)')
+    args = parser.parse_args()
+    
+    cores = os.cpu_count()
+    workers = args.workers or [w for w in (1, 2, 4, 8, 16, 32, 64) if w <= cores] or [1]
+    loader = StockDataLoader('demo')
+    symbols = [f'SYM{i:03d}' for i in range(args.symbols)]
+    frames = {s: synthetic_bars(args.days, i) for i, s in enumerate(symbols)}
+    
+    start = time.perf_counter()
+    serial = [loader.process_data(frames[s]) for s in symbols]
+    serial_time = time.perf_counter() - start
+    
+    print(f"cores: {cores}, symbols: {args.symbols}, days: {args.days}")
+    print(f"serial:     {serial_time:8.2f} s")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in workers:
+            start = time.perf_counter()
+            results = ParallelPreprocessor(loader, n, tmpdir).run(frames, symbols)
+            elapsed = time.perf_counter() - start
+            identical = all(np.array_equal(r['gaf_data'], s['gaf_data']) for r, s in zip(results, serial))
+            print(f"{n:3d} workers: {elapsed:8.2f} s  speedup {serial_time / elapsed:5.2f}x  "
+                  f"identical={identical}")
+            del results
+
+if __name__ == "__main__":
+    main()
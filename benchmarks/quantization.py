@@ -0,0 +1,66 @@
+# 
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import torch
+
+from models.ensemble import GAFEWGANEnsemble
+from models.quantization import quantization_report, quantize_ensemble
+
+def main():
+    parser = argparse.ArgumentParser(description='Float vs int8 ONNX ensemble: drift, size, latency')
+    parser.add_argument('--n-models', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--seq-len', type=int, default=5)
+    parser.add_argument('--channels', type=int, default=3)
+    parser.add_argument('--image-size', type=int, default=60)
+    parser.add_argument('--hidden-channels', type=int, default=64)
+    parser.add_argument('--calibration-batches', type=int, default=8)
+    parser.add_argument('--eval-batches', type=int, default=8)
+    args = parser.parse_args()
+    
+    torch.manual_seed(0)
+    ensemble = GAFEWGANEnsemble(
+        n_models=args.n_models, device='cpu',
+        generator_kwargs={'input_channels': args.channels, 'image_size': args.image_size,
+                          'hidden_channels': args.hidden_channels}
+    )
+    ensemble.meta_learner.eval()
+    shape = (args.seq_len, args.channels, args.image_size, args.image_size)
+    
+    def windows(n):
+        # GAF values lie in [-1, 1]
+        return [(torch.rand(args.batch_size, *shape) * 2 - 1, torch.randn(args.batch_size, 1))
+                for _ in range(n)]
+    calibration, evaluation = windows(args.calibration_batches), windows(args.eval_batches)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'ensemble.onnx'
+        ensemble.export(path, calibration[0][0], format='onnx')
+        del ensemble
+        
+        print(f"threads: {torch.get_num_threads()}, {args.n_models} members, input "
+              f"({args.batch_size}, {', '.join(map(str, shape))}), {args.eval_batches} eval batches")
+        print(f"{'variant':>14} {'quantize s':>10} {'MB':>8} {'ms/sample':>10} "
+              f"{'max drift':>10} {'mean drift':>10} {'rel drift':>10}")
+        reported_float = False
+        for name, batches in (('dynamic', None), ('static+dynamic', calibration)):
+            quantized = Path(tmpdir) / f'ensemble_{name}.onnx'
+            start = time.perf_counter()
+            quantize_ensemble(path, quantized, batches)
+            quantize_time = time.perf_counter() - start
+            report = quantization_report(path, quantized, evaluation)
+            if not reported_float:
+                print(f"{'float32':>14} {'':>10} {report['float_bytes'] / 2**20:8.1f} "
+                      f"{report['float_ms_per_sample']:10.2f}")
+                reported_float = True
+            print(f"{name:>14} {quantize_time:10.1f} {report['quantized_bytes'] / 2**20:8.1f} "
+                  f"{report['quantized_ms_per_sample']:10.2f} {report['max_abs_drift']:10.2e} "
+                  f"{report['mean_abs_drift']:10.2e} "
+                  f"{report['mean_abs_drift'] / report['float_mean_abs']:10.2e}")
+
+if __name__ == "__main__":
+    main()
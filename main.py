@@ -1,11 +1,27 @@
 
 import torch
-from torch.utils.data import DataLoader, TensorDataset
+from torch.utils.data import DataLoader, TensorDataset, BatchSampler, SubsetRandomSampler
+import numpy as np
 import argparse
+from itertools import islice
 from pathlib import Path
+from typing import Dict, List, Optional
 import yaml
 import logging
 
+from preprocessing.data_loader import StockDataLoader
+from preprocessing.gaf import MultiChannelGAFBuilder
+from preprocessing.ohlcv_store import OHLCVStore
+from preprocessing.async_fetcher import AsyncMarketFetcher, DAILY_COLUMNS
+from utils.rate_limiter import TokenBucket
+from preprocessing.gaf_store import GAFStore, PackedGAFDataset
+from preprocessing.datasets import LazyGAFDataset
+from preprocessing.feature_cache import FeatureCache
+from preprocessing.parallel import ParallelPreprocessor
+from models.ensemble import GAFEWGANEnsemble
+from models.quantization import quantization_report, quantize_ensemble
+from evaluation.trader import DayTrader
+
 def setup_logging():
     """Setup logging configuration."""
     logging.basicConfig(
@@ -19,16 +35,50 @@ def load_config(config_path: str) -> dict:
         config = yaml.safe_load(f)
     return config
 
-def prepare_data(data_loader: StockDataLoader, symbols: List[str]):
-    """Prepare data for all symbols."""
+def prepare_data(data_loader: StockDataLoader, symbols: List[str],
+                 store: Optional[GAFStore] = None, lazy: bool = False,
+                 cache: Optional[FeatureCache] = None, n_workers: int = 1):
+    """Prepare data for all symbols.
+    
+    With a GAF store, each symbol's windows are written to disk in packed
+    form and dropped from memory, and the symbols actually written are
+    returned instead, leaving out any that failed to download or process
+    (and any stale entries they have in the store). With ``lazy``,
+    only the 1-D series are returned and GAF encoding is left to the dataset.
+    With a feature cache, unchanged history is loaded instead of recomputed.
+    With ``n_workers`` > 1, symbols are processed in a process pool.
+    """
     all_data = []
+    raw_frames = data_loader.fetch_many(symbols)
+    
+    if n_workers > 1 and not lazy:
+        preprocessor = ParallelPreprocessor(data_loader, n_workers, cache=cache, store=store)
+        all_data = preprocessor.run(raw_frames, symbols)
+        if cache is not None:
+            logging.info(f"Feature cache: {cache.stats()}")
+        return all_data
     
     for symbol in symbols:
+        if symbol not in raw_frames:
+            logging.warning(f"No data for {symbol}, skipping")
+            continue
         logging.info(f"Processing data for {symbol}")
-        raw_data = data_loader.fetch_data(symbol)
-        processed_data = data_loader.process_data(raw_data)
+        raw_data = raw_frames.pop(symbol)
+        if lazy:
+            all_data.append(data_loader.process_series(raw_data))
+            continue
+        if cache is not None:
+            processed_data = cache.get_or_compute(symbol, raw_data)
+        else:
+            processed_data = data_loader.process_data(raw_data)
+        if store is not None:
+            store.write(symbol, processed_data['gaf_data'], processed_data['prices'])
+            all_data.append(symbol)
+            continue
         all_data.append(processed_data)
     
+    if cache is not None:
+        logging.info(f"Feature cache: {cache.stats()}")
     return all_data
 
 def create_dataloaders(processed_data: List[Dict], batch_size: int):
@@ -65,6 +115,37 @@ def create_dataloaders(processed_data: List[Dict], batch_size: int):
     
     return train_loader, val_loader, test_loader
 
+def create_batched_dataloaders(dataset, batch_size: int, num_workers: int = 0):
+    """Create train/val/test dataloaders over a dataset indexed by whole batches."""
+    # Same chronological 70/15/15 split as create_dataloaders
+    train_size = int(0.7 * len(dataset))
+    val_size = int(0.15 * len(dataset))
+    splits = [
+        SubsetRandomSampler(range(train_size)),
+        range(train_size, train_size + val_size),
+        range(train_size + val_size, len(dataset))
+    ]
+    
+    # Each sampled item is a whole batch of indices, built in one call
+    return tuple(
+        DataLoader(dataset, sampler=BatchSampler(split, batch_size, drop_last=False),
+                   batch_size=None, num_workers=num_workers,
+                   persistent_workers=num_workers > 0)
+        for split in splits
+    )
+
+def create_store_dataloaders(store: GAFStore, symbols: List[str], batch_size: int,
+                             num_workers: int = 0):
+    """Create train/val/test dataloaders that unpack GAF batches from disk."""
+    dataset = PackedGAFDataset([store.open(symbol) for symbol in symbols])
+    return create_batched_dataloaders(dataset, batch_size, num_workers)
+
+def create_lazy_dataloaders(series_data: List[Dict], batch_size: int, num_workers: int = 0,
+                            gaf_size: int = 60, gaf_lookback: Optional[int] = None):
+    """Create train/val/test dataloaders that encode GAF batches on the fly."""
+    dataset = LazyGAFDataset(series_data, gaf_size, gaf_lookback)
+    return create_batched_dataloaders(dataset, batch_size, num_workers)
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', type=str, required=True, help='Path to config file')
@@ -76,27 +157,133 @@ def main():
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     
     # Initialize data loader
-    data_loader = StockDataLoader(config['alpha_vantage_key'])
+    preprocessing_config = config.get('preprocessing', {})
+    gaf_size = preprocessing_config.get('gaf_size', 60)
+    gaf_lookback = preprocessing_config.get('gaf_lookback', gaf_size)
+    ohlcv_config = preprocessing_config.get('ohlcv_store')
+    ohlcv_store = OHLCVStore(ohlcv_config['path']) if ohlcv_config else None
+    fetcher_config = preprocessing_config.get('fetcher')
+    fetcher = None
+    if fetcher_config:
+        limiter = TokenBucket(fetcher_config['limiter_path'],
+                              calls=fetcher_config.get('calls_per_minute', 5), period=60.0)
+        fetcher = AsyncMarketFetcher(
+            config['alpha_vantage_key'], limiter,
+            function='TIME_SERIES_DAILY', columns=DAILY_COLUMNS,
+            max_in_flight=fetcher_config.get('max_in_flight', 5),
+            max_retries=fetcher_config.get('max_retries', 3)
+        )
+    store_config = preprocessing_config.get('gaf_store')
+    channels_config = preprocessing_config.get('gaf_channels')
+    gaf_builder = None
+    if channels_config:
+        if store_config or preprocessing_config.get('lazy_gaf', False):
+            raise ValueError("preprocessing.gaf_channels cannot be combined with gaf_store or "
+                             "lazy_gaf, which only hold single-channel close GASF windows")
+        gaf_builder = MultiChannelGAFBuilder(
+            channels_config.get('columns', ('close', 'volume', 'ATR_21')),
+            channels_config.get('methods', ('gasf', 'gadf')),
+            gaf_size, gaf_lookback
+        )
+    data_loader = StockDataLoader(config['alpha_vantage_key'], gaf_size, gaf_lookback,
+                                  ohlcv_store, fetcher, gaf_builder)
     
     # Prepare data
-    processed_data = prepare_data(data_loader, config['symbols'])
-    train_loader, val_loader, test_loader = create_dataloaders(
-        processed_data, config['batch_size']
-    )
+    num_workers = preprocessing_config.get('num_workers', 0)
+    preprocess_workers = preprocessing_config.get('preprocess_workers', 1)
+    cache_config = preprocessing_config.get('feature_cache')
+    cache = None
+    if cache_config:
+        max_age_days = cache_config.get('max_age_days')
+        cache = FeatureCache(
+            cache_config['path'], data_loader,
+            warmup=cache_config.get('warmup', 500),
+            max_bytes=cache_config.get('max_bytes'),
+            max_age=max_age_days * 86400 if max_age_days else None
+        )
+    if preprocessing_config.get('lazy_gaf', False):
+        series_data = prepare_data(data_loader, config['symbols'], lazy=True)
+        train_loader, val_loader, test_loader = create_lazy_dataloaders(
+            series_data, config['batch_size'], num_workers, gaf_size, gaf_lookback
+        )
+    elif store_config:
+        store = GAFStore(store_config['path'], store_config.get('dtype', 'float32'))
+        stored_symbols = prepare_data(data_loader, config['symbols'], store, cache=cache,
+                                      n_workers=preprocess_workers)
+        train_loader, val_loader, test_loader = create_store_dataloaders(
+            store, stored_symbols, config['batch_size'], num_workers
+        )
+    else:
+        processed_data = prepare_data(data_loader, config['symbols'], cache=cache,
+                                      n_workers=preprocess_workers)
+        train_loader, val_loader, test_loader = create_dataloaders(
+            processed_data, config['batch_size']
+        )
     
     # Initialize ensemble model
+    model_config = config.get('model', {})
+    penalty_config = model_config.get('gradient_penalty', {})
     model = GAFEWGANEnsemble(
         n_models=config['n_models'],
-        device=device
+        device=device,
+        generator_kwargs={
+            'input_channels': gaf_builder.n_channels if gaf_builder else
+                              model_config.get('input_channels', 3),
+            'image_size': gaf_size,
+            'head': model_config.get('generator_head', 'flatten'),
+            'pool_size': model_config.get('head_pool_size', 4)
+        },
+        discriminator_kwargs={'seq_len': model_config.get('discriminator_seq_len', 11)},
+        gan_kwargs={
+            'penalty': penalty_config.get('type', 'gp'),
+            'penalty_interval': penalty_config.get('interval', 1),
+            'penalty_weight': penalty_config.get('weight', 10.0)
+        },
+        vectorized_inference=model_config.get('vectorized_inference', False),
+        checkpoint_dir=model_config.get('checkpoint_dir'),
+        checkpoint_every=model_config.get('checkpoint_every'),
+        keep_checkpoints=model_config.get('keep_checkpoints', 3),
+        mixed_precision=model_config.get('mixed_precision', False)
     )
     
-    # Train base models
-    logging.info("Training base models...")
-    model.train_base_models(train_loader, config['base_epochs'])
+    if model_config.get('train', True):
+        # Train base models
+        logging.info("Training base models...")
+        model.train_base_models(train_loader, config['base_epochs'],
+                                n_workers=model_config.get('train_workers', 1))
+        
+        # Train meta-learner
+        logging.info("Training meta-learner...")
+        model.train_meta_learner(val_loader, config['meta_epochs'],
+                                 batch_size=model_config.get('meta_batch_size'),
+                                 cache_path=model_config.get('meta_cache_path'))
+        if model_config.get('save_path'):
+            model.save(model_config['save_path'])
+    else:
+        model.load(model_config['load_path'])
     
-    # Train meta-learner
-    logging.info("Training meta-learner...")
-    model.train_meta_learner(val_loader, config['meta_epochs'])
+    if model_config.get('export_path'):
+        logging.info("Exporting inference artifact...")
+        example_input, _ = next(iter(test_loader))
+        model.export(model_config['export_path'], example_input,
+                     model_config.get('export_format', 'aoti'))
+        
+        quant_config = model_config.get('quantization')
+        export_format = model_config.get('export_format', 'aoti')
+        if quant_config and export_format != 'onnx':
+            logging.warning(f"Quantization is configured but only applies to onnx exports, "
+                            f"not {export_format}; skipping it")
+        elif quant_config:
+            logging.info("Quantizing inference artifact...")
+            n_calibration = quant_config.get('calibration_batches', 16)
+            quantize_ensemble(model_config['export_path'], quant_config['path'],
+                              islice(val_loader, n_calibration) if n_calibration else None)
+            n_report = quant_config.get('report_batches', 16)
+            if n_report:
+                report = quantization_report(model_config['export_path'], quant_config['path'],
+                                             islice(test_loader, n_report))
+                for metric, value in report.items():
+                    logging.info(f"int8 {metric}: {value}")
     
     # Evaluate on test set
     logging.info("Evaluating model...")
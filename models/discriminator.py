@@ -6,9 +6,11 @@ import torch.nn as nn
 class Discriminator(nn.Module):
     """WD discriminator with Conv1D layers."""
     
-    def __init__(self):
+    def __init__(self, seq_len=11):
         super(Discriminator, self).__init__()
         
+        self.seq_len = seq_len
+        
         # First Conv1D layer block
         self.conv1 = nn.Sequential(
             nn.Conv1d(in_channels=1, out_channels=16, kernel_size=3, padding=1),
@@ -25,7 +27,7 @@ class Discriminator(nn.Module):
         
         # Dense layers
         self.flatten = nn.Flatten()
-        self.dense1 = nn.Linear(16 * 11, 50)  # 11 is sequence length
+        self.dense1 = nn.Linear(16 * seq_len, 50)
         self.dense2 = nn.Linear(50, 50)
         self.dense3 = nn.Linear(50, 1)
         
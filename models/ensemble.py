@@ -1,6 +1,20 @@
+import copy
+import logging
+from pathlib import Path
+
 import torch
 import torch.nn as nn
 import numpy as np
+from torch.func import functional_call, stack_module_state, vmap
+
+from models.generator import Generator
+from models.discriminator import Discriminator
+from models.gaf_wgan import GAFWGAN
+from models.export import export_ensemble
+from training.trainer import GAFWGANTrainer
+from training.parallel import ParallelMemberTrainer, train_with_trainer
+from training.checkpoint import (CheckpointManager, atomic_save, fingerprint, rng_state,
+                                 set_rng_state)
 
 class MetaLearner(nn.Module):
     """Meta-learner for ensemble model."""
@@ -24,45 +38,327 @@ class MetaLearner(nn.Module):
 class GAFEWGANEnsemble:
     """Ensemble of GAF-WGAN models."""
     
-    def __init__(self, n_models=10, device='cuda'):
+    def __init__(self, n_models=10, device='cuda', generator_kwargs=None, discriminator_kwargs=None,
+                 vectorized_inference=False, vmap_chunk_size=None, checkpoint_dir=None,
+                 checkpoint_every=None, keep_checkpoints=3, gan_kwargs=None,
+                 mixed_precision=False):
         self.n_models = n_models
         self.device = device
+        self.generator_kwargs = generator_kwargs or {}
+        self.discriminator_kwargs = discriminator_kwargs or {}
+        self.mixed_precision = mixed_precision
+        self.gan_kwargs = {**(gan_kwargs or {}), 'mixed_precision': mixed_precision}
+        self.vectorized_inference = vectorized_inference
+        self.vmap_chunk_size = vmap_chunk_size
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.checkpoint_every = checkpoint_every
+        self.keep_checkpoints = keep_checkpoints
+        self._stacked = None
+        self._meta_inputs = None
         self.base_models = []
         
         # Initialize base models
         for _ in range(n_models):
-            generator = Generator().to(device)
-            discriminator = Discriminator().to(device)
-            model = GAFWGAN(generator, discriminator, device)
+            generator = Generator(**self.generator_kwargs).to(device)
+            discriminator = Discriminator(**self.discriminator_kwargs).to(device)
+            model = GAFWGAN(generator, discriminator, device, **self.gan_kwargs)
             self.base_models.append(model)
         
         # Initialize meta-learner
         self.meta_learner = MetaLearner(n_models).to(device)
         self.meta_optimizer = torch.optim.Adam(self.meta_learner.parameters())
+    
+    def _checkpoints(self, name, run):
+        if self.checkpoint_dir is None:
+            return None
+        return CheckpointManager(self.checkpoint_dir / name, self.keep_checkpoints, run)
+    
+    @staticmethod
+    def _data_fingerprint(loader):
+        """Fingerprint of the data ``loader`` draws from.
+        
+        Covers the number of samples and the first and last one, which
+        changes when bars are added or the split moves, without reading the
+        whole set.
+        """
+        dataset, indices, _ = ParallelMemberTrainer.training_set(loader)
+        indices = range(len(dataset)) if indices is None else indices
+        ends = dataset[[indices[0], indices[-1]]] if len(indices) else None
+        return fingerprint(len(indices), ends)
+    
+    def _run_fingerprint(self, loader, *parts):
+        """Fingerprint of the ensemble configuration and the data ``loader``
+        draws from. Only computed when checkpointing."""
+        if self.checkpoint_dir is None:
+            return None
+        return fingerprint(self.n_models, self.generator_kwargs, self.discriminator_kwargs,
+                           self.gan_kwargs, self._data_fingerprint(loader), *parts)
+    
+    def train_base_models(self, train_loader, epochs, n_workers=1, threads_per_worker=None,
+                          train_fn=train_with_trainer):
+        """Train all base models.
+        
+        With a ``checkpoint_dir`` each member checkpoints into its own
+        subdirectory, and a rerun after a crash skips finished members and
+        resumes the interrupted one mid-epoch. Checkpoints of a run with
+        other data or another configuration are discarded, not resumed.
+        
+        With ``n_workers`` > 1 the members train concurrently in separate
+        processes (see ``ParallelMemberTrainer``, which runs ``train_fn`` for
+        each) with the loader's batch size. A member that fails is logged and dropped from the ensemble
+        rather than left untrained, and the meta-learner is rebuilt for the
+        remaining ones (see ``drop_members``); only if every member fails is
+        a ``RuntimeError`` raised.
+        """
+        run = self._run_fingerprint(train_loader)
+        if n_workers > 1:
+            self._train_base_models_parallel(train_loader, epochs, n_workers, threads_per_worker,
+                                             run, train_fn)
+            return
         
-    def train_base_models(self, train_loader, epochs):
-        """Train all base models."""
         for i, model in enumerate(self.base_models):
             print(f"Training base model {i+1}/{self.n_models}")
-            trainer = GAFWGANTrainer(model, train_loader, None, self.device)
+            checkpoint = self._checkpoints(f'member_{i:03d}', run)
+            trainer = GAFWGANTrainer(model, train_loader, None, self.device,
+                                     checkpoint, self.checkpoint_every)
             trainer.train(epochs)
+            if checkpoint is not None:
+                checkpoint.close()
+        self._stacked = None
+        self._meta_inputs = None
+    
+    def _train_base_models_parallel(self, train_loader, epochs, n_workers, threads_per_worker,
+                                    run, train_fn):
+        # Finished members are restored from their last checkpoint; workers
+        # checkpoint nothing, so unfinished ones start over
+        pending = []
+        for index, model in enumerate(self.base_models):
+            checkpoint = self._checkpoints(f'member_{index:03d}', run)
+            state = checkpoint.load() if checkpoint is not None else None
+            if state is not None and state['epoch'] >= epochs:
+                model.load_state_dict(state['model'])
+            else:
+                pending.append(index)
+            if checkpoint is not None:
+                checkpoint.close()
+        
+        dataset, indices, batch_size = ParallelMemberTrainer.training_set(train_loader)
+        trainer = ParallelMemberTrainer(n_workers, threads_per_worker, device=str(self.device),
+                                        train_fn=train_fn)
+        states, failures = trainer.train(
+            self.n_models, dataset, epochs, batch_size,
+            self.generator_kwargs, self.discriminator_kwargs, members=pending,
+            gan_kwargs=self.gan_kwargs, indices=indices
+        )
+        
+        for index, state in states.items():
+            self.base_models[index].load_state_dict(state)
+            checkpoint = self._checkpoints(f'member_{index:03d}', run)
+            if checkpoint is not None:
+                checkpoint.save({'model': state, 'epoch': epochs, 'batch': 0,
+                                 'epoch_rng': None, 'rng': rng_state(), 'totals': (0, 0)})
+                checkpoint.close()
+        self._stacked = None
+        self._meta_inputs = None
+        if len(failures) == self.n_models:
+            raise RuntimeError("Every base model failed to train (tracebacks are logged)")
+        if failures:
+            logging.getLogger(__name__).warning(
+                f"Base models {[i + 1 for i in sorted(failures)]} failed to train and are dropped; "
+                f"continuing with {self.n_models - len(failures)} (tracebacks are logged)")
+            self.drop_members(failures)
+    
+    def drop_members(self, indices):
+        """Remove the base models at ``indices`` and rebuild the meta-learner for the rest.
+        
+        The new meta-learner is untrained, so this belongs before
+        ``train_meta_learner`` (or before loading a state saved after the
+        same members were dropped).
+        """
+        self.base_models = [model for i, model in enumerate(self.base_models) if i not in indices]
+        self.n_models = len(self.base_models)
+        self.meta_learner = MetaLearner(self.n_models).to(self.device)
+        self.meta_optimizer = torch.optim.Adam(self.meta_learner.parameters())
+        self._stacked = None
+        self._meta_inputs = None
+    
+    def _generator_versions(self):
+        # In-place updates (optimizer steps, load_state_dict) bump a tensor's version
+        return tuple(tensor._version for model in self.base_models
+                     for tensor in (*model.generator.parameters(), *model.generator.buffers()))
+    
+    def stack_generators(self):
+        """Stack the base generators' parameters for one batched forward.
+        
+        The stacked copies are detached snapshots (a second copy of every
+        generator's weights); ``base_predictions`` restacks them once any
+        generator tensor has been updated in place since.
+        """
+        generators = [model.generator for model in self.base_models]
+        params, buffers = stack_module_state(generators)
+        params = {k: v.detach() for k, v in params.items()}
+        # Stateless template on the meta device; only its forward is used
+        template = copy.deepcopy(generators[0]).to('meta')
+        
+        def forward(p, b, x):
+            return functional_call(template, (p, b), (x,))
+        
+        self._stacked = (vmap(forward, in_dims=(0, 0, None), chunk_size=self.vmap_chunk_size),
+                         params, buffers, self._generator_versions())
+        return self._stacked
     
-    def train_meta_learner(self, val_loader, epochs):
-        """Train meta-learner on validation set."""
-        for epoch in range(epochs):
+    def autocast(self):
+        """bfloat16 autocast context when ``mixed_precision`` is on, else a no-op."""
+        return torch.autocast(torch.device(self.device).type, dtype=torch.bfloat16,
+                              enabled=self.mixed_precision)
+    
+    def base_predictions(self, data, vectorized=None):
+        """(batch, n_models) float32 predictions of every base generator.
+        
+        The vectorized path runs all members as one vmapped forward over
+        stacked parameters without autograd; the loop path runs them one by
+        one. Both give the same values. With ``mixed_precision`` the
+        generators run under bfloat16 autocast.
+        """
+        vectorized = self.vectorized_inference if vectorized is None else vectorized
+        if not vectorized:
+            with self.autocast():
+                preds = torch.cat([model.generator(data) for model in self.base_models], dim=1)
+            return preds.float()
+        
+        if self._stacked is None or self._stacked[3] != self._generator_versions():
+            self.stack_generators()
+        batched_forward, params, buffers, _ = self._stacked
+        with torch.no_grad(), self.autocast():
+            # (n_models, batch, 1) -> (batch, n_models)
+            preds = batched_forward(params, buffers, data).squeeze(-1).transpose(0, 1)
+        return preds.float()
+    
+    def compute_base_predictions(self, loader, path=None):
+        """Frozen (n_samples, n_models) base predictions and targets for ``loader``.
+        
+        Runs every generator once under ``no_grad``. With ``path`` the
+        matrix and targets are streamed to ``preds.npy``/``targets.npy`` in
+        that directory and returned memory-mapped, so they need not fit in
+        memory and can be reused with ``load_base_predictions``.
+        """
+        # The loader may cover one split of its dataset (a batch sampler over
+        # a range of indices), so count the samples it actually yields
+        batches = loader.batch_sampler or loader.sampler
+        n_samples = sum(len(batch) for batch in batches)
+        if path is not None:
+            path = Path(path)
+            path.mkdir(parents=True, exist_ok=True)
+            preds = np.lib.format.open_memmap(path / 'preds.npy', mode='w+',
+                                              dtype=np.float32, shape=(n_samples, self.n_models))
+            targets = np.lib.format.open_memmap(path / 'targets.npy', mode='w+',
+                                                dtype=np.float32, shape=(n_samples, 1))
+        else:
+            preds = np.empty((n_samples, self.n_models), dtype=np.float32)
+            targets = np.empty((n_samples, 1), dtype=np.float32)
+        
+        offset = 0
+        with torch.no_grad():
+            for data, price in loader:
+                batch = len(data)
+                preds[offset:offset + batch] = self.base_predictions(data.to(self.device)).cpu().numpy()
+                targets[offset:offset + batch] = price.reshape(batch, 1).numpy()
+                offset += batch
+        
+        if path is not None:
+            preds.flush()
+            targets.flush()
+            del preds, targets
+            return self.load_base_predictions(path)
+        return preds, targets
+    
+    @staticmethod
+    def load_base_predictions(path):
+        """Memory-map a matrix written by ``compute_base_predictions``."""
+        path = Path(path)
+        return (np.load(path / 'preds.npy', mmap_mode='r'),
+                np.load(path / 'targets.npy', mmap_mode='r'))
+    
+    def _cached_base_predictions(self, loader, path=None):
+        """``compute_base_predictions`` for ``loader``, reused while nothing changed.
+        
+        The matrix kept in memory is keyed by the loader's data fingerprint
+        and the generators' tensor versions. One under ``path`` is keyed by
+        the data and the generator weights in a ``fingerprint`` file written
+        after the matrix, so it is also reused across runs.
+        """
+        data = self._data_fingerprint(loader)
+        key = (data, self._generator_versions())
+        if self._meta_inputs is not None and self._meta_inputs[0] == key:
+            return self._meta_inputs[1]
+        
+        inputs = None
+        if path is not None:
+            path = Path(path)
+            key_file = path / 'fingerprint'
+            weights = fingerprint(data, [model.generator.state_dict() for model in self.base_models])
+            if key_file.exists() and key_file.read_text() == weights:
+                inputs = self.load_base_predictions(path)
+            else:
+                # Unkeyed while the matrix is rewritten, so a crash is never reused
+                key_file.unlink(missing_ok=True)
+        if inputs is None:
+            inputs = self.compute_base_predictions(loader, path)
+            if path is not None:
+                tmp = path / 'fingerprint.tmp'
+                tmp.write_text(weights)
+                tmp.replace(key_file)
+        self._meta_inputs = (key, inputs)
+        return inputs
+    
+    def train_meta_learner(self, val_loader, epochs, batch_size=None, cache_path=None,
+                           predictions=None):
+        """Train meta-learner on validation set.
+        
+        The base generators are frozen here, so their predictions are
+        computed once (see ``compute_base_predictions``) and the
+        meta-learner trains on that matrix. ``predictions`` reuses a
+        matrix from an earlier run; otherwise one cached for the same
+        validation data and generators, in memory or in ``cache_path``, is
+        used and any other is recomputed. ``batch_size`` defaults to the
+        loader's and 0 trains full-batch.
+        
+        With a ``checkpoint_dir`` the meta-learner, its optimizer and the RNG
+        state are checkpointed after every epoch and training resumes from
+        the last one. The checkpoints are tied to the validation data and
+        the current generator weights, so they are discarded once either
+        changes.
+        """
+        run = self._run_fingerprint(val_loader,
+                                    [model.generator.state_dict() for model in self.base_models])
+        checkpoint = self._checkpoints('meta', run)
+        state = checkpoint.load() if checkpoint is not None else None
+        start_epoch = 0
+        if state is not None:
+            self.meta_learner.load_state_dict(state['meta_learner'])
+            self.meta_optimizer.load_state_dict(state['meta_optimizer'])
+            set_rng_state(state['rng'])
+            start_epoch = state['epoch']
+        
+        if predictions is None:
+            predictions = self._cached_base_predictions(val_loader, cache_path)
+        preds, targets = predictions
+        
+        n_samples = len(preds)
+        if batch_size is None:
+            batch_size = val_loader.batch_size or n_samples
+        batch_size = batch_size or n_samples
+        n_batches = -(-n_samples // batch_size)
+        
+        for epoch in range(start_epoch, epochs):
             total_loss = 0
+            order = torch.randperm(n_samples).numpy()
             
-            for data, price in val_loader:
-                data = data.to(self.device)
-                price = price.to(self.device)
-                
-                # Get predictions from all base models
-                base_preds = []
-                for model in self.base_models:
-                    pred = model.generator(data)
-                    base_preds.append(pred)
-                
-                base_preds = torch.stack(base_preds, dim=1)
+            for start in range(0, n_samples, batch_size):
+                # Sorted indices keep reads from a memory-mapped matrix sequential
+                idx = np.sort(order[start:start + batch_size])
+                base_preds = torch.from_numpy(preds[idx]).to(self.device)
+                price = torch.from_numpy(targets[idx]).to(self.device)
                 ensemble_pred = self.meta_learner(base_preds)
                 
                 # Calculate loss and update
@@ -73,14 +369,52 @@ class GAFEWGANEnsemble:
                 
                 total_loss += loss.item()
             
-            print(f"Meta-learner epoch {epoch+1}/{epochs}, Loss: {total_loss/len(val_loader):.4f}")
+            print(f"Meta-learner epoch {epoch+1}/{epochs}, Loss: {total_loss/n_batches:.4f}")
+            if checkpoint is not None:
+                checkpoint.save({
+                    'meta_learner': self.meta_learner.state_dict(),
+                    'meta_optimizer': self.meta_optimizer.state_dict(),
+                    'epoch': epoch + 1,
+                    'rng': rng_state()
+                })
+        
+        if checkpoint is not None:
+            checkpoint.close()
     
     def predict(self, data):
         """Generate ensemble prediction."""
-        base_preds = []
-        for model in self.base_models:
-            pred = model.generator(data)
-            base_preds.append(pred)
-        
-        base_preds = torch.stack(base_preds, dim=1)
-        return self.meta_learner(base_preds)
+        base_preds = self.base_predictions(data)
+        with self.autocast():
+            return self.meta_learner(base_preds).float()
+    
+    def state_dict(self):
+        """Weights of every member and the meta-learner (optimizers excluded)."""
+        return {
+            'generators': [model.generator.state_dict() for model in self.base_models],
+            'discriminators': [model.discriminator.state_dict() for model in self.base_models],
+            'meta_learner': self.meta_learner.state_dict()
+        }
+    
+    def load_state_dict(self, state):
+        if len(state['generators']) < self.n_models:
+            # Saved after failed members were dropped
+            self.drop_members(range(len(state['generators']), self.n_models))
+        for model, generator, discriminator in zip(self.base_models, state['generators'],
+                                                   state['discriminators']):
+            model.generator.load_state_dict(generator)
+            model.discriminator.load_state_dict(discriminator)
+        self.meta_learner.load_state_dict(state['meta_learner'])
+        self._stacked = None
+        self._meta_inputs = None
+    
+    def save(self, path):
+        """Write the trained ensemble atomically to ``path``."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        atomic_save(self.state_dict(), path)
+    
+    def load(self, path):
+        self.load_state_dict(torch.load(path, map_location=self.device))
+    
+    def export(self, path, example_input, format='aoti'):
+        """Write a compiled inference artifact of the whole ensemble (see ``export_ensemble``)."""
+        return export_ensemble(self, path, example_input, format)
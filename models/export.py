@@ -0,0 +1,87 @@
+# 
+
+import copy
+import json
+from pathlib import Path
+from typing import Dict, Tuple
+
+import torch
+import torch.nn as nn
+
+from models.inference import read_metadata
+
+FORMATS = ('aoti', 'export', 'onnx')
+
+class EnsembleInference(nn.Module):
+    """Inference-only view of an ensemble: base generators feeding the meta-learner."""
+    
+    def __init__(self, generators, meta_learner):
+        super(EnsembleInference, self).__init__()
+        self.generators = nn.ModuleList(generators)
+        self.meta_learner = meta_learner
+    
+    def forward(self, x):
+        base_preds = torch.cat([generator(x) for generator in self.generators], dim=1)
+        return self.meta_learner(base_preds)
+
+def _metadata_path(path: Path) -> Path:
+    return path.with_name(path.name + '.json')
+
+def export_ensemble(ensemble, path: str, example_input: torch.Tensor, format: str = 'aoti',
+                    max_batch: int = 4096) -> Path:
+    """Export every base generator plus the meta-learner as one artifact.
+    
+    ``'export'`` saves a ``torch.export`` program; ``'aoti'`` additionally
+    compiles it ahead of time with AOTInductor into native kernels (this
+    needs a C++ compiler at export time, not at load time). Either loads
+    with plain torch through ``load_exported``, without the model or
+    training code. ``'onnx'`` converts the program to an ONNX graph (input
+    ``gaf``, output ``prediction``) for onnxruntime, which needs no torch
+    at all (see ``models.inference``). The batch dimension is dynamic up
+    to ``max_batch``; the ConvLSTM time loop is unrolled, so time steps,
+    channels and image size are fixed to ``example_input``'s. A
+    ``<path>.json`` sidecar records the format and input shape.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format {format!r}, expected one of {FORMATS}")
+    module = EnsembleInference(
+        [copy.deepcopy(model.generator) for model in ensemble.base_models],
+        copy.deepcopy(ensemble.meta_learner)
+    ).cpu().eval()
+    example_input = example_input.detach().cpu()
+    if example_input.size(0) < 2:
+        # A batch of one would be specialized rather than kept dynamic
+        example_input = example_input.expand(2, *example_input.shape[1:])
+    
+    batch = torch.export.Dim('batch', min=1, max=max_batch)
+    with torch.no_grad():
+        program = torch.export.export(module, (example_input,), dynamic_shapes=({0: batch},))
+    
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if format == 'aoti':
+        from torch._inductor import aoti_compile_and_package
+        aoti_compile_and_package(program, package_path=str(path))
+    elif format == 'onnx':
+        torch.onnx.export(program, (example_input,), str(path), dynamo=True, verbose=False,
+                          input_names=['gaf'], output_names=['prediction'])
+    else:
+        torch.export.save(program, str(path))
+    
+    metadata = {
+        'format': format,
+        'n_models': len(module.generators),
+        'input_shape': ['batch'] + list(example_input.shape[1:]),
+        'max_batch': max_batch
+    }
+    _metadata_path(path).write_text(json.dumps(metadata, indent=2))
+    return path
+
+def load_exported(path: str) -> Tuple[object, Dict]:
+    """Load an ``'aoti'`` or ``'export'`` ensemble; returns (callable model, metadata)."""
+    path = Path(path)
+    metadata = read_metadata(path)
+    if metadata['format'] == 'aoti':
+        from torch._inductor import aoti_load_package
+        return aoti_load_package(str(path)), metadata
+    return torch.export.load(str(path)).module(), metadata
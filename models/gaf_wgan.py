@@ -5,12 +5,35 @@ import torch.nn as nn
 import torch.autograd as autograd
 
 class GAFWGAN:
-    """Single GAF-WGAN implementation."""
+    """Single GAF-WGAN implementation.
     
-    def __init__(self, generator, discriminator, device='cuda'):
+    ``penalty`` picks the critic regularizer: ``'gp'`` is the WGAN-GP
+    interpolate penalty, ``'r1'`` a zero-centred gradient penalty on the
+    real batch that reuses the critic's forward pass over it, and ``'lp'``
+    a difference-quotient Lipschitz penalty between real/fake pairs that
+    needs neither an extra forward nor a double backward. With
+    ``penalty_interval`` k > 1 the penalty is lazy: it is applied on every
+    k-th critic step only, scaled by k to keep its average strength.
+    
+    ``mixed_precision`` runs the generator and critic forwards under
+    bfloat16 autocast. Losses are reduced in float32, and the ``'gp'``
+    penalty (its interpolate forward, gradient and norm) runs with autocast
+    disabled.
+    """
+    
+    penalties = ('gp', 'r1', 'lp')
+    
+    def __init__(self, generator, discriminator, device='cuda', penalty='gp',
+                 penalty_interval=1, penalty_weight=10.0, mixed_precision=False):
+        if penalty not in self.penalties:
+            raise ValueError(f"Unknown penalty {penalty!r}, expected one of {self.penalties}")
         self.generator = generator.to(device)
         self.discriminator = discriminator.to(device)
         self.device = device
+        self.penalty = penalty
+        self.penalty_interval = penalty_interval
+        self.penalty_weight = penalty_weight
+        self.mixed_precision = mixed_precision
         
         # Optimizers
         self.g_optimizer = torch.optim.Adam(
@@ -20,6 +43,32 @@ class GAFWGAN:
             self.discriminator.parameters(), lr=1e-4, betas=(0.5, 0.9)
         )
         
+        # Discriminator steps taken; the generator updates every fifth
+        self.iteration = 0
+    
+    def autocast(self, enabled=None):
+        """bfloat16 autocast context for the model's device; a no-op unless enabled."""
+        enabled = self.mixed_precision if enabled is None else enabled
+        return torch.autocast(torch.device(self.device).type, dtype=torch.bfloat16,
+                              enabled=enabled)
+    
+    def state_dict(self):
+        """Networks, optimizers and step counter, for checkpointing."""
+        return {
+            'generator': self.generator.state_dict(),
+            'discriminator': self.discriminator.state_dict(),
+            'g_optimizer': self.g_optimizer.state_dict(),
+            'd_optimizer': self.d_optimizer.state_dict(),
+            'iteration': self.iteration
+        }
+    
+    def load_state_dict(self, state):
+        self.generator.load_state_dict(state['generator'])
+        self.discriminator.load_state_dict(state['discriminator'])
+        self.g_optimizer.load_state_dict(state['g_optimizer'])
+        self.d_optimizer.load_state_dict(state['d_optimizer'])
+        self.iteration = state.get('iteration', 0)
+    
     def gradient_penalty(self, real_samples, fake_samples):
         """Calculate gradient penalty for WGAN-GP."""
         batch_size = real_samples.size(0)
@@ -47,6 +96,31 @@ class GAFWGAN:
         gradient_penalty = ((gradients.norm(2, dim=1) - 1) ** 2).mean()
         return gradient_penalty
     
+    def r1_penalty(self, real_samples, real_validity):
+        """Calculate the R1 penalty, 0.5 * E[||grad D(real)||^2].
+        
+        ``real_samples`` must have required grad when ``real_validity``
+        was computed from them.
+        """
+        gradients = autograd.grad(
+            outputs=real_validity.sum(),
+            inputs=real_samples,
+            create_graph=True
+        )[0]
+        return 0.5 * gradients.pow(2).view(real_samples.size(0), -1).sum(dim=1).mean()
+    
+    def lipschitz_penalty(self, real_samples, fake_samples, real_validity, fake_validity):
+        """Calculate the one-sided difference-quotient Lipschitz penalty.
+        
+        Penalizes |D(real) - D(fake)| / ||real - fake|| above 1 for each
+        real/fake pair, from the critic outputs already computed for the
+        loss: no extra forward and no double backward.
+        """
+        batch_size = real_samples.size(0)
+        distance = (real_samples - fake_samples).view(batch_size, -1).norm(2, dim=1)
+        slope = (real_validity - fake_validity).view(batch_size).abs() / (distance + 1e-12)
+        return torch.relu(slope - 1).pow(2).mean()
+    
     def train_step(self, real_data, real_price):
         """Single training step."""
         batch_size = real_data.size(0)
@@ -54,29 +128,47 @@ class GAFWGAN:
         # Train Discriminator
         self.d_optimizer.zero_grad()
         
-        # Generate fake data
-        z = torch.randn(batch_size, 100).to(self.device)  # Latent vector
-        fake_data = self.generator(z)
-        
-        # Calculate discriminator outputs
-        real_validity = self.discriminator(real_data)
-        fake_validity = self.discriminator(fake_data.detach())
+        # Lazy regularization: penalize every penalty_interval-th step only
+        penalize = self.iteration % self.penalty_interval == 0
+        if penalize and self.penalty == 'r1':
+            real_data = real_data.detach().requires_grad_(True)
         
-        # Gradient penalty
-        gp = self.gradient_penalty(real_data, fake_data.detach())
+        with self.autocast():
+            # Generate fake data
+            z = torch.randn(batch_size, 100).to(self.device)  # Latent vector
+            fake_data = self.generator(z)
+            
+            # Calculate discriminator outputs
+            real_validity = self.discriminator(real_data).float()
+            fake_validity = self.discriminator(fake_data.detach()).float()
+        fake_data = fake_data.float()
         
         # Discriminator loss
-        d_loss = -torch.mean(real_validity) + torch.mean(fake_validity) + 10.0 * gp
+        d_loss = -torch.mean(real_validity) + torch.mean(fake_validity)
+        if penalize:
+            if self.penalty == 'gp':
+                with self.autocast(enabled=False):
+                    penalty = self.gradient_penalty(real_data, fake_data.detach())
+            elif self.penalty == 'r1':
+                penalty = self.r1_penalty(real_data, real_validity)
+            else:
+                penalty = self.lipschitz_penalty(real_data, fake_data.detach(),
+                                                 real_validity, fake_validity)
+            d_loss = d_loss + self.penalty_weight * self.penalty_interval * penalty
         d_loss.backward()
         self.d_optimizer.step()
         
+        update_generator = self.iteration % 5 == 0
+        self.iteration += 1
+        
         # Train Generator
-        if self.iteration % 5 == 0:  # Update generator less frequently
+        if update_generator:  # Update generator less frequently
             self.g_optimizer.zero_grad()
             
             # Generate fake data
-            fake_data = self.generator(z)
-            fake_validity = self.discriminator(fake_data)
+            with self.autocast():
+                fake_data = self.generator(z)
+                fake_validity = self.discriminator(fake_data).float()
             
             # Generator loss
             g_loss = -torch.mean(fake_validity)
@@ -2,6 +2,7 @@
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 class ConvLSTMCell(nn.Module):
     """ConvLSTM cell implementation."""
@@ -22,7 +23,7 @@ class ConvLSTMCell(nn.Module):
         self.Whc = nn.Conv2d(hidden_channels, hidden_channels, kernel_size, padding=self.padding)
         self.Wxo = nn.Conv2d(input_channels, hidden_channels, kernel_size, padding=self.padding)
         self.Who = nn.Conv2d(hidden_channels, hidden_channels, kernel_size, padding=self.padding)
-
+    
     def forward(self, x, h, c):
         """Forward pass."""
         ci = torch.sigmoid(self.Wxi(x) + self.Whi(h))
@@ -32,37 +33,141 @@ class ConvLSTMCell(nn.Module):
         ch = co * torch.tanh(cc)
         return ch, cc
 
+class FusedConvLSTMCell(nn.Module):
+    """ConvLSTM cell computing all four gates with one convolution.
+    
+    ``gates`` convolves the concatenated ``[x, h]`` into 4 * hidden channels
+    (input, forget, cell, output, in that order) that are then split, in
+    place of ``ConvLSTMCell``'s eight convolutions. With no state (the first
+    time step) only the input half of the kernel is applied, as h and c are
+    zero. State dicts saved from ``ConvLSTMCell`` load directly.
+    """
+    
+    _unfused = (('Wxi', 'Whi'), ('Wxf', 'Whf'), ('Wxc', 'Whc'), ('Wxo', 'Who'))
+    
+    def __init__(self, input_channels, hidden_channels, kernel_size):
+        super(FusedConvLSTMCell, self).__init__()
+        
+        self.input_channels = input_channels
+        self.hidden_channels = hidden_channels
+        self.kernel_size = kernel_size
+        self.padding = kernel_size // 2
+        
+        self.gates = nn.Conv2d(input_channels + hidden_channels, 4 * hidden_channels,
+                               kernel_size, padding=self.padding)
+    
+    @classmethod
+    def from_cell(cls, cell):
+        """Fused copy of an eight-convolution ``ConvLSTMCell``."""
+        fused = cls(cell.input_channels, cell.hidden_channels, cell.kernel_size)
+        fused.load_state_dict(cell.state_dict())
+        return fused.to(cell.Wxi.weight.device)
+    
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # Fold ConvLSTMCell weights: W[x|h] per gate, stacked by gate, and
+        # the input and hidden biases summed
+        if prefix + 'Wxi.weight' in state_dict:
+            weights, biases = [], []
+            for wx, wh in self._unfused:
+                weights.append(torch.cat([state_dict.pop(f'{prefix}{wx}.weight'),
+                                          state_dict.pop(f'{prefix}{wh}.weight')], dim=1))
+                biases.append(state_dict.pop(f'{prefix}{wx}.bias') +
+                              state_dict.pop(f'{prefix}{wh}.bias'))
+            state_dict[prefix + 'gates.weight'] = torch.cat(weights)
+            state_dict[prefix + 'gates.bias'] = torch.cat(biases)
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+    
+    def forward(self, x, h=None, c=None):
+        """Forward pass; ``h`` and ``c`` of None mean a zero state."""
+        if h is None:
+            weight = self.gates.weight[:, :self.input_channels]
+            gates = F.conv2d(x, weight, self.gates.bias, padding=self.padding)
+        else:
+            gates = self.gates(torch.cat([x, h], dim=1))
+        i, f, g, o = gates.chunk(4, dim=1)
+        
+        cc = torch.sigmoid(i) * torch.tanh(g)
+        if c is not None:
+            cc = cc + torch.sigmoid(f) * c
+        ch = torch.sigmoid(o) * torch.tanh(cc)
+        return ch, cc
+
 class Generator(nn.Module):
-    """WG Generator implementation with ConvLSTM layers."""
+    """WG Generator implementation with ConvLSTM layers.
+    
+    ``head`` selects how the last ConvLSTM state reaches the dense stack:
+    ``'flatten'`` feeds the full hidden x image_size^2 map to ``dense1``
+    (about 29.5M weights at the default size), ``'pool'`` first averages it
+    down to ``pool_size`` x ``pool_size`` and ``'conv'`` applies two stride-2
+    convolutions before that pooling.
+    """
+    
+    heads = ('flatten', 'pool', 'conv')
     
-    def __init__(self):
+    def __init__(self, input_channels=3, image_size=60, hidden_channels=64, fused_gates=True,
+                 head='flatten', pool_size=4):
         super(Generator, self).__init__()
         
+        if head not in self.heads:
+            raise ValueError(f"Unknown generator head {head!r}, expected one of {self.heads}")
+        self.input_channels = input_channels
+        self.image_size = image_size
+        self.hidden_channels = hidden_channels
+        self.fused_gates = fused_gates
+        self.head = head
+        
         # ConvLSTM layers
-        self.conv_lstm1 = ConvLSTMCell(3, 64, 3)  # Input: RGB channels
-        self.conv_lstm2 = ConvLSTMCell(64, 64, 3)
+        cell = FusedConvLSTMCell if fused_gates else ConvLSTMCell
+        self.conv_lstm1 = cell(input_channels, hidden_channels, 3)  # Input: GAF channels
+        self.conv_lstm2 = cell(hidden_channels, hidden_channels, 3)
+        
+        # Spatial reduction ahead of the dense layers
+        if head == 'flatten':
+            self.reduce = nn.Identity()
+            reduced_size = image_size
+        elif head == 'pool':
+            self.reduce = nn.AdaptiveAvgPool2d(pool_size)
+            reduced_size = pool_size
+        else:
+            self.reduce = nn.Sequential(
+                nn.Conv2d(hidden_channels, hidden_channels, 3, stride=2, padding=1),
+                nn.ReLU(),
+                nn.Conv2d(hidden_channels, hidden_channels, 3, stride=2, padding=1),
+                nn.ReLU(),
+                nn.AdaptiveAvgPool2d(pool_size)
+            )
+            reduced_size = pool_size
         
         # Dense layers
         self.flatten = nn.Flatten()
-        self.dense1 = nn.Linear(64 * 60 * 60, 128)
+        self.dense1 = nn.Linear(hidden_channels * reduced_size * reduced_size, 128)
         self.dense2 = nn.Linear(128, 64)
         self.dense3 = nn.Linear(64, 32)
         self.dense4 = nn.Linear(32, 16)
         self.output = nn.Linear(16, 1)
         
         self.relu = nn.ReLU()
-        
+    
     def forward(self, x):
         """Forward pass.
         
         Args:
-            x: Input tensor of shape (batch_size, time_steps, height, width, channels)
+            x: Input tensor of shape (batch_size, time_steps, channels, height, width),
+                as produced by MultiChannelGAFBuilder, or channels-last
+                (batch_size, time_steps, height, width, channels)
         """
+        if x.size(2) != self.input_channels and x.size(-1) == self.input_channels:
+            x = x.permute(0, 1, 4, 2, 3)
         batch_size, seq_len = x.size(0), x.size(1)
-        h1, c1 = torch.zeros(batch_size, 64, 60, 60).to(x.device), \
-                 torch.zeros(batch_size, 64, 60, 60).to(x.device)
-        h2, c2 = torch.zeros(batch_size, 64, 60, 60).to(x.device), \
-                 torch.zeros(batch_size, 64, 60, 60).to(x.device)
+        if self.fused_gates:
+            # Fused cells treat a None state as zeros without materializing it
+            h1 = c1 = h2 = c2 = None
+        else:
+            state_shape = (batch_size, self.hidden_channels, self.image_size, self.image_size)
+            h1, c1 = torch.zeros(state_shape).to(x.device), \
+                     torch.zeros(state_shape).to(x.device)
+            h2, c2 = torch.zeros(state_shape).to(x.device), \
+                     torch.zeros(state_shape).to(x.device)
         
         # Process sequence through ConvLSTM layers
         for t in range(seq_len):
@@ -70,7 +175,7 @@ class Generator(nn.Module):
             h2, c2 = self.conv_lstm2(h1, h2, c2)
         
         # Dense layers
-        x = self.flatten(h2)
+        x = self.flatten(self.reduce(h2))
         x = self.relu(self.dense1(x))
         x = self.relu(self.dense2(x))
         x = self.relu(self.dense3(x))
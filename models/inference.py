@@ -0,0 +1,95 @@
+# 
+
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+# Serving backends behind one ``predict(batch)`` interface. Only NumPy is
+# imported here: torch is imported by the torch backends themselves, so the
+# ONNX backend runs on an onnxruntime-only install.
+
+class Predictor(ABC):
+    """Ensemble inference backend.
+    
+    ``predict`` takes a (batch, time_steps, channels, height, width) array
+    (or anything ``np.asarray`` accepts) and returns the (batch, 1) float32
+    ensemble prediction as a NumPy array.
+    """
+    
+    @abstractmethod
+    def predict(self, batch) -> np.ndarray:
+        pass
+
+class TorchPredictor(Predictor):
+    """Eager ``GAFEWGANEnsemble.predict`` with gradients disabled.
+    
+    ``threads`` sets torch's intra-op thread count, which is process-wide.
+    """
+    
+    def __init__(self, ensemble, threads: Optional[int] = None):
+        import torch
+        self.torch = torch
+        if threads:
+            torch.set_num_threads(threads)
+        self.ensemble = ensemble
+        self.ensemble.meta_learner.eval()
+    
+    def predict(self, batch) -> np.ndarray:
+        torch = self.torch
+        x = torch.as_tensor(np.asarray(batch, dtype=np.float32), device=self.ensemble.device)
+        with torch.no_grad():
+            return self.ensemble.predict(x).cpu().numpy()
+
+class ExportedPredictor(Predictor):
+    """An ``'aoti'`` or ``'export'`` artifact loaded with ``load_exported``.
+    
+    ``threads`` sets torch's intra-op thread count, which is process-wide.
+    """
+    
+    def __init__(self, path, threads: Optional[int] = None):
+        import torch
+        from models.export import load_exported
+        self.torch = torch
+        if threads:
+            torch.set_num_threads(threads)
+        self.model, self.metadata = load_exported(path)
+    
+    def predict(self, batch) -> np.ndarray:
+        torch = self.torch
+        with torch.no_grad():
+            return self.model(torch.from_numpy(np.asarray(batch, dtype=np.float32))).numpy()
+
+class OnnxPredictor(Predictor):
+    """An ``'onnx'`` artifact run by onnxruntime on the CPU, without torch.
+    
+    ``threads`` sets onnxruntime's intra-op thread count (its default is
+    one per physical core).
+    """
+    
+    def __init__(self, path, threads: Optional[int] = None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.metadata = read_metadata(path)
+    
+    def predict(self, batch) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+def read_metadata(path) -> Dict:
+    """The sidecar ``models.export.export_ensemble`` writes next to ``path``."""
+    path = Path(path)
+    return json.loads(path.with_name(path.name + '.json').read_text())
+
+def load_predictor(path, threads: Optional[int] = None) -> Predictor:
+    """Predictor for an exported artifact, picked by the format in its sidecar."""
+    if read_metadata(path)['format'] == 'onnx':
+        return OnnxPredictor(path, threads)
+    return ExportedPredictor(path, threads)
@@ -0,0 +1,142 @@
+# 
+
+import itertools
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from models.inference import OnnxPredictor, read_metadata
+
+# Post-training int8 quantization of an 'onnx' ensemble artifact with
+# onnxruntime's quantizer. Like models.inference this needs no torch, and
+# the result is again an 'onnx' artifact that load_predictor serves.
+
+def _inputs(batch) -> np.ndarray:
+    """GAF inputs of a loader-style (inputs, targets) batch, or of a bare array."""
+    if isinstance(batch, (tuple, list)):
+        batch = batch[0]
+    return np.ascontiguousarray(batch, dtype=np.float32)
+
+def _nonempty(batches: Iterable, what: str) -> Iterable:
+    """``batches`` unchanged, or a ValueError if it yields nothing."""
+    batches = iter(batches)
+    first = next(batches, None)
+    if first is None:
+        raise ValueError(f"No {what} batches given")
+    return itertools.chain([first], batches)
+
+def artifact_bytes(path) -> int:
+    """Size of an ONNX model file plus its external weight data, if any."""
+    path = Path(path)
+    data = path.with_name(path.name + '.data')
+    return path.stat().st_size + (data.stat().st_size if data.exists() else 0)
+
+def quantize_ensemble(path, output_path, calibration_batches: Optional[Iterable] = None,
+                      per_channel: bool = True) -> Path:
+    """Write an int8 copy of the ONNX ensemble at ``path`` to ``output_path``.
+    
+    The Linear layers of every generator and of the meta-learner (ONNX
+    Gemm/MatMul) get dynamic int8 quantization: int8 weights, activations
+    quantized per call. When ``calibration_batches`` (loader-style
+    (inputs, targets) batches, e.g. validation GAF windows) are given, the
+    ConvLSTM and head convolutions are additionally quantized statically,
+    with activation ranges calibrated on those batches.
+    """
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_dynamic, quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    
+    class BatchReader(CalibrationDataReader):
+        def __init__(self, input_name, batches):
+            self.input_name = input_name
+            self.batches = iter(batches)
+        
+        def get_next(self):
+            batch = next(self.batches, None)
+            return None if batch is None else {self.input_name: _inputs(batch)}
+    
+    path, output_path = Path(path), Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    metadata = read_metadata(path)
+    if metadata['format'] != 'onnx':
+        raise ValueError(f"Quantization needs an 'onnx' artifact, got {metadata['format']!r}")
+    if calibration_batches is not None:
+        calibration_batches = _nonempty(calibration_batches, 'calibration')
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Shape inference and graph cleanup ahead of quantization; the stale
+        # shapes the exporter leaves in the graph would fail the quantizer
+        model = Path(tmpdir) / 'preprocessed.onnx'
+        quant_pre_process(str(path), str(model), save_as_external_data=True,
+                          all_tensors_to_one_file=True)
+        if calibration_batches is not None:
+            static = Path(tmpdir) / 'static.onnx'
+            input_name = onnx.load(str(model), load_external_data=False).graph.input[0].name
+            quantize_static(str(model), str(static), BatchReader(input_name, calibration_batches),
+                            quant_format=QuantFormat.QDQ, op_types_to_quantize=['Conv'],
+                            per_channel=per_channel, activation_type=QuantType.QUInt8,
+                            weight_type=QuantType.QInt8, use_external_data_format=True)
+            model = static
+        quantize_dynamic(str(model), str(output_path), op_types_to_quantize=['MatMul', 'Gemm'],
+                         per_channel=per_channel, weight_type=QuantType.QInt8,
+                         use_external_data_format=True)
+    
+    metadata['quantization'] = {
+        'linear': 'dynamic int8',
+        'conv': 'static int8' if calibration_batches is not None else None,
+        'per_channel': per_channel
+    }
+    output_path.with_name(output_path.name + '.json').write_text(json.dumps(metadata, indent=2))
+    return output_path
+
+def quantization_report(path, quantized_path, batches: Iterable,
+                        threads: Optional[int] = None) -> Dict[str, float]:
+    """Accuracy drift, size and latency of a quantized artifact against its float original.
+    
+    Both artifacts predict every batch; batches are loader-style
+    (inputs, targets) pairs, and when targets are present the mean squared
+    error of each model against them is reported too. ``float_mean_abs``
+    (the mean magnitude of the float predictions) gives the scale to read
+    the drift against. Latency is wall time per sample after one warm-up
+    call.
+    """
+    batches = _nonempty(batches, 'report')
+    reference, quantized = OnnxPredictor(path, threads), OnnxPredictor(quantized_path, threads)
+    drift, scale, errors = [], [], {'float': [], 'quantized': []}
+    elapsed = {'float': 0.0, 'quantized': 0.0}
+    samples = 0
+    for i, batch in enumerate(batches):
+        inputs = _inputs(batch)
+        predictions = {}
+        for name, predictor in (('float', reference), ('quantized', quantized)):
+            if i == 0:
+                predictor.predict(inputs)
+            start = time.perf_counter()
+            predictions[name] = predictor.predict(inputs)
+            elapsed[name] += time.perf_counter() - start
+            if isinstance(batch, (tuple, list)):
+                target = np.asarray(batch[1], dtype=np.float32).reshape(predictions[name].shape)
+                errors[name].append((predictions[name] - target) ** 2)
+        drift.append(np.abs(predictions['quantized'] - predictions['float']))
+        scale.append(np.abs(predictions['float']))
+        samples += len(inputs)
+    
+    drift = np.concatenate(drift)
+    report = {
+        'max_abs_drift': float(drift.max()),
+        'mean_abs_drift': float(drift.mean()),
+        'float_mean_abs': float(np.concatenate(scale).mean()),
+        'float_bytes': artifact_bytes(path),
+        'quantized_bytes': artifact_bytes(quantized_path),
+        'float_ms_per_sample': 1e3 * elapsed['float'] / samples,
+        'quantized_ms_per_sample': 1e3 * elapsed['quantized'] / samples
+    }
+    if errors['float']:
+        report['float_mse'] = float(np.concatenate(errors['float']).mean())
+        report['quantized_mse'] = float(np.concatenate(errors['quantized']).mean())
+    return report
@@ -0,0 +1,149 @@
+# 
+
+import asyncio
+import logging
+import random
+from itertools import chain
+from typing import Dict, List, Sequence
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from utils.rate_limiter import TokenBucket
+
+DAILY_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+DAILY_ADJUSTED_COLUMNS = ['open', 'high', 'low', 'close', 'adjusted_close',
+                          'volume', 'dividend', 'split_coefficient']
+
+class RetryableError(Exception):
+    """Transient failure (throttling, 5xx) worth another attempt."""
+
+def parse_time_series(data: Dict, symbol: str, columns: Sequence[str]) -> pd.DataFrame:
+    """Build a date-indexed frame, oldest first, from an Alpha Vantage response.
+    
+    The field strings of every bar go through one ``np.fromiter`` pass into a
+    single preallocated float64 (n_bars, n_columns) block, and the ISO date
+    keys are parsed by NumPy's datetime64 conversion in one call, instead of
+    building an object frame and converting it column by column.
+    """
+    key = next((k for k in data if k.startswith('Time Series')), None)
+    time_series = data.get(key, {}) if key else {}
+    if not time_series:
+        raise ValueError(f"No data returned for symbol {symbol}")
+    
+    n_bars, n_columns = len(time_series), len(columns)
+    n_fields = len(next(iter(time_series.values())))
+    if n_fields != n_columns:
+        raise ValueError(f"Expected {n_columns} fields per bar for {symbol}, got {n_fields}")
+    
+    values = np.fromiter(
+        chain.from_iterable(bar.values() for bar in time_series.values()),
+        dtype=np.float64, count=n_bars * n_columns
+    ).reshape(n_bars, n_columns)
+    dates = np.fromiter(time_series, dtype='datetime64[D]', count=n_bars).astype('datetime64[ns]')
+    
+    # Alpha Vantage sends newest first; reversing is enough in that case
+    steps = np.diff(dates)
+    if (steps < np.timedelta64(0)).all():
+        values, dates = values[::-1], dates[::-1]
+    elif not (steps >= np.timedelta64(0)).all():
+        order = np.argsort(dates, kind='stable')
+        values, dates = values[order], dates[order]
+    
+    return pd.DataFrame(np.ascontiguousarray(values), index=pd.DatetimeIndex(dates, name='date'),
+                        columns=list(columns))
+
+class AsyncMarketFetcher:
+    """Fetches many symbols concurrently within a shared API quota.
+    
+    Up to ``max_in_flight`` requests run at once; each one first takes a
+    token from the shared ``TokenBucket``, so latency is overlapped while
+    the quota is still respected across processes. Throttling notices,
+    429s, 5xx responses and network errors are retried with exponential
+    backoff and full jitter; API errors such as an unknown symbol are not.
+    """
+    
+    def __init__(self, api_key: str, limiter: TokenBucket,
+                 function: str = 'TIME_SERIES_DAILY_ADJUSTED',
+                 columns: Sequence[str] = DAILY_ADJUSTED_COLUMNS,
+                 max_in_flight: int = 5, max_retries: int = 3, backoff: float = 1.0,
+                 timeout: float = 30.0, base_url: str = "https://www.alphavantage.co/query"):
+        self.api_key = api_key
+        self.limiter = limiter
+        self.function = function
+        self.columns = list(columns)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.base_url = base_url
+        self.logger = logging.getLogger(__name__)
+    
+    async def _request(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                       params: Dict) -> Dict:
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    await self.limiter.acquire_async()
+                    async with session.get(self.base_url, params=params) as response:
+                        if response.status == 429 or response.status >= 500:
+                            raise RetryableError(f"HTTP {response.status}")
+                        if response.status >= 400:
+                            raise ValueError(f"HTTP {response.status}")
+                        data = await response.json(content_type=None)
+                
+                if "Error Message" in data:
+                    raise ValueError(f"API Error: {data['Error Message']}")
+                # Alpha Vantage reports throttling with a 200 and a notice
+                if "Note" in data or "Information" in data:
+                    raise RetryableError(data.get("Note") or data.get("Information"))
+                return data
+            
+            except (RetryableError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                self.logger.warning(f"Request for {params['symbol']} failed ({e}); "
+                                    f"retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+    
+    async def _fetch_one(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                         symbol: str, outputsize: str) -> pd.DataFrame:
+        params = {
+            "function": self.function,
+            "symbol": symbol,
+            "outputsize": outputsize,
+            "apikey": self.api_key
+        }
+        data = await self._request(session, semaphore, params)
+        return parse_time_series(data, symbol, self.columns)
+    
+    async def fetch_all(self, requests: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+        """Fetch ``{symbol: outputsize}`` concurrently; failed symbols are
+        logged and left out of the result."""
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            symbols = list(requests)
+            frames = await asyncio.gather(
+                *(self._fetch_one(session, semaphore, s, requests[s]) for s in symbols),
+                return_exceptions=True
+            )
+        
+        results = {}
+        for symbol, frame in zip(symbols, frames):
+            if isinstance(frame, Exception):
+                self.logger.error(f"Failed to fetch {symbol}: {frame}")
+                continue
+            results[symbol] = frame
+        return results
+    
+    def fetch_many(self, requests: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+        """Blocking wrapper around ``fetch_all``."""
+        return asyncio.run(self.fetch_all(requests))
+    
+    def fetch_symbols(self, symbols: List[str], outputsize: str = 'full') -> Dict[str, pd.DataFrame]:
+        return self.fetch_many({s: outputsize for s in symbols})
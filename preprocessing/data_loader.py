@@ -1,23 +1,58 @@
 from alpha_vantage.timeseries import TimeSeries
 import pandas as pd
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from preprocessing.feature_engineering import TechnicalIndicators
+from preprocessing.gaf import GAFConverter, MultiChannelGAFBuilder
+from preprocessing.ohlcv_store import OHLCVStore
+from preprocessing.async_fetcher import AsyncMarketFetcher
 
 class StockDataLoader:
     """Load and preprocess stock data."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, gaf_size: int = 60, gaf_lookback: Optional[int] = None,
+                 store: Optional[OHLCVStore] = None,
+                 fetcher: Optional[AsyncMarketFetcher] = None,
+                 gaf_builder: Optional[MultiChannelGAFBuilder] = None):
         self.ts = TimeSeries(key=api_key, output_format='pandas')
         self.ti = TechnicalIndicators()
+        self.gaf_converter = GAFConverter(gaf_size, gaf_lookback)
+        self.gaf_builder = gaf_builder
+        self.store = store
+        self.fetcher = fetcher
         
-    def fetch_data(self, symbol: str) -> pd.DataFrame:
-        """Fetch daily stock data from Alpha Vantage."""
-        data, _ = self.ts.get_daily(symbol=symbol, outputsize='full')
+    def _download(self, symbol: str, outputsize: str = 'full') -> pd.DataFrame:
+        data, _ = self.ts.get_daily(symbol=symbol, outputsize=outputsize)
         data.columns = ['open', 'high', 'low', 'close', 'volume']
         return data
+        
+    def fetch_data(self, symbol: str) -> pd.DataFrame:
+        """Fetch daily stock data from Alpha Vantage.
+        
+        With a local store only the compact recent window is downloaded and
+        appended; the full history is then read back from disk, oldest first.
+        """
+        if self.store is None:
+            return self._download(symbol)
+        self.store.refresh(symbol, lambda outputsize: self._download(symbol, outputsize))
+        return self.store.read_frame(symbol)
+    
+    def fetch_many(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """Fetch several symbols, concurrently when a fetcher is configured.
+        
+        Symbols that fail to download are left out of the result.
+        """
+        if self.fetcher is None:
+            return {symbol: self.fetch_data(symbol) for symbol in symbols}
+        if self.store is None:
+            return self.fetcher.fetch_symbols(symbols)
+        self.store.refresh_many(symbols, self.fetcher.fetch_many)
+        stored = set(self.store.symbols())
+        return {symbol: self.store.read_frame(symbol) for symbol in symbols if symbol in stored}
     
-    def process_data(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
-        """Process raw data into features."""
+    def build_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Combine raw prices with technical indicators."""
         # Calculate indicators
         basic_indicators = self.ti.calculate_basic_indicators(df)
         advanced_indicators = self.ti.calculate_advanced_indicators(df, basic_indicators)
@@ -30,20 +65,47 @@ class StockDataLoader:
         ], axis=1)
         
         # Remove NaN values
-        features = features.dropna()
+        return features.dropna()
+    
+    def process_series(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Process raw data into 1-D series only, leaving GAF encoding to the dataset."""
+        features = self.build_features(df)
+        
+        return {
+            'close': features['close'].values,
+            'features': features.values
+        }
+    
+    def process_data(self, df: pd.DataFrame,
+                     gaf_builder: Optional[MultiChannelGAFBuilder] = None) -> Dict[str, np.ndarray]:
+        """Process raw data into features.
+        
+        Without a builder (given here or to the constructor), ``gaf_data``
+        holds single-channel close GASF images of shape (n, size, size); with
+        one it holds (n, channels, size, size). Each image encodes the
+        ``lookback`` bars before its target close.
+        """
+        features = self.build_features(df)
+        gaf_builder = gaf_builder or self.gaf_builder
         
         # Convert to GAF format
-        gaf_converter = GAFConverter()
-        gaf_data = []
+        if gaf_builder is not None:
+            windows = gaf_builder.sliding_windows(features)[:-1]
+            return {
+                'gaf_data': gaf_builder.transform(windows),
+                'prices': features['close'].values[gaf_builder.lookback:],
+                'features': features.values[gaf_builder.lookback:]
+            }
+        
+        gaf_converter = self.gaf_converter
+        lookback = gaf_converter.lookback
         
-        # Create sequences of 60 days
-        for i in range(60, len(features)):
-            sequence = features.iloc[i-60:i]
-            gaf = gaf_converter.transform(sequence['close'].values)
-            gaf_data.append(gaf)
+        # Create sequences of `lookback` days: window i-lookback:i pairs with close[i]
+        windows = gaf_converter.sliding_windows(features['close'].values)[:-1]
+        gaf_data = gaf_converter.transform_batch(windows)
         
         return {
-            'gaf_data': np.array(gaf_data),
-            'prices': features['close'].values[60:],
-            'features': features.values[60:]
+            'gaf_data': gaf_data,
+            'prices': features['close'].values[lookback:],
+            'features': features.values[lookback:]
         }
@@ -0,0 +1,63 @@
+# 
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from preprocessing.gaf import GAFConverter
+
+class LazyGAFDataset(Dataset):
+    """Dataset that encodes GAF windows on demand from 1-D close series.
+    
+    Only each symbol's close and feature series are held in memory; the GAF
+    image for sample ``i`` is computed when it is requested. Sample ``i`` of a
+    symbol pairs the window ``close[i:i+lookback]`` with the target
+    ``close[i+lookback]``, matching ``StockDataLoader.process_data``.
+    
+    Indexing with a list of indices (e.g. through a ``BatchSampler`` passed as
+    ``sampler`` with ``batch_size=None``) encodes the whole batch with one
+    ``transform_batch`` call. The series are plain NumPy arrays, so
+    ``DataLoader`` workers share them copy-on-write after fork.
+    """
+    
+    def __init__(self, series: List[Dict[str, np.ndarray]], size: int = 60,
+                 lookback: Optional[int] = None):
+        self.converter = GAFConverter(size, lookback)
+        self.size = size
+        self.lookback = self.converter.lookback
+        self.close = [np.ascontiguousarray(s['close'], dtype=np.float64) for s in series]
+        self.features = [s.get('features') for s in series]
+        self.offsets = np.cumsum([0] + [max(len(c) - self.lookback, 0) for c in self.close])
+    
+    def __len__(self):
+        return int(self.offsets[-1])
+    
+    def _locate(self, indices: np.ndarray):
+        """Map global indices to (symbol index, local window start)."""
+        which = np.searchsorted(self.offsets, indices, side='right') - 1
+        return which, indices - self.offsets[which]
+    
+    def __getitem__(self, index):
+        if np.isscalar(index):
+            which, start = self._locate(np.asarray([index]))
+            close = self.close[which[0]]
+            window = close[start[0]:start[0] + self.lookback]
+            gaf = self.converter.transform(window).astype(np.float32)
+            price = np.asarray([close[start[0] + self.lookback]], dtype=np.float32)
+            return torch.from_numpy(gaf), torch.from_numpy(price)
+        
+        indices = np.asarray(index)
+        which, start = self._locate(indices)
+        windows = np.empty((len(indices), self.lookback), dtype=np.float64)
+        prices = np.empty((len(indices), 1), dtype=np.float32)
+        
+        for s in np.unique(which):
+            mask = which == s
+            close = self.close[s]
+            windows[mask] = self.converter.sliding_windows(close)[start[mask]]
+            prices[mask, 0] = close[start[mask] + self.lookback]
+        
+        gaf = self.converter.transform_batch(windows).astype(np.float32)
+        return torch.from_numpy(gaf), torch.from_numpy(prices)
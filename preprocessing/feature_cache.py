@@ -0,0 +1,253 @@
+# 
+
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.gaf_store import pack_upper, unpack_upper
+
+class FeatureCache:
+    """On-disk cache of indicator features and GAF windows per symbol.
+    
+    Entries are keyed by symbol and the feature parameters (indicator periods,
+    GAF size and lookback). Each entry remembers a content hash of the raw
+    bars it was built from:
+    
+    - same bars: the cached rows are returned (hit);
+    - the cached bars followed by new ones: only the tail is recomputed, from
+      ``warmup`` bars before the last cached bar, and appended (extension);
+    - anything else, e.g. revised history: a full recompute (miss).
+    
+    The warm-up must cover the longest indicator window; ATR's Wilder
+    smoothing has unbounded memory, and 500 bars bring its restart error
+    below 1e-10 relative for a 21-bar period. GAF windows are stored as
+    packed float32 upper triangles, one segment file per write, so an
+    extension never rewrites the existing windows. With the loader's
+    ``gaf_builder`` set, windows are dense float32 (n, channels, size, size)
+    arrays instead, as GADF channels are not symmetric.
+    
+    An extension writes its features, index and segment under names the
+    current ``meta.json`` does not reference and switches to them by
+    atomically replacing it, so a crash part way through leaves the
+    previous entry intact.
+    """
+    
+    def __init__(self, root: str, loader, periods: Iterable[int] = (6, 12, 21),
+                 warmup: int = 500, max_bytes: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.loader = loader
+        self.converter = loader.gaf_converter
+        self.builder = getattr(loader, 'gaf_builder', None)
+        encoder = self.builder or self.converter
+        self.size, self.lookback = encoder.size, encoder.lookback
+        self.params = {
+            'periods': list(periods),
+            'gaf_size': self.size,
+            'gaf_lookback': self.lookback
+        }
+        if self.builder is not None:
+            self.params['gaf_columns'] = self.builder.columns
+            self.params['gaf_methods'] = self.builder.methods
+        self.warmup = warmup
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.extensions = 0
+        self.evictions = 0
+    
+    def _entry_dir(self, symbol: str) -> Path:
+        digest = hashlib.sha1(json.dumps(self.params, sort_keys=True).encode()).hexdigest()[:12]
+        return self.root / f"{symbol}-{digest}"
+    
+    @staticmethod
+    def _hash_raw(df: pd.DataFrame) -> str:
+        """Content hash of raw bars: index plus values."""
+        h = hashlib.sha1()
+        h.update(np.asarray(df.index.values).tobytes())
+        h.update(np.ascontiguousarray(df.to_numpy(dtype=np.float64)).tobytes())
+        return h.hexdigest()
+    
+    def _read_meta(self, path: Path) -> Optional[Dict]:
+        try:
+            return json.loads((path / 'meta.json').read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+    
+    def _write_meta(self, path: Path, meta: Dict):
+        tmp = path / 'meta.json.tmp'
+        tmp.write_text(json.dumps(meta))
+        tmp.replace(path / 'meta.json')
+    
+    @staticmethod
+    def _files(meta: Dict):
+        """Feature and index file names of an entry (unversioned in older entries)."""
+        return meta.get('features', 'features.npy'), meta.get('index', 'index.npy')
+    
+    def _encode(self, features: np.ndarray, columns: List[str], start: int) -> np.ndarray:
+        """GAF windows whose targets are rows start + lookback onwards."""
+        if self.builder is not None:
+            values = features[start:, [columns.index(c) for c in self.builder.columns]]
+            return self.builder.transform(self.builder.sliding_windows(values)[:-1])
+        close = features[start:, columns.index('close')]
+        windows = self.converter.sliding_windows(close)[:-1]
+        return pack_upper(self.converter.transform_batch(windows), np.float32)
+    
+    def _load(self, path: Path, meta: Dict) -> Dict[str, np.ndarray]:
+        features = np.load(path / self._files(meta)[0])
+        lookback = self.lookback
+        segments = [np.load(path / name) for name in meta['segments']]
+        if self.builder is not None:
+            empty = np.empty((0, self.builder.n_channels, self.size, self.size), dtype=np.float32)
+            gaf_data = np.concatenate(segments) if segments else empty
+        elif segments:
+            gaf_data = unpack_upper(np.concatenate(segments))
+        else:
+            gaf_data = np.empty((0, self.size, self.size), dtype=np.float32)
+        return {
+            'gaf_data': gaf_data,
+            'prices': features[lookback:, meta['columns'].index('close')],
+            'features': features[lookback:]
+        }
+    
+    def _write_full(self, path: Path, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        if path.exists():
+            shutil.rmtree(path)
+        path.mkdir(parents=True)
+        
+        features = self.loader.build_features(df)
+        values = features.to_numpy(dtype=np.float64)
+        np.save(path / 'features_00000.npy', values)
+        np.save(path / 'index_00000.npy', np.asarray(features.index.values))
+        
+        segments = []
+        if len(values) > self.lookback:
+            np.save(path / 'gaf_00000.npy', self._encode(values, list(features.columns), 0))
+            segments.append('gaf_00000.npy')
+        
+        now = time.time()
+        meta = {
+            'n_raw': len(df),
+            'raw_hash': self._hash_raw(df),
+            'columns': list(features.columns),
+            'version': 0,
+            'features': 'features_00000.npy',
+            'index': 'index_00000.npy',
+            'segments': segments,
+            'created': now,
+            'last_access': now
+        }
+        self._write_meta(path, meta)
+        return self._load(path, meta)
+    
+    def _extend(self, path: Path, meta: Dict, df: pd.DataFrame) -> Optional[Dict[str, np.ndarray]]:
+        """Append rows for new bars; None if the warm-up does not reach far enough."""
+        features_file, index_file = self._files(meta)
+        features = np.load(path / features_file)
+        index = np.load(path / index_file, allow_pickle=True)
+        lookback = self.lookback
+        
+        tail_start = max(0, meta['n_raw'] - self.warmup)
+        tail = self.loader.build_features(df.iloc[tail_start:])
+        
+        # The last cached row is recomputed too: its slopes use the next bar
+        tail_index = np.asarray(tail.index.values)
+        overlap = np.flatnonzero(tail_index == index[-1])
+        if len(overlap) == 0:
+            return None
+        new_rows = tail.iloc[overlap[0]:].to_numpy(dtype=np.float64)
+        
+        n_old = len(features)
+        features = np.concatenate([features[:-1], new_rows])
+        index = np.concatenate([index[:-1], tail_index[overlap[0]:]])
+        
+        # Everything is written under names the current meta.json does not
+        # reference; files left by an interrupted extension are overwritten
+        version = meta.get('version', 0) + 1
+        meta = dict(meta, version=version, features=f'features_{version:05d}.npy',
+                    index=f'index_{version:05d}.npy', segments=list(meta['segments']))
+        np.save(path / meta['features'], features)
+        np.save(path / meta['index'], index)
+        
+        # Existing GAF windows end before the recomputed last cached row, so
+        # none of their inputs have changed
+        first_new = max(n_old - lookback, 0)
+        if len(features) - lookback > first_new:
+            name = f"gaf_{len(meta['segments']):05d}.npy"
+            np.save(path / name, self._encode(features, meta['columns'], first_new))
+            meta['segments'].append(name)
+        
+        meta['n_raw'] = len(df)
+        meta['raw_hash'] = self._hash_raw(df)
+        meta['last_access'] = time.time()
+        self._write_meta(path, meta)
+        for name in (features_file, index_file):
+            (path / name).unlink(missing_ok=True)
+        return self._load(path, meta)
+    
+    def get_or_compute(self, symbol: str, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Return ``process_data``-style output for ``df``, reusing the cache."""
+        path = self._entry_dir(symbol)
+        meta = self._read_meta(path)
+        
+        result = None
+        if meta is not None and len(df) >= meta['n_raw'] and \
+                self._hash_raw(df.iloc[:meta['n_raw']]) == meta['raw_hash']:
+            if len(df) == meta['n_raw']:
+                self.hits += 1
+                meta['last_access'] = time.time()
+                self._write_meta(path, meta)
+                result = self._load(path, meta)
+            else:
+                result = self._extend(path, meta, df)
+                if result is not None:
+                    self.extensions += 1
+        
+        if result is None:
+            self.misses += 1
+            result = self._write_full(path, df)
+        
+        self.evict(keep=path)
+        return result
+    
+    def _entries(self):
+        """(path, meta, bytes) for every complete entry."""
+        for path in self.root.iterdir():
+            meta = self._read_meta(path) if path.is_dir() else None
+            if meta is not None:
+                yield path, meta, sum(f.stat().st_size for f in path.iterdir())
+    
+    def evict(self, keep: Optional[Path] = None):
+        """Drop entries older than ``max_age`` seconds, then least recently
+        used entries until the cache fits in ``max_bytes``."""
+        now = time.time()
+        entries = sorted(self._entries(), key=lambda e: e[1]['last_access'])
+        total = sum(size for _, _, size in entries)
+        
+        for path, meta, size in entries:
+            if path == keep:
+                continue
+            expired = self.max_age is not None and now - meta['last_access'] > self.max_age
+            oversize = self.max_bytes is not None and total > self.max_bytes
+            if expired or oversize:
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                self.evictions += 1
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.extensions + self.misses
+        return {
+            'hits': self.hits,
+            'extensions': self.extensions,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.extensions) / lookups if lookups else 0.0
+        }
@@ -52,3 +52,197 @@ class TechnicalIndicators:
         advanced['price_change'] = df['close'].pct_change()
         
         return pd.DataFrame(advanced)
+
+class PanelIndicators:
+    """Compute basic and advanced indicators for many symbols in one batched pass.
+    
+    Inputs are aligned (symbols x time) arrays with NaN wherever a symbol has no
+    bar, e.g. before it listed or on a date missing from its history. Each
+    symbol's values match running ``TechnicalIndicators`` on that symbol's
+    own history alone.
+    """
+    
+    OHLCV = ['open', 'high', 'low', 'close', 'volume']
+    ADVANCED = ['BB_cross', 'MA5_slope', 'MA20_slope', 'ATR_change', 'price_change']
+    
+    def __init__(self, periods=(6, 12, 21), nbdev=2.0):
+        self.periods = list(periods)
+        self.nbdev = nbdev
+    
+    @property
+    def columns(self):
+        """Feature names in the same order as ``StockDataLoader.build_features``."""
+        basic = [
+            f'{name}_{p}' for p in self.periods
+            for name in ('SMA', 'BB_upper', 'BB_middle', 'BB_lower', 'CCI', 'ATR')
+        ]
+        return self.OHLCV + basic + self.ADVANCED
+    
+    @staticmethod
+    def align(frames):
+        """Align per-symbol OHLCV frames on the union of their indexes.
+        
+        Returns the symbols, the shared index and a dict of (symbols x time)
+        arrays keyed by column, NaN where a symbol has no bar.
+        """
+        symbols = list(frames)
+        index = frames[symbols[0]].index
+        for symbol in symbols[1:]:
+            index = index.union(frames[symbol].index)
+        
+        panel = {
+            column: np.stack([
+                frames[s][column].reindex(index).to_numpy(dtype=np.float64) for s in symbols
+            ])
+            for column in PanelIndicators.OHLCV
+        }
+        return symbols, index, panel
+    
+    def _rolling(self, values, period, stat):
+        """Rolling mean plus population std or mean absolute deviation along time.
+        
+        Sums run over the ``period`` lags as whole (symbols x time) array
+        operations, which is much faster than reducing tiny window axes.
+        """
+        n_symbols, n_times = values.shape
+        mean = np.full((n_symbols, n_times), np.nan)
+        spread = np.full((n_symbols, n_times), np.nan)
+        if n_times < period:
+            return mean, spread
+        
+        n_out = n_times - period + 1
+        lags = [values[:, j:j + n_out] for j in range(period)]
+        window_mean = lags[0].copy()
+        for lag in lags[1:]:
+            window_mean += lag
+        window_mean /= period
+        
+        # Second pass around the window mean, accumulated in place
+        window_spread = np.zeros_like(window_mean)
+        deviation = np.empty_like(window_mean)
+        for lag in lags:
+            np.subtract(lag, window_mean, out=deviation)
+            if stat == 'std':
+                np.square(deviation, out=deviation)
+            else:
+                np.abs(deviation, out=deviation)
+            window_spread += deviation
+        window_spread /= period
+        if stat == 'std':
+            np.sqrt(window_spread, out=window_spread)
+        
+        mean[:, period - 1:] = window_mean
+        spread[:, period - 1:] = window_spread
+        return mean, spread
+    
+    def _atr(self, high, low, close):
+        """Wilder ATR for every period, seeded from each symbol's first true ranges.
+        
+        A missing bar (NaN) mid-history is skipped: the recursion holds its
+        state and the next bar's true range uses the last available close,
+        as when the symbol's own history simply lacks that date.
+        """
+        n_symbols, n_times = close.shape
+        true_range = np.full((n_symbols, n_times), np.nan)
+        valid = ~np.isnan(close)
+        last_valid = np.maximum.accumulate(np.where(valid, np.arange(n_times), 0), axis=1)
+        prev_close = np.take_along_axis(close, last_valid, axis=1)[:, :-1]
+        true_range[:, 1:] = np.maximum(
+            high[:, 1:] - low[:, 1:],
+            np.maximum(np.abs(high[:, 1:] - prev_close), np.abs(low[:, 1:] - prev_close))
+        )
+        
+        # State is (periods x symbols); the recursion runs along time only
+        periods = np.asarray(self.periods, dtype=np.float64)[:, None]
+        atr = np.full((len(self.periods), n_symbols, n_times), np.nan)
+        state = np.full((len(self.periods), n_symbols), np.nan)
+        seed_sum = np.zeros((len(self.periods), n_symbols))
+        seed_count = np.zeros((len(self.periods), n_symbols))
+        
+        for t in range(1, n_times):
+            tr = np.broadcast_to(true_range[:, t], state.shape)
+            seeded = seed_count >= periods
+            seeding = ~seeded & ~np.isnan(tr)
+            
+            state = np.where(seeded & ~np.isnan(tr), (state * (periods - 1) + tr) / periods, state)
+            seed_sum = np.where(seeding, seed_sum + tr, seed_sum)
+            seed_count = seed_count + seeding
+            just_seeded = seeding & (seed_count == periods)
+            state = np.where(just_seeded, seed_sum / periods, state)
+            atr[:, :, t] = state
+        
+        atr[:, ~valid] = np.nan
+        return atr
+    
+    @staticmethod
+    def _gradient(values, first, last):
+        """``np.gradient`` along time over each symbol's own [first, last] range."""
+        out = np.full(values.shape, np.nan)
+        ranges = np.stack([first, last], axis=1)
+        for lo, hi in np.unique(ranges, axis=0):
+            if hi - lo < 1:
+                continue
+            rows = np.flatnonzero((first == lo) & (last == hi))
+            out[rows, lo:hi + 1] = np.gradient(values[rows, lo:hi + 1], axis=1)
+        return out
+    
+    def calculate(self, open_, high, low, close, volume):
+        """Return a contiguous (symbols, time, features) array in ``columns`` order."""
+        n_symbols, n_times = close.shape
+        
+        # Every symbol's bars are moved to the front of its row, in order, so
+        # windows, slopes and changes run over its own consecutive bars; the
+        # results are scattered back to the shared dates at the end
+        on_date = ~np.isnan(close)
+        order = np.argsort(~on_date, axis=1, kind='stable')
+        open_, high, low, close, volume = (
+            np.take_along_axis(values, order, axis=1) for values in (open_, high, low, close, volume)
+        )
+        
+        # Filled feature-major, where every write is contiguous, then
+        # transposed once into the (symbols, time, features) layout
+        planes = np.empty((len(self.columns), n_symbols, n_times), dtype=np.float64)
+        for k, values in enumerate([open_, high, low, close, volume]):
+            planes[k] = values
+        
+        typical_price = (high + low + close) / 3
+        atr = self._atr(high, low, close)
+        named = {}
+        k = len(self.OHLCV)
+        
+        for i, p in enumerate(self.periods):
+            mean, std = self._rolling(close, p, 'std')
+            tp_mean, tp_mad = self._rolling(typical_price, p, 'mad')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cci = np.where(tp_mad > 0, (typical_price - tp_mean) / (0.015 * tp_mad), 0.0)
+            cci[np.isnan(tp_mad)] = np.nan
+            
+            for name, values in [('SMA', mean), ('BB_upper', mean + self.nbdev * std),
+                                 ('BB_middle', mean), ('BB_lower', mean - self.nbdev * std),
+                                 ('CCI', cci), ('ATR', atr[i])]:
+                named[f'{name}_{p}'] = values
+                planes[k] = values
+                k += 1
+        
+        # Each symbol's own history span, for edge handling in the slopes
+        valid = ~np.isnan(close)
+        first = np.where(valid.any(axis=1), valid.argmax(axis=1), 0)
+        last = np.where(valid.any(axis=1), n_times - 1 - valid[:, ::-1].argmax(axis=1), -1)
+        
+        with np.errstate(invalid='ignore'):
+            planes[k] = np.where(
+                close > named['BB_upper_21'], 1,
+                np.where(close < named['BB_lower_21'], -1, 0)
+            )
+        planes[k][~valid] = np.nan
+        planes[k + 1] = self._gradient(named['SMA_6'], first, last)
+        planes[k + 2] = self._gradient(named['SMA_21'], first, last)
+        planes[k + 3] = self._gradient(named['ATR_21'], first, last)
+        
+        planes[k + 4, :, 0] = np.nan
+        planes[k + 4, :, 1:] = close[:, 1:] / close[:, :-1] - 1
+        
+        scattered = np.empty_like(planes)
+        np.put_along_axis(scattered, np.broadcast_to(order, planes.shape), planes, axis=2)
+        scattered[:, ~on_date] = np.nan
+        return np.ascontiguousarray(scattered.transpose(1, 2, 0))
@@ -1,12 +1,41 @@
 # 
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def paa(data, output_size):
+    """Piecewise Aggregate Approximation along the last axis.
+    
+    Splits the last axis into ``output_size`` contiguous segments and returns
+    their means. Segment edges are rounded when the input length is not a
+    multiple of ``output_size``.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    length = data.shape[-1]
+    if length == output_size:
+        return data
+    if output_size > length:
+        raise ValueError(f"Cannot downsample {length} values to {output_size} segments")
+    if length % output_size == 0:
+        return data.reshape(data.shape[:-1] + (output_size, length // output_size)).mean(axis=-1)
+    
+    edges = np.round(np.linspace(0, length, output_size + 1)).astype(int)
+    cumsum = np.concatenate([np.zeros(data.shape[:-1] + (1,)), np.cumsum(data, axis=-1)], axis=-1)
+    return (cumsum[..., edges[1:]] - cumsum[..., edges[:-1]]) / np.diff(edges)
 
 class GAFConverter:
-    """Converts time series data to Gramian Angular Field format."""
+    """Converts time series data to Gramian Angular Field format.
     
-    def __init__(self, size=60):
+    ``lookback`` bars are reduced to ``size`` points with PAA before encoding,
+    so a long lookback can still produce a small image. By default the
+    lookback equals the image size and no downsampling happens.
+    """
+    
+    def __init__(self, size=60, lookback=None):
         self.size = size
+        self.lookback = lookback or size
+        if self.lookback < size:
+            raise ValueError(f"GAF lookback ({self.lookback}) must be at least the image size ({size})")
     
     def _scale(self, data):
         """Scale data to [-1, 1] range using min-max scaling."""
@@ -20,8 +49,10 @@ class GAFConverter:
     
     def transform(self, data):
         """Transform time series to GAF matrix."""
+        if len(data) != self.size:
+            data = paa(data, self.size)
         scaled_data = self._scale(data)
-        phi, r = self_polar_encoding(scaled_data)
+        phi, r = self._polar_encoding(scaled_data)
         
         # Calculate GAF matrix
         cos_phi = np.cos(phi)
@@ -29,3 +60,224 @@ class GAFConverter:
               np.sqrt(1 - cos_phi**2).reshape(1, -1)
               
         return gaf
+    
+    def sliding_windows(self, data):
+        """Return a zero-copy (n_windows, lookback) strided view of a 1-D series."""
+        return sliding_window_view(np.asarray(data, dtype=np.float64), self.lookback)
+    
+    def transform_batch(self, data, out=None, chunk_size=64):
+        """Transform many windows to GAF matrices in one vectorized pass.
+        
+        Args:
+            data: Either a 2-D array of windows with shape (n_windows, lookback)
+                or a 1-D series, which is expanded to all of its sliding
+                windows of length ``lookback``. Windows longer than ``size``
+                are downsampled with PAA.
+            out: Optional preallocated (n_windows, size, size) array.
+            chunk_size: Number of windows encoded per einsum call; bounds the
+                temporary needed for the sine term.
+        
+        Returns:
+            Array of shape (n_windows, size, size), identical to stacking
+            ``transform`` over each window.
+        """
+        windows = np.asarray(data, dtype=np.float64)
+        if windows.ndim == 1:
+            windows = self.sliding_windows(windows)
+        if windows.shape[1] != self.size:
+            windows = paa(windows, self.size)
+        n_windows, size = windows.shape
+        
+        if out is None:
+            out = np.empty((n_windows, size, size), dtype=np.float64)
+        
+        # Per-window min-max scaling and polar encoding
+        w_min = windows.min(axis=1, keepdims=True)
+        w_max = windows.max(axis=1, keepdims=True)
+        scaled = 2 * ((windows - w_min) / (w_max - w_min)) - 1
+        cos_phi = np.cos(np.arccos(scaled))
+        sin_phi = np.sqrt(1 - cos_phi**2)
+        
+        # GASF = cos(phi_i) cos(phi_j) - sin(phi_i) sin(phi_j)
+        for start in range(0, n_windows, chunk_size):
+            stop = min(start + chunk_size, n_windows)
+            np.einsum('ni,nj->nij', cos_phi[start:stop], cos_phi[start:stop],
+                      out=out[start:stop])
+            out[start:stop] -= np.einsum('ni,nj->nij',
+                                         sin_phi[start:stop], sin_phi[start:stop])
+        
+        return out
+
+class StreamingGAFEncoder:
+    """Stateful GAF encoder that updates the Gramian matrix one bar at a time.
+    
+    While the window min and max are unchanged the scaled cosines and sines of
+    the retained bars are unchanged too, so a new bar only shifts the matrix by
+    one row and column and fills in the new ones. A full rebuild happens only
+    when the new bar, or the bar leaving the window, moves the min or max.
+    Output matches ``GAFConverter.transform`` on the same window exactly.
+    """
+    
+    def __init__(self, size=60):
+        self.size = size
+        self.converter = GAFConverter(size)
+        self.window = np.empty(size, dtype=np.float64)
+        self.cos_phi = np.empty(size, dtype=np.float64)
+        self.sin_phi = np.empty(size, dtype=np.float64)
+        self.gaf = None
+        self.n_filled = 0
+        self.n_rebuilds = 0
+        self.n_incremental = 0
+    
+    @property
+    def ready(self):
+        """Whether a full window has been seen."""
+        return self.n_filled == self.size
+    
+    def reset(self, window=None):
+        """Clear state, optionally seeding it with a full window of bars."""
+        self.gaf = None
+        self.n_filled = 0
+        if window is not None:
+            window = np.asarray(window, dtype=np.float64)
+            if window.shape != (self.size,):
+                raise ValueError(f"Expected a window of {self.size} values, got shape {window.shape}")
+            self.window[:] = window
+            self.n_filled = self.size
+            self._rebuild()
+        return self.gaf
+    
+    def _rebuild(self):
+        """Recompute scaling, trig terms and the full matrix from the window."""
+        self.w_min = np.min(self.window)
+        self.w_max = np.max(self.window)
+        self.cos_phi[:] = np.cos(np.arccos(self.converter._scale(self.window)))
+        self.sin_phi[:] = np.sqrt(1 - self.cos_phi**2)
+        self.gaf = self.converter.transform(self.window)
+        self.n_rebuilds += 1
+    
+    def update(self, value):
+        """Push a new bar and return the current GAF matrix.
+        
+        Returns None until the first ``size`` bars have been seen. The
+        returned array is updated in place by later calls; copy it to keep it.
+        """
+        value = float(value)
+        if not self.ready:
+            self.window[self.n_filled] = value
+            self.n_filled += 1
+            if self.ready:
+                self._rebuild()
+            return self.gaf
+        
+        evicted = self.window[0]
+        self.window[:-1] = self.window[1:]
+        self.window[-1] = value
+        
+        # Only a bar entering above/below the range, or the old extreme
+        # leaving the window, can move the min-max scaling
+        if value < self.w_min or value > self.w_max or \
+                evicted == self.w_min or evicted == self.w_max:
+            if np.min(self.window) != self.w_min or np.max(self.window) != self.w_max:
+                self._rebuild()
+                return self.gaf
+        
+        scaled = 2 * ((self.window[-1:] - self.w_min) / (self.w_max - self.w_min)) - 1
+        cos_new = np.cos(np.arccos(scaled))
+        sin_new = np.sqrt(1 - cos_new**2)
+        
+        self.cos_phi[:-1] = self.cos_phi[1:]
+        self.sin_phi[:-1] = self.sin_phi[1:]
+        self.cos_phi[-1] = cos_new[0]
+        self.sin_phi[-1] = sin_new[0]
+        
+        # Shift the retained block up-left and fill the new row and column
+        self.gaf[:-1, :-1] = self.gaf[1:, 1:]
+        edge = self.cos_phi * cos_new[0] - self.sin_phi * sin_new[0]
+        self.gaf[-1, :] = edge
+        self.gaf[:, -1] = edge
+        self.n_incremental += 1
+        return self.gaf
+
+class MultiChannelGAFBuilder:
+    """Builds channels-first GASF/GADF images over several feature columns.
+    
+    All columns share one windowing, scaling, arccos and trig pass; each
+    requested method then only costs its outer products. Channels are ordered
+    column-major, e.g. columns ('close', 'volume') with methods
+    ('gasf', 'gadf') give [close_gasf, close_gadf, volume_gasf, volume_gadf].
+    """
+    
+    METHODS = ('gasf', 'gadf')
+    
+    def __init__(self, columns=('close', 'volume', 'ATR_21'), methods=('gasf', 'gadf'), size=60,
+                 lookback=None):
+        unknown = set(methods) - set(self.METHODS)
+        if unknown:
+            raise ValueError(f"Unknown GAF methods: {sorted(unknown)}")
+        self.columns = list(columns)
+        self.methods = list(methods)
+        self.size = size
+        self.lookback = lookback or size
+        if self.lookback < size:
+            raise ValueError(f"GAF lookback ({self.lookback}) must be at least the image size ({size})")
+    
+    @property
+    def n_channels(self):
+        return len(self.columns) * len(self.methods)
+    
+    def sliding_windows(self, features):
+        """Return a zero-copy (n_windows, n_columns, lookback) view of the selected columns."""
+        if hasattr(features, 'columns'):
+            features = features[self.columns].to_numpy(dtype=np.float64)
+        values = np.asarray(features, dtype=np.float64)
+        return sliding_window_view(values, self.lookback, axis=0)
+    
+    def transform(self, data, out=None, dtype=np.float32, chunk_size=16):
+        """Encode windows into an (n_windows, n_channels, size, size) array.
+        
+        Args:
+            data: A feature DataFrame (the configured columns are selected),
+                a (time, n_columns) array, or windows from ``sliding_windows``.
+            out: Optional preallocated output array.
+            dtype: Output dtype when ``out`` is not given.
+            chunk_size: Number of windows encoded per einsum call.
+        
+        Windows with a constant column (e.g. a flat cross signal) are encoded
+        as if every value sat at the window minimum instead of producing NaNs.
+        """
+        windows = data if getattr(data, 'ndim', 0) == 3 else self.sliding_windows(data)
+        if windows.shape[2] != self.size:
+            windows = paa(windows, self.size)
+        n_windows, n_columns, size = windows.shape
+        
+        if out is None:
+            out = np.empty((n_windows, n_columns * len(self.methods), size, size), dtype=dtype)
+        
+        # Shared per-window, per-column scaling and polar encoding; the outer
+        # products then run in the output precision
+        w_min = windows.min(axis=2, keepdims=True)
+        w_range = windows.max(axis=2, keepdims=True) - w_min
+        scaled = np.divide(windows - w_min, w_range, out=np.zeros(windows.shape), where=w_range > 0)
+        cos_phi = np.cos(np.arccos(2 * scaled - 1))
+        sin_phi = np.sqrt(1 - cos_phi**2).astype(out.dtype)
+        cos_phi = cos_phi.astype(out.dtype)
+        
+        n_methods = len(self.methods)
+        channels = {m: out[:, i::n_methods] for i, m in enumerate(self.methods)}
+        
+        for start in range(0, n_windows, chunk_size):
+            stop = min(start + chunk_size, n_windows)
+            cos_c, sin_c = cos_phi[start:stop], sin_phi[start:stop]
+            if 'gasf' in channels:
+                # GASF = cos(phi_i + phi_j)
+                gasf = channels['gasf'][start:stop]
+                np.einsum('nki,nkj->nkij', cos_c, cos_c, out=gasf)
+                gasf -= np.einsum('nki,nkj->nkij', sin_c, sin_c)
+            if 'gadf' in channels:
+                # GADF = sin(phi_i - phi_j)
+                gadf = channels['gadf'][start:stop]
+                np.einsum('nki,nkj->nkij', sin_c, cos_c, out=gadf)
+                gadf -= np.einsum('nki,nkj->nkij', cos_c, sin_c)
+        
+        return out
@@ -0,0 +1,210 @@
+# 
+
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+@lru_cache(maxsize=None)
+def _triu_indices(size: int):
+    """Row/column indices of the upper triangle (including the diagonal)."""
+    return np.triu_indices(size)
+
+def triu_length(size: int) -> int:
+    """Number of packed values per size x size symmetric matrix."""
+    return size * (size + 1) // 2
+
+def size_from_triu_length(length: int) -> int:
+    """Recover the matrix side length from a packed row length."""
+    size = int((np.sqrt(8 * length + 1) - 1) // 2)
+    if triu_length(size) != length:
+        raise ValueError(f"{length} is not a valid upper-triangle length")
+    return size
+
+def pack_upper(gaf: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """Pack (..., size, size) symmetric GAF matrices into (..., size*(size+1)/2)."""
+    gaf = np.asarray(gaf)
+    rows, cols = _triu_indices(gaf.shape[-1])
+    return gaf[..., rows, cols].astype(dtype, copy=False)
+
+def unpack_upper(packed: np.ndarray, out: Optional[np.ndarray] = None,
+                 dtype=np.float32) -> np.ndarray:
+    """Expand packed upper triangles back into dense symmetric matrices."""
+    packed = np.asarray(packed)
+    size = size_from_triu_length(packed.shape[-1])
+    rows, cols = _triu_indices(size)
+    
+    if out is None:
+        out = np.empty(packed.shape[:-1] + (size, size), dtype=dtype)
+    out[..., rows, cols] = packed
+    out[..., cols, rows] = packed
+    return out
+
+class PackedGAFArray:
+    """Read-only memory-mapped view of one symbol's packed GAF windows.
+    
+    ``prices`` is (n_windows, 1), also for stores written with flat prices.
+    """
+    
+    def __init__(self, gaf_path: Path, prices_path: Path):
+        self.gaf_path, self.prices_path = Path(gaf_path), Path(prices_path)
+        self.packed = np.load(gaf_path, mmap_mode='r')
+        self.prices = np.load(prices_path, mmap_mode='r').reshape(-1, 1)
+        self.size = size_from_triu_length(self.packed.shape[1])
+    
+    def __getstate__(self):
+        # Pickling a memmap copies its data; spawned processes remap the files
+        return {'gaf_path': self.gaf_path, 'prices_path': self.prices_path}
+    
+    def __setstate__(self, state):
+        self.__init__(state['gaf_path'], state['prices_path'])
+    
+    def __len__(self):
+        return len(self.packed)
+    
+    def batch(self, indices) -> np.ndarray:
+        """Dense float32 (len(indices), size, size) GAF batch."""
+        return unpack_upper(self.packed[indices])
+    
+    def iter_batches(self, batch_size: int):
+        """Yield (gaf, prices) batches in order."""
+        for start in range(0, len(self), batch_size):
+            stop = min(start + batch_size, len(self))
+            yield self.batch(slice(start, stop)), np.asarray(self.prices[start:stop])
+
+class GAFStore:
+    """On-disk GAF storage keeping only the packed upper triangle per window.
+    
+    Each symbol gets its own directory with a ``gaf.npy`` file of shape
+    (n_windows, size*(size+1)/2) and a (n_windows, 1) ``prices.npy`` target
+    file. Both are plain .npy files so they can be memory-mapped without
+    loading them. GASF matrices are exactly symmetric, so float32 storage
+    loses nothing relative to the float32 training tensors; float16 halves
+    that again. Each write goes to a hidden temporary directory that is
+    renamed into place, so an interrupted write never leaves a partial
+    entry behind; if it is interrupted during the swap, the previous entry
+    is still read from where it was moved aside.
+    """
+    
+    def __init__(self, root: str, dtype: str = 'float32'):
+        if dtype not in ('float16', 'float32'):
+            raise ValueError(f"Unsupported GAF storage dtype: {dtype}")
+        self.root = Path(root)
+        self.dtype = np.dtype(dtype)
+    
+    def symbol_dir(self, symbol: str) -> Path:
+        return self.root / symbol
+    
+    def _entry(self, symbol: str) -> Path:
+        """Directory holding the live entry, or the one moved aside by a swap."""
+        path = self.symbol_dir(symbol)
+        old = self.root / f'.{symbol}.old'
+        if not (path / 'prices.npy').exists() and (old / 'prices.npy').exists():
+            return old
+        return path
+    
+    def symbols(self) -> List[str]:
+        """Symbols with a complete entry in the store."""
+        if not self.root.exists():
+            return []
+        names = set()
+        for p in self.root.iterdir():
+            if not (p / 'prices.npy').exists() or p.name.endswith('.tmp'):
+                continue
+            if p.name.startswith('.'):
+                names.add(p.name[1:-len('.old')])
+            else:
+                names.add(p.name)
+        return sorted(names)
+    
+    def write(self, symbol: str, gaf_data: np.ndarray, prices: np.ndarray,
+              chunk_size: int = 1024) -> Path:
+        """Write one symbol's dense GAF windows in packed form."""
+        if gaf_data.ndim != 3:
+            raise ValueError(f"GAFStore holds single-channel (n, size, size) GASF windows, "
+                             f"got shape {gaf_data.shape}; multi-channel GAF images "
+                             f"(preprocessing.gaf_channels) cannot be packed")
+        n_windows, size, _ = gaf_data.shape
+        path = self.symbol_dir(symbol)
+        tmp = self.root / f'.{symbol}.tmp'
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        
+        packed = np.lib.format.open_memmap(
+            tmp / 'gaf.npy', mode='w+', dtype=self.dtype,
+            shape=(n_windows, triu_length(size))
+        )
+        for start in range(0, n_windows, chunk_size):
+            stop = min(start + chunk_size, n_windows)
+            packed[start:stop] = pack_upper(gaf_data[start:stop], self.dtype)
+        packed.flush()
+        del packed
+        np.save(tmp / 'prices.npy', np.asarray(prices, dtype=np.float32).reshape(-1, 1))
+        
+        # A directory cannot be renamed over a non-empty one, so the old
+        # entry is moved aside first; open memmaps of it stay valid
+        old = self.root / f'.{symbol}.old'
+        if path.exists():
+            # A leftover entry from an interrupted swap is superseded by
+            # whatever is at ``path`` once that is complete
+            if old.exists():
+                shutil.rmtree(old)
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+        return path
+    
+    def open(self, symbol: str) -> PackedGAFArray:
+        path = self._entry(symbol)
+        return PackedGAFArray(path / 'gaf.npy', path / 'prices.npy')
+    
+    def nbytes(self, symbol: str) -> int:
+        """Bytes on disk for one symbol."""
+        return sum(f.stat().st_size for f in self._entry(symbol).glob('*.npy'))
+
+class PackedGAFDataset(Dataset):
+    """Dataset over packed GAF windows of one or more symbols.
+    
+    Indexing with a list of indices (e.g. through a ``BatchSampler`` passed as
+    ``sampler`` with ``batch_size=None``) expands the whole batch in one
+    vectorized unpack instead of one sample at a time.
+    """
+    
+    def __init__(self, arrays: Sequence[PackedGAFArray]):
+        self.arrays = list(arrays)
+        self.offsets = np.cumsum([0] + [len(a) for a in self.arrays])
+    
+    def __len__(self):
+        return int(self.offsets[-1])
+    
+    def _locate(self, indices: np.ndarray):
+        """Map global indices to (array index, local index)."""
+        which = np.searchsorted(self.offsets, indices, side='right') - 1
+        return which, indices - self.offsets[which]
+    
+    def __getitem__(self, index):
+        if np.isscalar(index):
+            which, local = self._locate(np.asarray([index]))
+            array = self.arrays[which[0]]
+            gaf = array.batch(local)[0]
+            price = np.array(array.prices[local[0]], dtype=np.float32)
+            return torch.from_numpy(gaf), torch.from_numpy(price)
+        
+        indices = np.asarray(index)
+        which, local = self._locate(indices)
+        size = self.arrays[0].size
+        gaf = np.empty((len(indices), size, size), dtype=np.float32)
+        prices = np.empty((len(indices), 1), dtype=np.float32)
+        
+        for a in np.unique(which):
+            mask = which == a
+            gaf[mask] = self.arrays[a].batch(local[mask])
+            prices[mask] = self.arrays[a].prices[local[mask]]
+        
+        return torch.from_numpy(gaf), torch.from_numpy(prices)
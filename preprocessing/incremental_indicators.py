@@ -0,0 +1,156 @@
+# 
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+class RollingWindow:
+    """Fixed-length ring buffer with running sum and sum of squares."""
+    
+    def __init__(self, period: int, resync_every: int = 1000):
+        self.period = period
+        self.values = np.zeros(period, dtype=np.float64)
+        self.count = 0
+        self.pos = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.resync_every = resync_every
+        self._since_resync = 0
+    
+    @property
+    def full(self) -> bool:
+        return self.count >= self.period
+    
+    def push(self, value: float):
+        """Add a value, evicting the oldest once the window is full."""
+        old = self.values[self.pos]
+        if self.full:
+            self.total -= old
+            self.total_sq -= old * old
+        self.values[self.pos] = value
+        self.total += value
+        self.total_sq += value * value
+        self.pos = (self.pos + 1) % self.period
+        self.count += 1
+        
+        # Periodically recompute the sums to stop floating-point drift
+        self._since_resync += 1
+        if self._since_resync >= self.resync_every and self.full:
+            self.total = float(self.values.sum())
+            self.total_sq = float(np.dot(self.values, self.values))
+            self._since_resync = 0
+    
+    def mean(self) -> float:
+        return self.total / self.period
+    
+    def std(self) -> float:
+        """Population standard deviation, as used by talib BBANDS."""
+        mean = self.mean()
+        return math.sqrt(max(self.total_sq / self.period - mean * mean, 0.0))
+
+class IncrementalIndicators:
+    """Per-symbol state for updating basic indicators one bar at a time.
+    
+    Produces the same columns as ``TechnicalIndicators.calculate_basic_indicators``
+    (SMA, Bollinger Bands, CCI and ATR for each period) with the same talib
+    warm-up: values are NaN until enough bars have been seen. SMA and Bollinger
+    Bands use running sums, ATR uses Wilder smoothing state, and CCI keeps the
+    typical price window for its mean absolute deviation, which costs
+    O(period) per bar.
+    """
+    
+    def __init__(self, periods: Iterable[int] = (6, 12, 21), nbdev: float = 2.0):
+        self.periods = list(periods)
+        self.nbdev = nbdev
+        self.close_windows = {p: RollingWindow(p) for p in self.periods}
+        self.tp_windows = {p: RollingWindow(p) for p in self.periods}
+        self.tr_sums = {p: 0.0 for p in self.periods}
+        self.atr = {p: math.nan for p in self.periods}
+        self.prev_close: Optional[float] = None
+        self.n_bars = 0
+        self.columns = [
+            f'{name}_{p}' for p in self.periods
+            for name in ('SMA', 'BB_upper', 'BB_middle', 'BB_lower', 'CCI', 'ATR')
+        ]
+    
+    def _update_atr(self, period: int, high: float, low: float) -> float:
+        """Wilder-smoothed ATR; seeded with the mean of the first `period` true ranges."""
+        if self.prev_close is None:
+            return math.nan
+        tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        
+        # Bar 0 has no true range, so the seed lands on bar `period`
+        if self.n_bars <= period:
+            self.tr_sums[period] += tr
+            if self.n_bars == period:
+                self.atr[period] = self.tr_sums[period] / period
+            return self.atr[period]
+        
+        self.atr[period] = (self.atr[period] * (period - 1) + tr) / period
+        return self.atr[period]
+    
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        """Consume one bar and return the latest value of every indicator."""
+        values = {}
+        typical_price = (high + low + close) / 3
+        
+        for p in self.periods:
+            closes = self.close_windows[p]
+            closes.push(close)
+            tps = self.tp_windows[p]
+            tps.push(typical_price)
+            
+            if closes.full:
+                middle = closes.mean()
+                deviation = self.nbdev * closes.std()
+                tp_mean = tps.mean()
+                mean_dev = np.abs(tps.values - tp_mean).mean()
+                cci = (typical_price - tp_mean) / (0.015 * mean_dev) if mean_dev > 0 else 0.0
+            else:
+                middle = deviation = cci = math.nan
+            
+            values[f'SMA_{p}'] = middle
+            values[f'BB_upper_{p}'] = middle + deviation
+            values[f'BB_middle_{p}'] = middle
+            values[f'BB_lower_{p}'] = middle - deviation
+            values[f'CCI_{p}'] = cci
+            values[f'ATR_{p}'] = self._update_atr(p, high, low)
+        
+        self.prev_close = close
+        self.n_bars += 1
+        return values
+    
+    def warm_up(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Feed a history of bars and return the indicators for every row."""
+        rows = [
+            self.update(h, l, c)
+            for h, l, c in zip(df['high'].to_numpy(float), df['low'].to_numpy(float),
+                               df['close'].to_numpy(float))
+        ]
+        return pd.DataFrame(rows, index=df.index, columns=self.columns)
+
+class IncrementalIndicatorEngine:
+    """Keeps ``IncrementalIndicators`` state for many symbols."""
+    
+    def __init__(self, periods: Iterable[int] = (6, 12, 21)):
+        self.periods = list(periods)
+        self.states: Dict[str, IncrementalIndicators] = {}
+    
+    def state(self, symbol: str) -> IncrementalIndicators:
+        if symbol not in self.states:
+            self.states[symbol] = IncrementalIndicators(self.periods)
+        return self.states[symbol]
+    
+    def warm_up(self, symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Reset a symbol's state from its history."""
+        self.states[symbol] = IncrementalIndicators(self.periods)
+        return self.states[symbol].warm_up(df)
+    
+    def update(self, symbol: str, high: float, low: float, close: float) -> Dict[str, float]:
+        """Consume one new bar for a symbol."""
+        return self.state(symbol).update(high, low, close)
+    
+    def symbols(self) -> List[str]:
+        return list(self.states)
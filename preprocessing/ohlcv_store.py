@@ -0,0 +1,180 @@
+# 
+
+import json
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+class OHLCVStore:
+    """Local columnar store of daily bars, partitioned by symbol.
+    
+    Each symbol directory holds versioned snapshots with one ``.npy`` file
+    per column (``date`` as datetime64[ns], everything else float64) and a
+    ``CURRENT`` pointer to the live version. Columns are memory-mapped on
+    read, so range reads are zero-copy NumPy views. Appends write a new
+    version and swap the pointer atomically, so readers never see a partial
+    write; the previous version is kept until the next swap, so a reader
+    that resolved the pointer just before one can still open its files.
+    """
+    
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    def _current(self, symbol: str) -> Optional[Path]:
+        pointer = self.root / symbol / 'CURRENT'
+        if not pointer.exists():
+            return None
+        return self.root / symbol / pointer.read_text().strip()
+    
+    def symbols(self) -> List[str]:
+        return sorted(p.name for p in self.root.iterdir() if (p / 'CURRENT').exists())
+    
+    def columns(self, symbol: str) -> List[str]:
+        path = self._current(symbol)
+        return json.loads((path / 'meta.json').read_text())['columns'] if path else []
+    
+    def last_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        path = self._current(symbol)
+        if path is None:
+            return None
+        dates = np.load(path / 'date.npy', mmap_mode='r')
+        return pd.Timestamp(dates[-1]) if len(dates) else None
+    
+    def read(self, symbol: str, start=None, end=None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views for bars with start <= date <= end."""
+        path = self._current(symbol)
+        if path is None:
+            raise KeyError(f"No stored data for {symbol}")
+        
+        columns = ['date'] + json.loads((path / 'meta.json').read_text())['columns']
+        arrays = {c: np.load(path / f'{c}.npy', mmap_mode='r') for c in columns}
+        dates = arrays['date']
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start), 'ns'), 'left')
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end), 'ns'), 'right')
+        return {c: a[lo:hi] for c, a in arrays.items()}
+    
+    def read_frame(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        """Bars as a DataFrame indexed by date, oldest first."""
+        arrays = self.read(symbol, start, end)
+        dates = arrays.pop('date')
+        return pd.DataFrame({c: np.asarray(a) for c, a in arrays.items()},
+                            index=pd.DatetimeIndex(np.asarray(dates), name='date'))
+    
+    def _write_version(self, symbol: str, dates: np.ndarray, columns: Dict[str, np.ndarray]):
+        symbol_dir = self.root / symbol
+        symbol_dir.mkdir(parents=True, exist_ok=True)
+        old = self._current(symbol)
+        version = 0 if old is None else int(old.name[1:]) + 1
+        path = symbol_dir / f'v{version}'
+        if path.exists():
+            shutil.rmtree(path)
+        path.mkdir()
+        
+        np.save(path / 'date.npy', dates.astype('datetime64[ns]'))
+        for name, values in columns.items():
+            np.save(path / f'{name}.npy', np.asarray(values, dtype=np.float64))
+        (path / 'meta.json').write_text(json.dumps({'columns': list(columns)}))
+        
+        # Atomic pointer swap; the version it replaced stays for readers
+        # that already resolved it, anything older goes
+        tmp = symbol_dir / 'CURRENT.tmp'
+        tmp.write_text(path.name)
+        tmp.replace(symbol_dir / 'CURRENT')
+        for stale in symbol_dir.glob('v*'):
+            if stale not in (path, old):
+                shutil.rmtree(stale, ignore_errors=True)
+    
+    @staticmethod
+    def _dedupe(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.sort_index()
+        return df[~df.index.duplicated(keep='last')]
+    
+    def revised(self, symbol: str, df: pd.DataFrame) -> bool:
+        """Whether ``df`` changes any stored bar it overlaps (e.g. a dividend
+        or split adjustment to ``adjusted_close``)."""
+        if self._current(symbol) is None or df.empty:
+            return False
+        df = self._dedupe(df)
+        stored = self.read_frame(symbol, df.index.min(), df.index.max())
+        overlap = stored.index.intersection(df.index)
+        old = stored.loc[overlap].to_numpy()
+        new = df.loc[overlap, stored.columns].to_numpy(dtype=np.float64)
+        return not np.array_equal(old, new, equal_nan=True)
+    
+    def append(self, symbol: str, df: pd.DataFrame) -> int:
+        """Append bars newer than the last stored date; returns rows added.
+        
+        ``df`` is indexed by date in any order. Bars at or before the last
+        stored date replace the stored ones when their values differ, so
+        revised history is picked up; otherwise they are ignored.
+        """
+        df = self._dedupe(df)
+        path = self._current(symbol)
+        
+        if path is None:
+            self._write_version(symbol, df.index.values, {c: df[c].to_numpy() for c in df.columns})
+            return len(df)
+        
+        last = self.last_date(symbol)
+        new = df[df.index > last] if last is not None else df
+        revised = self.revised(symbol, df[df.index <= last]) if last is not None else False
+        if new.empty and not revised:
+            return 0
+        
+        stored = self.read_frame(symbol)
+        columns = list(stored.columns)
+        if revised:
+            overlap = stored.index.intersection(df.index)
+            stored.loc[overlap, columns] = df.loc[overlap, columns].to_numpy(dtype=np.float64)
+        self._write_version(
+            symbol,
+            np.concatenate([stored.index.values, new.index.values.astype('datetime64[ns]')]),
+            {c: np.concatenate([stored[c].to_numpy(), new[c].to_numpy(dtype=np.float64)])
+             for c in columns}
+        )
+        return len(new)
+    
+    def refresh(self, symbol: str, fetch: Callable[[str], pd.DataFrame]) -> int:
+        """Bring a symbol up to date with the fewest bars downloaded.
+        
+        ``fetch(outputsize)`` is called with ``'compact'`` (the latest ~100
+        bars) when the symbol is already stored, and ``'full'`` when it is
+        new, the compact window no longer reaches the last stored bar, or
+        it revises stored bars (adjustments rewrite all earlier history).
+        """
+        last = self.last_date(symbol)
+        if last is None:
+            return self.append(symbol, fetch('full'))
+        
+        recent = fetch('compact')
+        if len(recent) and (recent.index.min() > last or self.revised(symbol, recent)):
+            return self.append(symbol, fetch('full'))
+        return self.append(symbol, recent)
+    
+    def refresh_many(self, symbols: List[str],
+                     fetch_many: Callable[[Dict[str, str]], Dict[str, pd.DataFrame]]) -> Dict[str, int]:
+        """Batched ``refresh`` for a concurrent fetcher.
+        
+        ``fetch_many({symbol: outputsize})`` returns frames for the symbols it
+        could fetch; symbols missing from its result are skipped. A symbol
+        whose compact window leaves a gap (or revises stored bars) is
+        skipped too when its full refetch fails, rather than appended past
+        the gap. Returns the rows added per refreshed symbol.
+        """
+        sizes = {s: 'compact' if self.last_date(s) is not None else 'full' for s in symbols}
+        frames = fetch_many(sizes)
+        
+        gaps = {
+            s: 'full' for s, df in frames.items()
+            if sizes[s] == 'compact' and len(df)
+            and (df.index.min() > self.last_date(s) or self.revised(s, df))
+        }
+        if gaps:
+            refetched = fetch_many(gaps)
+            frames = {s: refetched.get(s, df) for s, df in frames.items()
+                      if s not in gaps or s in refetched}
+        return {s: self.append(s, df) for s, df in frames.items()}
@@ -0,0 +1,120 @@
+# 
+
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.feature_cache import FeatureCache
+from preprocessing.gaf_store import GAFStore
+
+# Per-worker state, set once by the pool initializer instead of pickled per task
+_loader = None
+_cache: Optional[FeatureCache] = None
+_store: Optional[GAFStore] = None
+
+def _init_worker(loader, cache: Optional[FeatureCache], store: Optional[GAFStore]):
+    global _loader, _cache, _store
+    _loader, _cache, _store = loader, cache, store
+    if _cache is not None:
+        # Entries are per symbol so workers never share one; eviction is left
+        # to the parent once every worker is done
+        _cache.max_bytes = None
+        _cache.max_age = None
+
+def _process_symbol(index: int, symbol: str, raw: pd.DataFrame, out_dir: str) -> Dict:
+    """Process one symbol and write its arrays to disk; returns only metadata."""
+    if _cache is not None:
+        before = (_cache.hits, _cache.extensions, _cache.misses)
+        processed = _cache.get_or_compute(symbol, raw)
+        counts = [after - b for after, b in
+                  zip((_cache.hits, _cache.extensions, _cache.misses), before)]
+    else:
+        processed = _loader.process_data(raw)
+        counts = [0, 0, 0]
+    
+    if _store is not None:
+        _store.write(symbol, processed['gaf_data'], processed['prices'])
+        return {'index': index, 'symbol': symbol, 'path': None, 'cache_counts': counts}
+    
+    path = Path(out_dir) / f"{index:05d}_{symbol}"
+    path.mkdir(parents=True, exist_ok=True)
+    for name in ('gaf_data', 'prices', 'features'):
+        np.save(path / f'{name}.npy', np.asarray(processed[name]))
+    return {'index': index, 'symbol': symbol, 'path': str(path), 'cache_counts': counts}
+
+class ParallelPreprocessor:
+    """Fans per-symbol feature and GAF work out to a process pool.
+    
+    Workers write their arrays to ``.npy`` files (or straight into a
+    ``GAFStore``) and send back only paths, so large GAF stacks are never
+    pickled through the pool. Results are memory-mapped back and returned in
+    input symbol order whatever order the workers finish in. A symbol that
+    fails is logged and left out without stopping the others.
+    """
+    
+    def __init__(self, data_loader, n_workers: Optional[int] = None,
+                 output_dir: str = 'data/processed/parallel',
+                 cache: Optional[FeatureCache] = None, store: Optional[GAFStore] = None):
+        self.data_loader = data_loader
+        self.n_workers = n_workers or os.cpu_count()
+        self.output_dir = Path(output_dir)
+        self.cache = cache
+        self.store = store
+        self.logger = logging.getLogger(__name__)
+    
+    def run(self, raw_frames: Dict[str, pd.DataFrame], symbols: List[str]) -> List:
+        """Process ``symbols`` present in ``raw_frames``.
+        
+        Returns ``process_data``-style dicts of read-only memmaps in symbol
+        order, or, when writing to a GAF store, the symbols written.
+        """
+        if self.output_dir.exists():
+            shutil.rmtree(self.output_dir)
+        self.output_dir.mkdir(parents=True)
+        
+        tasks = [(i, s) for i, s in enumerate(symbols) if s in raw_frames]
+        results = {}
+        
+        with ProcessPoolExecutor(max_workers=min(self.n_workers, max(len(tasks), 1)),
+                                 initializer=_init_worker,
+                                 initargs=(self.data_loader, self.cache, self.store)) as pool:
+            futures = {
+                pool.submit(_process_symbol, i, s, raw_frames[s], str(self.output_dir)): s
+                for i, s in tasks
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                symbol = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.logger.error(f"Failed to process {symbol}: {e}")
+                    continue
+                results[result['index']] = result
+                self.logger.info(f"Processed {symbol} ({done}/{len(tasks)})")
+        
+        if self.cache is not None:
+            for result in results.values():
+                hits, extensions, misses = result['cache_counts']
+                self.cache.hits += hits
+                self.cache.extensions += extensions
+                self.cache.misses += misses
+            self.cache.evict()
+        
+        if self.store is not None:
+            return [results[index]['symbol'] for index in sorted(results)]
+        
+        # Deterministic merge: input order, not completion order
+        merged = []
+        for index in sorted(results):
+            path = Path(results[index]['path'])
+            merged.append({
+                name: np.load(path / f'{name}.npy', mmap_mode='r')
+                for name in ('gaf_data', 'prices', 'features')
+            })
+        return merged
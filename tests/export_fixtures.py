@@ -0,0 +1,54 @@
+import unittest
+import tempfile
+from pathlib import Path
+import torch
+import torch.nn as nn
+from models.ensemble import GAFEWGANEnsemble
+
+GENERATOR_KWARGS = {'input_channels': 2, 'image_size': 8, 'hidden_channels': 4}
+INPUT_SHAPE = (4, 2, 8, 8)
+
+class ExportedEnsembleTestCase(unittest.TestCase):
+    """Tiny three-member ensemble exported to ``self.path`` in ``export_format``."""
+    
+    export_format = 'export'
+    
+    def setUp(self):
+        torch.manual_seed(0)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ensemble = GAFEWGANEnsemble(n_models=3, device='cpu', generator_kwargs=GENERATOR_KWARGS)
+        self.ensemble.meta_learner.eval()
+        suffix = '.onnx' if self.export_format == 'onnx' else '.pt2'
+        self.path = Path(self.tmpdir.name) / f'ensemble{suffix}'
+        self.export()
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def export(self):
+        self.ensemble.export(self.path, torch.randn(1, *INPUT_SHAPE), format=self.export_format)
+    
+    def fit(self, steps: int = 100):
+        """Fit the ensemble to an input-dependent target and re-export it.
+        
+        At initialization the predictions barely depend on the input, so
+        this gives a tolerance something to be relative to.
+        """
+        x = torch.randn(64, *INPUT_SHAPE)
+        y = 8 * x.mean(dim=(1, 2, 3, 4)).unsqueeze(1)
+        modules = [model.generator for model in self.ensemble.base_models]
+        for module in modules + [self.ensemble.meta_learner]:
+            optimizer = torch.optim.Adam(module.parameters(), lr=1e-2)
+            for _ in range(steps):
+                if module is self.ensemble.meta_learner:
+                    with torch.no_grad():
+                        inputs = self.ensemble.base_predictions(x)
+                    prediction = module(inputs)
+                else:
+                    prediction = module(x)
+                loss = nn.MSELoss()(prediction, y)
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+        self.ensemble.meta_learner.eval()
+        self.export()
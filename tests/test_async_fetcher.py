@@ -0,0 +1,212 @@
+import unittest
+import json
+import multiprocessing
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+from preprocessing.async_fetcher import AsyncMarketFetcher, DAILY_COLUMNS, parse_time_series
+from preprocessing.ohlcv_store import OHLCVStore
+from utils.rate_limiter import TokenBucket
+
+def daily_response(n_bars):
+    """Alpha Vantage TIME_SERIES_DAILY payload, newest first."""
+    dates = pd.bdate_range('2020-01-01', periods=n_bars)[::-1]
+    series = {
+        d.strftime('%Y-%m-%d'): {
+            '1. open': f'{100 + i:.4f}', '2. high': f'{101 + i:.4f}',
+            '3. low': f'{99 + i:.4f}', '4. close': f'{100.5 + i:.4f}',
+            '5. volume': str(1000 + i)
+        }
+        for i, d in zip(range(n_bars - 1, -1, -1), dates)
+    }
+    return {'Meta Data': {}, 'Time Series (Daily)': series}
+
+class StubAPI:
+    """Local stand-in for the Alpha Vantage endpoint."""
+    
+    def __init__(self, latency=0.0, failures=None):
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+        
+        stub = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                with stub.lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    stub.requests.append(query)
+                    fail = stub.failures.get(query['symbol'], 0)
+                    if fail:
+                        stub.failures[query['symbol']] = fail - 1
+                time.sleep(stub.latency)
+                
+                if fail:
+                    self.send_response(503)
+                    body = b'{}'
+                elif query['symbol'] == 'BAD':
+                    self.send_response(200)
+                    body = json.dumps({'Error Message': 'Invalid API call'}).encode()
+                else:
+                    self.send_response(200)
+                    n_bars = 100 if query['outputsize'] == 'compact' else 300
+                    body = json.dumps(daily_response(n_bars)).encode()
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with stub.lock:
+                    stub.in_flight -= 1
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/query'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def take_token(path, results):
+    results.put(TokenBucket(path, calls=2, period=3600).try_acquire())
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmpdir.name) / 'limits.sqlite')
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_shared_between_instances(self):
+        """Test two limiters on the same file draw from one bucket."""
+        a = TokenBucket(self.path, calls=3, period=3600)
+        b = TokenBucket(self.path, calls=3, period=3600)
+        self.assertEqual(a.try_acquire(), 0.0)
+        self.assertEqual(b.try_acquire(), 0.0)
+        self.assertEqual(a.try_acquire(), 0.0)
+        self.assertGreater(b.try_acquire(), 0.0)
+    
+    def test_shared_between_processes(self):
+        """Test only `capacity` of several processes get a token at once."""
+        TokenBucket(self.path, calls=2, period=3600)
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=take_token, args=(self.path, results))
+                 for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        waits = [results.get() for _ in procs]
+        self.assertEqual(sum(w == 0.0 for w in waits), 2)
+    
+    def test_refill(self):
+        """Test tokens come back at the configured rate."""
+        bucket = TokenBucket(self.path, calls=20, period=1.0, capacity=1)
+        bucket.acquire()
+        start = time.perf_counter()
+        bucket.acquire()
+        self.assertGreater(time.perf_counter() - start, 0.03)
+
+class TestParseTimeSeries(unittest.TestCase):
+    def test_matches_pandas_parse(self):
+        """Test the NumPy parser gives the same bars as the pandas conversion."""
+        data = daily_response(250)
+        df = parse_time_series(data, 'A', DAILY_COLUMNS)
+        
+        expected = pd.DataFrame.from_dict(data['Time Series (Daily)'], orient='index')
+        expected.index = pd.to_datetime(expected.index)
+        expected = expected.apply(pd.to_numeric).sort_index()
+        
+        self.assertEqual(list(df.columns), DAILY_COLUMNS)
+        np.testing.assert_array_equal(df.index.values, expected.index.values.astype('datetime64[ns]'))
+        np.testing.assert_array_equal(df.to_numpy(), expected.to_numpy(dtype=np.float64))
+    
+    def test_unordered_and_malformed(self):
+        """Test out-of-order bars are sorted and a wrong field count is rejected."""
+        data = daily_response(20)
+        items = list(data['Time Series (Daily)'].items())
+        shuffled = {'Time Series (Daily)': dict(items[5:] + items[:5])}
+        df = parse_time_series(shuffled, 'A', DAILY_COLUMNS)
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertEqual(df['open'].iloc[0], 100.0)
+        
+        with self.assertRaises(ValueError):
+            parse_time_series(data, 'A', DAILY_COLUMNS[:4])
+        with self.assertRaises(ValueError):
+            parse_time_series({'Meta Data': {}}, 'A', DAILY_COLUMNS)
+
+class TestAsyncMarketFetcher(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.limiter = TokenBucket(str(Path(self.tmpdir.name) / 'limits.sqlite'),
+                                   calls=1000, period=1.0)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def make_fetcher(self, stub, **kwargs):
+        return AsyncMarketFetcher('demo', self.limiter, function='TIME_SERIES_DAILY',
+                                  columns=DAILY_COLUMNS, base_url=stub.url, backoff=0.01,
+                                  **kwargs)
+    
+    def test_requests_overlap(self):
+        """Test several symbols are in flight at once and parsed oldest first."""
+        stub = StubAPI(latency=0.2)
+        try:
+            symbols = ['A', 'B', 'C', 'D']
+            start = time.perf_counter()
+            frames = self.make_fetcher(stub, max_in_flight=4).fetch_symbols(symbols)
+            elapsed = time.perf_counter() - start
+        finally:
+            stub.close()
+        
+        self.assertEqual(sorted(frames), symbols)
+        self.assertGreater(stub.max_in_flight, 1)
+        self.assertLess(elapsed, 0.2 * len(symbols))
+        df = frames['A']
+        self.assertEqual(list(df.columns), DAILY_COLUMNS)
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertEqual(df['close'].iloc[-1], 100.5 + 299)
+    
+    def test_retry_and_failure_isolation(self):
+        """Test transient 503s are retried and a bad symbol does not sink the batch."""
+        stub = StubAPI(failures={'A': 2})
+        try:
+            frames = self.make_fetcher(stub).fetch_symbols(['A', 'BAD'])
+        finally:
+            stub.close()
+        
+        self.assertEqual(list(frames), ['A'])
+        self.assertEqual(sum(r['symbol'] == 'A' for r in stub.requests), 3)
+        self.assertEqual(sum(r['symbol'] == 'BAD' for r in stub.requests), 1)
+    
+    def test_store_refresh_uses_compact(self):
+        """Test stored symbols are refreshed with compact requests."""
+        store = OHLCVStore(str(Path(self.tmpdir.name) / 'bars'))
+        stub = StubAPI()
+        try:
+            fetcher = self.make_fetcher(stub)
+            store.refresh_many(['A', 'B'], fetcher.fetch_many)
+            added = store.refresh_many(['A', 'B'], fetcher.fetch_many)
+        finally:
+            stub.close()
+        
+        self.assertEqual([r['outputsize'] for r in stub.requests], ['full', 'full', 'compact', 'compact'])
+        self.assertEqual(added, {'A': 0, 'B': 0})
+        self.assertEqual(len(store.read('A')['close']), 300)
+
+if __name__ == '__main__':
+    unittest.main()
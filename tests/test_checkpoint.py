@@ -0,0 +1,125 @@
+import unittest
+import tempfile
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+from training.checkpoint import CheckpointManager
+from training.trainer import GAFWGANTrainer
+
+class TinyModel:
+    """Stand-in with the GAFWGAN training interface and a noisy update."""
+    
+    def __init__(self, crash_at=None):
+        self.generator = nn.Linear(4, 1)
+        self.discriminator = nn.Linear(1, 1)
+        self.optimizer = torch.optim.Adam(self.generator.parameters(), lr=0.01)
+        self.iteration = 0
+        self.crash_at = crash_at
+    
+    def state_dict(self):
+        return {'generator': self.generator.state_dict(),
+                'optimizer': self.optimizer.state_dict(),
+                'iteration': self.iteration}
+    
+    def load_state_dict(self, state):
+        self.generator.load_state_dict(state['generator'])
+        self.optimizer.load_state_dict(state['optimizer'])
+        self.iteration = state['iteration']
+    
+    def train_step(self, data, price):
+        if self.iteration == self.crash_at:
+            raise KeyboardInterrupt
+        target = price + 0.1 * torch.randn_like(price)
+        loss = nn.MSELoss()(self.generator(data), target)
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+        self.iteration += 1
+        return loss.item(), 0.0
+
+class TestCheckpointManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_rotation_and_snapshot(self):
+        """Test only the newest K files remain and each holds the state at save time."""
+        manager = CheckpointManager(self.tmpdir.name, keep_last=2)
+        weights = torch.zeros(3)
+        for step in range(5):
+            weights.fill_(step)
+            manager.save({'weights': weights, 'step': step})
+        manager.close()
+        
+        paths = manager.checkpoints()
+        self.assertEqual([p.name for p in paths], ['ckpt_00000003.pt', 'ckpt_00000004.pt'])
+        self.assertEqual(sorted(p.name for p in paths[0].parent.iterdir()),
+                         [p.name for p in paths])
+        state = manager.load()
+        self.assertEqual(state['step'], 4)
+        torch.testing.assert_close(state['weights'], torch.full((3,), 4.0))
+        
+        # Numbering continues across managers on the same directory
+        reopened = CheckpointManager(self.tmpdir.name, keep_last=2)
+        self.assertEqual(reopened.save({'step': 5}, block=True).name, 'ckpt_00000005.pt')
+        reopened.close()
+    
+    def test_fingerprint_mismatch_starts_over(self):
+        """Test checkpoints of a different run are discarded on open."""
+        manager = CheckpointManager(self.tmpdir.name, fingerprint='run-a')
+        manager.save({'step': 0}, block=True)
+        manager.close()
+        
+        same = CheckpointManager(self.tmpdir.name, fingerprint='run-a')
+        self.assertEqual(same.load()['step'], 0)
+        same.close()
+        
+        other = CheckpointManager(self.tmpdir.name, fingerprint='run-b')
+        self.assertIsNone(other.load())
+        self.assertEqual(other.save({'step': 1}, block=True).name, 'ckpt_00000000.pt')
+        other.close()
+        self.assertIsNone(CheckpointManager(self.tmpdir.name, fingerprint='run-a').load())
+
+class TestTrainerResume(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        generator = torch.Generator().manual_seed(1)
+        self.dataset = TensorDataset(torch.randn(16, 4, generator=generator),
+                                     torch.randn(16, 1, generator=generator))
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def run_training(self, model, checkpoint=None):
+        loader = DataLoader(self.dataset, batch_size=2, shuffle=True)
+        trainer = GAFWGANTrainer(model, loader, None, 'cpu', checkpoint, checkpoint_every=2)
+        trainer.train(3)
+        return model
+    
+    def test_resume_mid_epoch_matches_uninterrupted(self):
+        """Test a run interrupted mid-epoch resumes to the same weights."""
+        torch.manual_seed(0)
+        expected = self.run_training(TinyModel())
+        
+        torch.manual_seed(0)
+        manager = CheckpointManager(self.tmpdir.name, keep_last=2)
+        with self.assertRaises(KeyboardInterrupt):
+            # Step 13 is the sixth batch of the second epoch
+            self.run_training(TinyModel(crash_at=13), manager)
+        manager.close()
+        self.assertEqual(manager.load()['batch'], 4)
+        
+        torch.manual_seed(123)
+        manager = CheckpointManager(self.tmpdir.name, keep_last=2)
+        resumed = self.run_training(TinyModel(), manager)
+        manager.close()
+        
+        self.assertEqual(resumed.iteration, 24)
+        for name, value in expected.generator.state_dict().items():
+            torch.testing.assert_close(resumed.generator.state_dict()[name], value)
+        self.assertEqual(manager.load()['epoch'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
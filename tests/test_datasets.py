@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, BatchSampler
+from preprocessing.gaf import GAFConverter
+from preprocessing.datasets import LazyGAFDataset
+
+class TestLazyGAFDataset(unittest.TestCase):
+    def setUp(self):
+        self.converter = GAFConverter(size=60)
+        self.series = [
+            {'close': np.cumsum(np.random.normal(0, 1, 200)) + 100},
+            {'close': np.cumsum(np.random.normal(0, 1, 90)) + 50}
+        ]
+        self.dataset = LazyGAFDataset(self.series)
+    
+    def test_length(self):
+        """Test one sample per window with a next-day target."""
+        self.assertEqual(len(self.dataset), 140 + 30)
+    
+    def test_matches_process_data_layout(self):
+        """Test samples match the eager GAF windows and targets."""
+        close = self.series[0]['close']
+        eager = self.converter.transform_batch(self.converter.sliding_windows(close)[:-1])
+        
+        gaf, price = self.dataset[17]
+        np.testing.assert_allclose(gaf.numpy(), eager[17].astype(np.float32))
+        self.assertAlmostEqual(price.item(), close[77], places=4)
+        
+        gaf, price = self.dataset[145]
+        np.testing.assert_allclose(gaf.numpy(), self.converter.transform(self.series[1]['close'][5:65]), atol=1e-6)
+    
+    def test_batched_workers(self):
+        """Test batch indexing through a multi-worker DataLoader."""
+        sampler = BatchSampler(range(130, 170), 16, drop_last=False)
+        loader = DataLoader(self.dataset, sampler=sampler, batch_size=None, num_workers=2)
+        batches = list(loader)
+        
+        self.assertEqual([len(b[0]) for b in batches], [16, 16, 8])
+        for row, index in enumerate(range(130, 146)):
+            gaf, price = self.dataset[index]
+            self.assertTrue(torch.allclose(batches[0][0][row], gaf))
+            self.assertEqual(batches[0][1][row, 0].item(), price.item())
@@ -0,0 +1,81 @@
+import unittest
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+import torch
+from models.export import load_exported
+from models.inference import ExportedPredictor, Predictor, TorchPredictor, load_predictor
+from export_fixtures import ExportedEnsembleTestCase
+
+# Loads the artifact with torch alone and checks no repository module came along
+STANDALONE_LOAD = """
+import sys, torch
+program = torch.export.load(sys.argv[1]).module()
+x = torch.load(sys.argv[2])
+torch.save(program(x), sys.argv[3])
+assert not any(name.split('.')[0] in ('models', 'training', 'preprocessing') for name in sys.modules)
+"""
+
+HAS_COMPILER = any(shutil.which(cxx) for cxx in (os.environ.get('CXX', 'c++'), 'g++', 'clang++'))
+
+class TestExport(ExportedEnsembleTestCase):
+    export_format = 'export'
+    
+    def test_matches_eager_for_any_batch(self):
+        """Test the exported ensemble matches predict at several batch sizes."""
+        model, metadata = load_exported(self.path)
+        self.assertEqual(metadata['n_models'], 3)
+        self.assertEqual(metadata['input_shape'], ['batch', 4, 2, 8, 8])
+        for batch_size in (1, 5, 64):
+            x = torch.randn(batch_size, 4, 2, 8, 8)
+            with torch.no_grad():
+                torch.testing.assert_close(model(x), self.ensemble.predict(x))
+    
+    def test_loads_without_repository_code(self):
+        """Test the artifact runs in a fresh interpreter that only imports torch."""
+        x = torch.randn(3, 4, 2, 8, 8)
+        inputs, outputs = Path(self.tmpdir.name) / 'x.pt', Path(self.tmpdir.name) / 'y.pt'
+        torch.save(x, inputs)
+        subprocess.run([sys.executable, '-c', STANDALONE_LOAD, str(self.path), str(inputs), str(outputs)],
+                       check=True, cwd=self.tmpdir.name, env={'PATH': '/usr/bin:/bin'})
+        with torch.no_grad():
+            torch.testing.assert_close(torch.load(outputs), self.ensemble.predict(x))
+        self.assertEqual(json.loads(Path(f'{self.path}.json').read_text())['format'], 'export')
+    
+    def test_load_predictor_threads(self):
+        """Test the torch backends take the same thread option as the ONNX one."""
+        threads = torch.get_num_threads()
+        try:
+            predictor = load_predictor(self.path, threads=1)
+            self.assertEqual(torch.get_num_threads(), 1)
+            TorchPredictor(self.ensemble, threads=2)
+            self.assertEqual(torch.get_num_threads(), 2)
+        finally:
+            torch.set_num_threads(threads)
+        self.assertIsInstance(predictor, ExportedPredictor)
+        x = torch.randn(2, 4, 2, 8, 8)
+        with torch.no_grad():
+            np.testing.assert_allclose(predictor.predict(x.numpy()), self.ensemble.predict(x).numpy(),
+                                       rtol=1e-5, atol=1e-6)
+        with self.assertRaises(TypeError):
+            Predictor()
+    
+    @unittest.skipUnless(HAS_COMPILER, "AOTInductor needs a C++ compiler")
+    def test_aoti_matches_eager(self):
+        """Test the default AOTInductor artifact matches predict."""
+        path = Path(self.tmpdir.name) / 'ensemble_aoti.pt2'
+        self.ensemble.export(path, torch.randn(1, 4, 2, 8, 8))
+        model, metadata = load_exported(path)
+        self.assertEqual(metadata['format'], 'aoti')
+        for batch_size in (1, 5):
+            x = torch.randn(batch_size, 4, 2, 8, 8)
+            with torch.no_grad():
+                # Fused native kernels reorder float32 arithmetic
+                torch.testing.assert_close(model(x), self.ensemble.predict(x), rtol=1e-4, atol=1e-4)
+
+if __name__ == '__main__':
+    unittest.main()
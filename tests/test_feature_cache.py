@@ -0,0 +1,111 @@
+import unittest
+import tempfile
+from unittest import mock
+import numpy as np
+import pandas as pd
+from preprocessing.feature_engineering import TechnicalIndicators
+from preprocessing.gaf import GAFConverter, MultiChannelGAFBuilder
+from preprocessing.feature_cache import FeatureCache
+
+class FeatureLoader:
+    """Same feature pipeline as StockDataLoader without the API client."""
+    
+    def __init__(self, gaf_builder=None):
+        self.ti = TechnicalIndicators()
+        self.gaf_converter = GAFConverter(size=60)
+        self.gaf_builder = gaf_builder
+    
+    def build_features(self, df):
+        basic = self.ti.calculate_basic_indicators(df)
+        advanced = self.ti.calculate_advanced_indicators(df, basic)
+        return pd.concat([df, basic, advanced], axis=1).dropna()
+
+class TestFeatureCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.loader = FeatureLoader()
+        n = 900
+        close = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, n)))
+        self.df = pd.DataFrame({
+            'open': close,
+            'high': close * (1 + np.random.uniform(0, 0.02, n)),
+            'low': close * (1 - np.random.uniform(0, 0.02, n)),
+            'close': close,
+            'volume': np.random.uniform(1e5, 1e6, n)
+        }, index=pd.date_range('2020-01-01', periods=n, freq='B'))
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def assert_matches_full(self, result, df):
+        features = self.loader.build_features(df)
+        converter = self.loader.gaf_converter
+        expected_gaf = converter.transform_batch(converter.sliding_windows(features['close'].values)[:-1])
+        
+        np.testing.assert_allclose(result['features'], features.values[60:], rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(result['prices'], features['close'].values[60:])
+        np.testing.assert_allclose(result['gaf_data'], expected_gaf, atol=1e-6)
+    
+    def test_hit_and_extension(self):
+        """Test a repeat run hits and new bars only extend the tail."""
+        cache = FeatureCache(self.tmpdir.name, self.loader)
+        cache.get_or_compute('AAPL', self.df.iloc[:-5])
+        result = cache.get_or_compute('AAPL', self.df.iloc[:-5])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assert_matches_full(result, self.df.iloc[:-5])
+        
+        result = cache.get_or_compute('AAPL', self.df)
+        self.assertEqual(cache.extensions, 1)
+        self.assert_matches_full(result, self.df)
+    
+    def test_interrupted_extension(self):
+        """Test a crash before meta.json is replaced keeps the entry consistent."""
+        cache = FeatureCache(self.tmpdir.name, self.loader)
+        cache.get_or_compute('AAPL', self.df.iloc[:-10])
+        with mock.patch.object(FeatureCache, '_write_meta', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                cache.get_or_compute('AAPL', self.df.iloc[:-5])
+        
+        result = cache.get_or_compute('AAPL', self.df.iloc[:-10])
+        self.assertEqual(cache.hits, 1)
+        self.assert_matches_full(result, self.df.iloc[:-10])
+        
+        result = cache.get_or_compute('AAPL', self.df)
+        self.assertEqual(cache.extensions, 1)
+        self.assert_matches_full(result, self.df)
+    
+    def test_revised_history_misses(self):
+        """Test changed history forces a full recompute."""
+        cache = FeatureCache(self.tmpdir.name, self.loader)
+        cache.get_or_compute('AAPL', self.df.iloc[:-5])
+        
+        revised = self.df.copy()
+        revised.iloc[10, revised.columns.get_loc('close')] *= 1.5
+        result = cache.get_or_compute('AAPL', revised)
+        self.assertEqual((cache.misses, cache.extensions), (2, 0))
+        self.assert_matches_full(result, revised)
+    
+    def test_multichannel_extension(self):
+        """Test a builder's multi-channel windows are cached and extended."""
+        builder = MultiChannelGAFBuilder(('close', 'ATR_21'), ('gasf', 'gadf'), size=20)
+        loader = FeatureLoader(builder)
+        cache = FeatureCache(self.tmpdir.name, loader)
+        cache.get_or_compute('AAPL', self.df.iloc[:-5])
+        result = cache.get_or_compute('AAPL', self.df)
+        self.assertEqual(cache.extensions, 1)
+        
+        features = loader.build_features(self.df)
+        expected = builder.transform(builder.sliding_windows(features)[:-1])
+        self.assertEqual(result['gaf_data'].shape, (len(features) - 20, 4, 20, 20))
+        np.testing.assert_allclose(result['gaf_data'], expected, atol=1e-6)
+        np.testing.assert_allclose(result['prices'], features['close'].values[20:])
+    
+    def test_size_eviction(self):
+        """Test least recently used entries are evicted over the byte budget."""
+        cache = FeatureCache(self.tmpdir.name, self.loader, max_bytes=1)
+        cache.get_or_compute('AAPL', self.df)
+        cache.get_or_compute('MSFT', self.df)
+        
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(len(list(cache._entries())), 1)
+        self.assertEqual(cache.stats()['misses'], 2)
@@ -2,7 +2,7 @@
 
 import unittest
 import numpy as np
-from preprocessing.gaf import GAFConverter
+from preprocessing.gaf import GAFConverter, StreamingGAFEncoder, MultiChannelGAFBuilder, paa
 
 class TestGAFConverter(unittest.TestCase):
     def setUp(self):
@@ -38,3 +38,112 @@ class TestGAFConverter(unittest.TestCase):
         # Check output values are in valid range [-1, 1]
         self.assertTrue(np.all(gaf >= -1))
         self.assertTrue(np.all(gaf <= 1))
+    
+    def test_transform_batch_matches_transform(self):
+        """Test batched transform against per-window transform."""
+        series = np.cumsum(np.random.normal(0, 1, 200)) + 100
+        batch = self.converter.transform_batch(series)
+        
+        self.assertEqual(batch.shape, (141, 60, 60))
+        for i in [0, 70, 140]:
+            np.testing.assert_array_equal(batch[i], self.converter.transform(series[i:i+60]))
+    
+    def test_transform_batch_preallocated(self):
+        """Test batched transform writes into a preallocated output."""
+        series = np.cumsum(np.random.normal(0, 1, 100)) + 100
+        windows = self.converter.sliding_windows(series)[:-1]
+        out = np.empty((len(windows), 60, 60))
+        
+        result = self.converter.transform_batch(windows, out=out)
+        self.assertIs(result, out)
+        np.testing.assert_array_equal(out[-1], self.converter.transform(series[39:99]))
+    
+    def test_paa(self):
+        """Test PAA segment means for even and uneven splits."""
+        np.testing.assert_allclose(paa(np.arange(8.0), 4), [0.5, 2.5, 4.5, 6.5])
+        np.testing.assert_allclose(paa(np.arange(10.0), 4), [0.5, 3.0, 6.0, 8.5])
+        self.assertEqual(paa(np.ones((5, 240)), 30).shape, (5, 30))
+    
+    def test_paa_lookback(self):
+        """Test a long lookback is downsampled to the image size."""
+        converter = GAFConverter(size=30, lookback=240)
+        series = np.cumsum(np.random.normal(0, 1, 300)) + 100
+        batch = converter.transform_batch(series)
+        
+        self.assertEqual(batch.shape, (61, 30, 30))
+        np.testing.assert_allclose(batch[10], converter.transform(series[10:250]))
+    
+    def test_short_lookback_rejected(self):
+        """Test a lookback shorter than the image size fails at construction."""
+        with self.assertRaisesRegex(ValueError, r'\(30\).*\(60\)'):
+            GAFConverter(size=60, lookback=30)
+        with self.assertRaisesRegex(ValueError, r'\(30\).*\(60\)'):
+            MultiChannelGAFBuilder(size=60, lookback=30)
+
+
+class TestStreamingGAFEncoder(unittest.TestCase):
+    def setUp(self):
+        self.converter = GAFConverter(size=60)
+        self.encoder = StreamingGAFEncoder(size=60)
+        self.prices = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, 400)))
+    
+    def test_not_ready_before_full_window(self):
+        """Test encoder returns None until a full window is seen."""
+        for price in self.prices[:59]:
+            self.assertIsNone(self.encoder.update(price))
+        self.assertIsNotNone(self.encoder.update(self.prices[59]))
+    
+    def test_matches_transform(self):
+        """Test every streamed matrix equals a full transform of its window."""
+        for i, price in enumerate(self.prices):
+            gaf = self.encoder.update(price)
+            if i >= 59:
+                np.testing.assert_array_equal(
+                    gaf, self.converter.transform(self.prices[i-59:i+1])
+                )
+        
+        # Both the incremental and the rescale paths should have been taken
+        self.assertGreater(self.encoder.n_incremental, 0)
+        self.assertGreater(self.encoder.n_rebuilds, 1)
+    
+    def test_reset_with_window(self):
+        """Test seeding the encoder with a full window."""
+        gaf = self.encoder.reset(self.prices[:60])
+        np.testing.assert_array_equal(gaf, self.converter.transform(self.prices[:60]))
+        
+        gaf = self.encoder.update(self.prices[60])
+        np.testing.assert_array_equal(gaf, self.converter.transform(self.prices[1:61]))
+
+
+class TestMultiChannelGAFBuilder(unittest.TestCase):
+    def setUp(self):
+        self.builder = MultiChannelGAFBuilder(columns=['close', 'volume'], methods=['gasf', 'gadf'])
+        self.features = np.column_stack([
+            np.cumsum(np.random.normal(0, 1, 100)) + 100,
+            np.random.uniform(1e5, 2e5, 100)
+        ])
+    
+    def test_output_layout(self):
+        """Test channels-first output shape and channel order."""
+        out = self.builder.transform(self.features)
+        self.assertEqual(out.shape, (41, 4, 60, 60))
+        self.assertEqual(out.dtype, np.float32)
+        
+        # GASF channels match the single-channel converter
+        converter = GAFConverter(size=60)
+        np.testing.assert_allclose(out[5, 0], converter.transform(self.features[5:65, 0]), atol=1e-6)
+        np.testing.assert_allclose(out[5, 2], converter.transform(self.features[5:65, 1]), atol=1e-6)
+    
+    def test_gadf(self):
+        """Test GADF channel equals sin(phi_i - phi_j)."""
+        out = self.builder.transform(self.features)
+        window = self.features[:60, 1]
+        phi = np.arccos(2 * (window - window.min()) / (window.max() - window.min()) - 1)
+        np.testing.assert_allclose(out[0, 3], np.sin(phi[:, None] - phi[None, :]), atol=1e-6)
+        np.testing.assert_allclose(out[0, 3], -out[0, 3].T)
+    
+    def test_constant_column(self):
+        """Test constant windows do not produce NaNs."""
+        self.features[:, 1] = 1.0
+        out = self.builder.transform(self.features)
+        self.assertFalse(np.isnan(out).any())
@@ -0,0 +1,128 @@
+import unittest
+import os
+import pickle
+import tempfile
+from unittest import mock
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, BatchSampler
+from preprocessing.gaf import GAFConverter
+from preprocessing.gaf_store import GAFStore, PackedGAFDataset, pack_upper, unpack_upper
+
+class TestGAFStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        series = np.cumsum(np.random.normal(0, 1, 300)) + 100
+        self.gaf_data = GAFConverter(size=60).transform_batch(series)
+        self.prices = np.arange(len(self.gaf_data), dtype=np.float64)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_pack_roundtrip(self):
+        """Test packed triangles expand back to the float32 matrices."""
+        packed = pack_upper(self.gaf_data)
+        self.assertEqual(packed.shape, (len(self.gaf_data), 1830))
+        np.testing.assert_array_equal(unpack_upper(packed), self.gaf_data.astype(np.float32))
+    
+    def test_float16_store(self):
+        """Test float16 storage size and precision."""
+        store = GAFStore(self.tmpdir.name, dtype='float16')
+        store.write('AAPL', self.gaf_data, self.prices)
+        array = store.open('AAPL')
+        
+        self.assertEqual(store.symbols(), ['AAPL'])
+        self.assertLess(store.nbytes('AAPL'), self.gaf_data.nbytes / 7)
+        np.testing.assert_allclose(array.batch(slice(0, 10)), self.gaf_data[:10], atol=1e-3)
+    
+    def test_dataset_batches(self):
+        """Test batch indexing across symbols matches per-sample indexing."""
+        store = GAFStore(self.tmpdir.name)
+        store.write('AAPL', self.gaf_data, self.prices)
+        store.write('MSFT', self.gaf_data[:50], self.prices[:50] + 1000)
+        dataset = PackedGAFDataset([store.open('AAPL'), store.open('MSFT')])
+        self.assertEqual(len(dataset), len(self.gaf_data) + 50)
+        
+        loader = DataLoader(dataset, sampler=BatchSampler(range(230, 260), 16, False), batch_size=None)
+        gaf, prices = next(iter(loader))
+        self.assertEqual(gaf.shape, (16, 60, 60))
+        
+        for row, index in enumerate(range(230, 246)):
+            single_gaf, single_price = dataset[index]
+            self.assertTrue(torch.equal(gaf[row], single_gaf))
+            self.assertEqual(prices[row, 0].item(), single_price.item())
+        self.assertEqual(prices[-1, 0].item(), 1000 + 245 - len(self.gaf_data))
+    
+    def test_rejects_multichannel(self):
+        """Test multi-channel windows are refused instead of packed wrongly."""
+        store = GAFStore(self.tmpdir.name)
+        with self.assertRaises(ValueError):
+            store.write('AAPL', np.stack([self.gaf_data, self.gaf_data], axis=1), self.prices)
+        self.assertEqual(store.symbols(), [])
+    
+    def test_pickle_remaps(self):
+        """Test a pickled dataset reopens the store files instead of copying them."""
+        store = GAFStore(self.tmpdir.name)
+        store.write('AAPL', self.gaf_data, self.prices)
+        dataset = PackedGAFDataset([store.open('AAPL')])
+        payload = pickle.dumps(dataset)
+        self.assertLess(len(payload), 1000)
+        
+        restored = pickle.loads(payload)
+        self.assertIsInstance(restored.arrays[0].packed, np.memmap)
+        gaf, prices = restored[[3, 4]]
+        torch.testing.assert_close(gaf, dataset[[3, 4]][0])
+        torch.testing.assert_close(prices, dataset[[3, 4]][1])
+    
+    def test_interrupted_rewrite_keeps_old_entry(self):
+        """Test a failed rewrite leaves the previous entry intact and unlisted temp files."""
+        store = GAFStore(self.tmpdir.name)
+        store.write('AAPL', self.gaf_data, self.prices)
+        with mock.patch('preprocessing.gaf_store.pack_upper', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                store.write('AAPL', self.gaf_data[:10], self.prices[:10])
+        
+        self.assertEqual(store.symbols(), ['AAPL'])
+        array = store.open('AAPL')
+        self.assertEqual(len(array), len(self.gaf_data))
+        np.testing.assert_array_equal(array.batch(slice(0, 5)), self.gaf_data[:5].astype(np.float32))
+        
+        store.write('AAPL', self.gaf_data[:10], self.prices[:10])
+        self.assertEqual(len(store.open('AAPL')), 10)
+    
+    def test_prices_column(self):
+        """Test prices are stored as a column and old flat stores still load."""
+        store = GAFStore(self.tmpdir.name)
+        path = store.write('AAPL', self.gaf_data, self.prices)
+        self.assertEqual(np.load(path / 'prices.npy').shape, (len(self.gaf_data), 1))
+        
+        np.save(path / 'prices.npy', self.prices.astype(np.float32))
+        array = store.open('AAPL')
+        self.assertEqual(array.prices.shape, (len(self.gaf_data), 1))
+        self.assertEqual(next(array.iter_batches(8))[1].shape, (8, 1))
+    
+    def test_interrupted_swap_reads_previous_entry(self):
+        """Test an entry moved aside by an interrupted swap is still listed and opened."""
+        store = GAFStore(self.tmpdir.name)
+        store.write('AAPL', self.gaf_data, self.prices)
+        replace = os.replace
+        calls = []
+        
+        def interrupt_second(src, dst):
+            calls.append(dst)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            replace(src, dst)
+        
+        with mock.patch('preprocessing.gaf_store.os.replace', side_effect=interrupt_second):
+            with self.assertRaises(KeyboardInterrupt):
+                store.write('AAPL', self.gaf_data[:10], self.prices[:10])
+        
+        self.assertFalse(store.symbol_dir('AAPL').exists())
+        self.assertEqual(store.symbols(), ['AAPL'])
+        self.assertEqual(len(store.open('AAPL')), len(self.gaf_data))
+        self.assertGreater(store.nbytes('AAPL'), 0)
+        
+        store.write('AAPL', self.gaf_data[:10], self.prices[:10])
+        self.assertEqual(store.symbols(), ['AAPL'])
+        self.assertEqual(len(store.open('AAPL')), 10)
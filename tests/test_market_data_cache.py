@@ -0,0 +1,89 @@
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from automation.Monitoring.data_cache import MarketDataCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestMarketDataCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        # 1000 rows x 5 float64 columns plus the index: 48 KB per frame
+        self.frames = {
+            s: pd.DataFrame(np.random.rand(1000, 5), columns=list('ohlcv'),
+                            index=pd.date_range('2020-01-01', periods=1000))
+            for s in 'ABCD'
+        }
+        self.frame_bytes = int(self.frames['A'].memory_usage(deep=True).sum())
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_lru_eviction_within_budget(self):
+        """Test the least recently used frame is evicted once over budget."""
+        cache = MarketDataCache(max_bytes=2 * self.frame_bytes, clock=self.clock)
+        cache.put('A', self.frames['A'])
+        cache.put('B', self.frames['B'])
+        cache.get('A')
+        cache.put('C', self.frames['C'])
+        
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+        self.assertNotIn('B', cache)
+        self.assertIsNotNone(cache.get('A'))
+        self.assertIsNone(cache.get('B'))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 1, 1))
+    
+    def test_ttl_and_max_age(self):
+        """Test entries expire after their TTL and max_age only tightens it."""
+        cache = MarketDataCache(ttl=100, clock=self.clock)
+        cache.put('A', self.frames['A'])
+        cache.put('B', self.frames['B'], ttl=10)
+        
+        self.clock.now = 20
+        self.assertIsNone(cache.get('A', max_age=15))
+        self.assertIsNone(cache.get('B', max_age=1000))
+        cache.put('A', self.frames['A'])
+        self.clock.now = 50
+        self.assertIsNotNone(cache.get('A'))
+        self.assertEqual(cache.stats()['expirations'], 2)
+    
+    def test_spill_and_reload(self):
+        """Test evicted frames are spilled to disk and reloaded on the next hit."""
+        cache = MarketDataCache(max_bytes=self.frame_bytes, spill_dir=self.tmpdir.name,
+                                clock=self.clock)
+        cache.put('A', self.frames['A'])
+        cache.put('B', self.frames['B'])
+        self.assertIn('A', cache)
+        
+        reloaded = cache.get('A')
+        pd.testing.assert_frame_equal(reloaded, self.frames['A'])
+        stats = cache.stats()
+        self.assertEqual((stats['spills'], stats['reloads'], stats['spilled_entries']), (2, 1, 1))
+        
+        # Spilled copies expire like in-memory ones
+        self.clock.now = cache.ttl
+        self.assertIsNone(cache.get('B'))
+        self.assertEqual(cache.stats()['spilled_entries'], 0)
+    
+    def test_in_place_changes_do_not_reach_cache(self):
+        """Test adding columns to a stored or returned frame leaves the entry and its size alone."""
+        cache = MarketDataCache(clock=self.clock)
+        frame = self.frames['A'].copy()
+        cache.put('A', frame)
+        frame['sma'] = frame['c'].rolling(5).mean()
+        returned = cache.get('A')
+        returned['ema'] = returned['c'].ewm(span=5).mean()
+        
+        self.assertEqual(list(cache.get('A').columns), list('ohlcv'))
+        self.assertEqual(cache.nbytes, self.frame_bytes)
+
+if __name__ == '__main__':
+    unittest.main()
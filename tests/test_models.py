@@ -1,7 +1,15 @@
 import unittest
+import copy
+import math
+import tempfile
+from pathlib import Path
+import numpy as np
 import torch
-from models.generator import Generator
+from torch.utils.data import BatchSampler, DataLoader, TensorDataset
+from models.generator import ConvLSTMCell, FusedConvLSTMCell, Generator
 from models.discriminator import Discriminator
+from models.ensemble import GAFEWGANEnsemble
+from models.gaf_wgan import GAFWGAN
 
 class TestGenerator(unittest.TestCase):
     def setUp(self):
@@ -22,6 +30,54 @@ class TestGenerator(unittest.TestCase):
         
         # Check output is valid (no NaN values)
         self.assertFalse(torch.isnan(output).any())
+    
+    def test_configurable_size(self):
+        """Test generator built for smaller multi-channel images."""
+        generator = Generator(input_channels=6, image_size=30)
+        self.assertEqual(generator.dense1.in_features, 64 * 30 * 30)
+        
+        x = torch.randn(2, self.seq_len, 6, 30, 30)
+        self.assertEqual(generator(x).shape, (2, 1))
+    
+    def test_bottleneck_heads(self):
+        """Test pooled and strided-conv heads shrink dense1 and keep the output shape."""
+        x = torch.randn(2, 3, 3, 30, 30)
+        for head in ('pool', 'conv'):
+            generator = Generator(image_size=30, hidden_channels=8, head=head, pool_size=4)
+            self.assertEqual(generator.dense1.in_features, 8 * 4 * 4)
+            self.assertEqual(generator(x).shape, (2, 1))
+        with self.assertRaises(ValueError):
+            Generator(head='unknown')
+
+class TestFusedConvLSTM(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.x = torch.randn(2, 4, 3, 10, 10)
+    
+    def test_matches_eight_conv_cell(self):
+        """Test the fused cell reproduces the eight-convolution cell step by step."""
+        cell = ConvLSTMCell(3, 5, 3)
+        fused = FusedConvLSTMCell.from_cell(cell)
+        self.assertEqual(len(list(fused.children())), 1)
+        
+        h = c = torch.zeros(2, 5, 10, 10)
+        fh = fc = None
+        with torch.no_grad():
+            for t in range(self.x.size(1)):
+                h, c = cell(self.x[:, t], h, c)
+                fh, fc = fused(self.x[:, t], fh, fc)
+                torch.testing.assert_close(fh, h, rtol=1e-5, atol=1e-6)
+                torch.testing.assert_close(fc, c, rtol=1e-5, atol=1e-6)
+    
+    def test_generator_loads_unfused_weights(self):
+        """Test an unfused generator's state dict loads into the fused layout."""
+        kwargs = {'input_channels': 3, 'image_size': 10, 'hidden_channels': 5}
+        unfused = Generator(fused_gates=False, **kwargs)
+        fused = Generator(**kwargs)
+        fused.load_state_dict(unfused.state_dict())
+        
+        with torch.no_grad():
+            torch.testing.assert_close(fused(self.x), unfused(self.x), rtol=1e-5, atol=1e-6)
 
 class TestDiscriminator(unittest.TestCase):
     def setUp(self):
@@ -38,3 +94,244 @@ class TestDiscriminator(unittest.TestCase):
         
         # Check output is valid (no NaN values)
         self.assertFalse(torch.isnan(output).any())
+    
+    def test_configurable_seq_len(self):
+        """Test discriminator built for a different sequence length."""
+        discriminator = Discriminator(seq_len=20)
+        output = discriminator(torch.randn(self.batch_size, 1, 20))
+        self.assertEqual(output.shape, (self.batch_size, 1))
+
+class TestGAFWGANPenalty(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.real = torch.randn(8, 1, 11)
+    
+    def make_model(self, **kwargs):
+        generator = torch.nn.Sequential(torch.nn.Linear(100, 11), torch.nn.Unflatten(1, (1, 11)))
+        return GAFWGAN(generator, Discriminator(), 'cpu', **kwargs)
+    
+    def test_lazy_interval(self):
+        """Test the lazy mode penalizes every k-th critic step only."""
+        model = self.make_model(penalty_interval=3)
+        calls = []
+        penalty = model.gradient_penalty
+        model.gradient_penalty = lambda *args: calls.append(model.iteration) or penalty(*args)
+        for _ in range(7):
+            model.train_step(self.real, None)
+        self.assertEqual(calls, [0, 3, 6])
+    
+    def test_r1_penalty(self):
+        """Test the R1 penalty matches its definition and trains without an extra forward."""
+        model = self.make_model(penalty='r1')
+        real = self.real.clone().requires_grad_(True)
+        validity = model.discriminator(real)
+        grad = torch.autograd.grad(validity.sum(), real, retain_graph=True)[0]
+        expected = 0.5 * grad.pow(2).sum(dim=(1, 2)).mean()
+        torch.testing.assert_close(model.r1_penalty(real, validity), expected)
+        
+        forwards = []
+        model.discriminator.register_forward_hook(lambda *args: forwards.append(1))
+        model.iteration = 1  # a critic-only step
+        model.train_step(self.real, None)
+        self.assertEqual(len(forwards), 2)
+        
+        with self.assertRaises(ValueError):
+            self.make_model(penalty='clip')
+    
+    def test_lipschitz_penalty(self):
+        """Test the difference-quotient penalty only counts slopes above one."""
+        model = self.make_model(penalty='lp')
+        real = torch.zeros(2, 1, 4)
+        fake = torch.zeros(2, 1, 4)
+        fake[:, 0, 0] = 1.0  # pairs one unit apart
+        penalty = model.lipschitz_penalty(real, fake, torch.tensor([[3.0], [0.5]]),
+                                          torch.tensor([[0.0], [0.0]]))
+        torch.testing.assert_close(penalty, torch.tensor(2.0))  # ((3 - 1)^2 + 0) / 2
+        model.train_step(self.real, None)
+    
+    def test_mixed_precision_step(self):
+        """Test bfloat16 autocast trains with float32 weights and a float32 GP."""
+        model = self.make_model(mixed_precision=True)
+        dtypes = []
+        penalty = model.gradient_penalty
+        def gradient_penalty(real, fake):
+            dtypes.append((real.dtype, fake.dtype, torch.is_autocast_enabled('cpu')))
+            return penalty(real, fake)
+        model.gradient_penalty = gradient_penalty
+        
+        d_loss, g_loss = model.train_step(self.real, None)
+        self.assertTrue(math.isfinite(d_loss) and math.isfinite(g_loss))
+        self.assertEqual(dtypes, [(torch.float32, torch.float32, False)])
+        self.assertEqual(model.discriminator.dense3.weight.dtype, torch.float32)
+
+class TestEnsemble(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.ensemble = GAFEWGANEnsemble(
+            n_models=3, device='cpu',
+            generator_kwargs={'input_channels': 2, 'image_size': 8, 'hidden_channels': 4}
+        )
+        self.x = torch.randn(5, 4, 2, 8, 8)
+    
+    def test_vectorized_matches_loop(self):
+        """Test stacked-parameter inference matches running members one by one."""
+        with torch.no_grad():
+            loop = self.ensemble.base_predictions(self.x, vectorized=False)
+        stacked = self.ensemble.base_predictions(self.x, vectorized=True)
+        
+        self.assertEqual(stacked.shape, (5, 3))
+        torch.testing.assert_close(stacked, loop, rtol=1e-5, atol=1e-6)
+        self.assertEqual(self.ensemble.predict(self.x).shape, (5, 1))
+    
+    def test_restack_after_update(self):
+        """Test the stacked snapshot follows in-place updates and loaded weights."""
+        self.ensemble.base_predictions(self.x, vectorized=True)
+        with torch.no_grad():
+            self.ensemble.base_models[1].generator.output.bias.add_(1.0)
+            loop = self.ensemble.base_predictions(self.x, vectorized=False)
+        torch.testing.assert_close(self.ensemble.base_predictions(self.x, vectorized=True), loop,
+                                   rtol=1e-5, atol=1e-6)
+        
+        other = GAFEWGANEnsemble(
+            n_models=3, device='cpu',
+            generator_kwargs={'input_channels': 2, 'image_size': 8, 'hidden_channels': 4}
+        )
+        generator = self.ensemble.base_models[0].generator
+        generator.load_state_dict(other.base_models[0].generator.state_dict())
+        with torch.no_grad():
+            loop = self.ensemble.base_predictions(self.x, vectorized=False)
+        torch.testing.assert_close(self.ensemble.base_predictions(self.x, vectorized=True), loop,
+                                   rtol=1e-5, atol=1e-6)
+    
+    def test_meta_learner_uses_cached_predictions(self):
+        """Test base predictions are computed once, spilled to disk and reusable."""
+        self.ensemble.vectorized_inference = False
+        loader = DataLoader(TensorDataset(self.x, torch.randn(5, 1)), batch_size=2)
+        calls = []
+        for model in self.ensemble.base_models:
+            model.generator.register_forward_hook(lambda *args: calls.append(1))
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.ensemble.train_meta_learner(loader, 3, cache_path=tmpdir)
+            self.assertEqual(len(calls), 3 * len(loader))
+            
+            preds, targets = GAFEWGANEnsemble.load_base_predictions(tmpdir)
+            self.assertEqual(preds.shape, (5, 3))
+            with torch.no_grad():
+                expected = self.ensemble.base_predictions(self.x)
+            np.testing.assert_allclose(preds, expected.numpy(), rtol=1e-5, atol=1e-6)
+            
+            # Retraining from the saved matrix, full-batch, skips the generators
+            calls.clear()
+            self.ensemble.train_meta_learner(loader, 2, batch_size=0, predictions=(preds, targets))
+            self.assertEqual(calls, [])
+            del preds, targets
+    
+    def test_cached_predictions_follow_loader(self):
+        """Test another loader, or other generators, get their own base predictions."""
+        self.ensemble.vectorized_inference = False
+        x = torch.randn(9, 4, 2, 8, 8)
+        loader_a = DataLoader(TensorDataset(x[:5], torch.randn(5, 1)), batch_size=2)
+        loader_b = DataLoader(TensorDataset(x, torch.randn(9, 1)), batch_size=2)
+        calls = []
+        for model in self.ensemble.base_models:
+            model.generator.register_forward_hook(lambda *args: calls.append(1))
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.ensemble.train_meta_learner(loader_a, 1, cache_path=tmpdir)
+            self.ensemble.train_meta_learner(loader_b, 1, cache_path=tmpdir)
+            preds, targets = self.ensemble._meta_inputs[1]
+            self.assertEqual(preds.shape, (9, 3))
+            np.testing.assert_array_equal(targets, loader_b.dataset.tensors[1].numpy())
+            with torch.no_grad():
+                expected = self.ensemble.base_predictions(x)
+            np.testing.assert_allclose(preds, expected.numpy(), rtol=1e-5, atol=1e-6)
+            
+            # A new process with the same generators reuses the matrix on disk
+            state = self.ensemble.state_dict()
+            restored = GAFEWGANEnsemble(
+                n_models=3, device='cpu',
+                generator_kwargs={'input_channels': 2, 'image_size': 8, 'hidden_channels': 4}
+            )
+            restored.load_state_dict(state)
+            calls.clear()
+            for model in restored.base_models:
+                model.generator.register_forward_hook(lambda *args: calls.append(1))
+            restored.train_meta_learner(loader_b, 1, cache_path=tmpdir)
+            self.assertEqual(calls, [])
+            
+            # Updated generators recompute it
+            with torch.no_grad():
+                restored.base_models[0].generator.output.weight.add_(1.0)
+            restored.train_meta_learner(loader_b, 1, cache_path=tmpdir)
+            self.assertEqual(len(calls), 3 * len(loader_b))
+            del preds, targets, restored
+    
+    def test_base_predictions_over_split(self):
+        """Test a loader over one split of a dataset only fills that split's rows."""
+        x = torch.randn(9, 4, 2, 8, 8)
+        dataset = TensorDataset(x, torch.arange(9, dtype=torch.float32).reshape(-1, 1))
+        loader = DataLoader(dataset, sampler=BatchSampler(range(6, 9), 2, drop_last=False),
+                            batch_size=None)
+        
+        with torch.no_grad():
+            expected = self.ensemble.base_predictions(x[6:])
+        preds, targets = self.ensemble.compute_base_predictions(loader)
+        self.assertEqual(preds.shape, (3, 3))
+        np.testing.assert_allclose(preds, expected.numpy(), rtol=1e-5, atol=1e-6)
+        np.testing.assert_array_equal(targets.ravel(), [6, 7, 8])
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            preds, targets = self.ensemble.compute_base_predictions(loader, tmpdir)
+            self.assertEqual(preds.shape, (3, 3))
+            np.testing.assert_array_equal(targets.ravel(), [6, 7, 8])
+            del preds, targets
+    
+    def test_meta_checkpoint_tied_to_data(self):
+        """Test meta-learner checkpoints resume on the same data and restart on new data."""
+        targets = torch.randn(5, 1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.ensemble.checkpoint_dir = Path(tmpdir)
+            loader = DataLoader(TensorDataset(self.x, targets), batch_size=2)
+            self.ensemble.train_meta_learner(loader, 2)
+            trained = copy.deepcopy(self.ensemble.meta_learner.state_dict())
+            
+            # Finished on the same data: restored, no further steps
+            self.ensemble.meta_learner.network[0].bias.data.add_(1.0)
+            self.ensemble.train_meta_learner(loader, 2)
+            for name, value in trained.items():
+                torch.testing.assert_close(self.ensemble.meta_learner.state_dict()[name], value)
+            
+            loader = DataLoader(TensorDataset(self.x, targets + 1), batch_size=2)
+            self.ensemble.train_meta_learner(loader, 2)
+            self.assertFalse(torch.equal(self.ensemble.meta_learner.network[0].bias,
+                                         trained['network.0.bias']))
+            np.testing.assert_array_equal(self.ensemble._meta_inputs[1][1], (targets + 1).numpy())
+    
+    def test_save_load_roundtrip(self):
+        """Test a saved ensemble reloads to the same predictions."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = f'{tmpdir}/ensemble.pt'
+            self.ensemble.save(path)
+            torch.manual_seed(1)
+            restored = GAFEWGANEnsemble(
+                n_models=3, device='cpu',
+                generator_kwargs={'input_channels': 2, 'image_size': 8, 'hidden_channels': 4}
+            )
+            restored.load(path)
+        
+        self.ensemble.meta_learner.eval()
+        restored.meta_learner.eval()
+        with torch.no_grad():
+            torch.testing.assert_close(restored.predict(self.x), self.ensemble.predict(self.x))
+    
+    def test_mixed_precision_predict(self):
+        """Test bfloat16 ensemble inference returns float32 close to full precision."""
+        self.ensemble.meta_learner.eval()
+        with torch.no_grad():
+            expected = self.ensemble.base_predictions(self.x)
+            self.ensemble.mixed_precision = True
+            preds = self.ensemble.base_predictions(self.x)
+            self.assertEqual(self.ensemble.predict(self.x).dtype, torch.float32)
+        self.assertEqual(preds.dtype, torch.float32)
+        torch.testing.assert_close(preds, expected, rtol=0.05, atol=0.02)
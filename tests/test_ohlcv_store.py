@@ -0,0 +1,111 @@
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from preprocessing.ohlcv_store import OHLCVStore
+
+class TestOHLCVStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = OHLCVStore(self.tmpdir.name)
+        n = 300
+        close = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, n)))
+        self.df = pd.DataFrame({
+            'open': close,
+            'high': close * 1.01,
+            'low': close * 0.99,
+            'close': close,
+            'volume': np.random.uniform(1e5, 1e6, n)
+        }, index=pd.date_range('2020-01-01', periods=n, freq='B'))
+        self.calls = []
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def fetcher(self, df):
+        """Fake API returning newest-first bars like Alpha Vantage."""
+        def fetch(outputsize):
+            self.calls.append(outputsize)
+            data = df if outputsize == 'full' else df.iloc[-100:]
+            return data.iloc[::-1]
+        return fetch
+    
+    def test_round_trip_sorted(self):
+        """Test stored bars read back oldest first and unchanged."""
+        self.store.append('AAPL', self.df.iloc[::-1])
+        pd.testing.assert_frame_equal(self.store.read_frame('AAPL'), self.df,
+                                      check_freq=False, check_names=False, check_index_type=False)
+        self.assertEqual(self.store.symbols(), ['AAPL'])
+        self.assertEqual(self.store.last_date('AAPL'), self.df.index[-1])
+    
+    def test_refresh_appends_compact_window(self):
+        """Test a refresh of a stored symbol only downloads the compact window."""
+        self.store.refresh('AAPL', self.fetcher(self.df.iloc[:-10]))
+        added = self.store.refresh('AAPL', self.fetcher(self.df))
+        
+        self.assertEqual(self.calls, ['full', 'compact'])
+        self.assertEqual(added, 10)
+        np.testing.assert_array_equal(self.store.read('AAPL')['close'], self.df['close'].values)
+        
+        # Nothing new: nothing appended
+        self.assertEqual(self.store.refresh('AAPL', self.fetcher(self.df)), 0)
+    
+    def test_refresh_falls_back_to_full_on_gap(self):
+        """Test a gap longer than the compact window triggers a full download."""
+        self.store.refresh('AAPL', self.fetcher(self.df.iloc[:100]))
+        self.store.refresh('AAPL', self.fetcher(self.df))
+        
+        self.assertEqual(self.calls, ['full', 'compact', 'full'])
+        self.assertEqual(len(self.store.read('AAPL')['close']), len(self.df))
+    
+    def test_refresh_many_skips_failed_gap_refetch(self):
+        """Test a gapped symbol whose full refetch fails is left unchanged."""
+        self.store.append('AAPL', self.df.iloc[:100])
+        self.store.append('MSFT', self.df.iloc[:-10])
+        
+        def fetch_many(sizes):
+            self.calls.append(sizes)
+            # The full download of AAPL fails
+            return {s: self.df.iloc[-100:] for s, size in sizes.items() if size == 'compact'}
+        
+        added = self.store.refresh_many(['AAPL', 'MSFT'], fetch_many)
+        self.assertEqual(self.calls, [{'AAPL': 'compact', 'MSFT': 'compact'}, {'AAPL': 'full'}])
+        self.assertEqual(added, {'MSFT': 10})
+        self.assertEqual(self.store.last_date('AAPL'), self.df.index[99])
+    
+    def test_refresh_picks_up_revised_history(self):
+        """Test a compact window that revises stored bars triggers a full rewrite."""
+        self.store.refresh('AAPL', self.fetcher(self.df.iloc[:-10]))
+        # A split halves every earlier price
+        revised = self.df.copy()
+        revised.iloc[:-5, :4] /= 2
+        added = self.store.refresh('AAPL', self.fetcher(revised))
+        
+        self.assertEqual(self.calls, ['full', 'compact', 'full'])
+        self.assertEqual(added, 10)
+        pd.testing.assert_frame_equal(self.store.read_frame('AAPL'), revised,
+                                      check_freq=False, check_names=False, check_index_type=False)
+    
+    def test_previous_version_kept_until_next_swap(self):
+        """Test a reader of the replaced version can still open it after a swap."""
+        self.store.append('AAPL', self.df.iloc[:100])
+        before = self.store._current('AAPL')
+        self.store.append('AAPL', self.df.iloc[:200])
+        self.assertTrue((before / 'close.npy').exists())
+        self.store.append('AAPL', self.df)
+        self.assertFalse(before.exists())
+        self.assertEqual(sorted(p.name for p in (self.store.root / 'AAPL').glob('v*')), ['v1', 'v2'])
+    
+    def test_range_read_is_zero_copy(self):
+        """Test range reads are memory-mapped views over the stored columns."""
+        self.store.append('AAPL', self.df)
+        start, end = self.df.index[50], self.df.index[149]
+        columns = self.store.read('AAPL', start, end)
+        
+        self.assertIsInstance(columns['close'].base, np.memmap)
+        self.assertEqual(len(columns['close']), 100)
+        np.testing.assert_array_equal(columns['close'], self.df['close'].values[50:150])
+        np.testing.assert_array_equal(columns['date'], self.df.index.values[50:150])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+from models.inference import OnnxPredictor, TorchPredictor, load_predictor
+from export_fixtures import ExportedEnsembleTestCase
+
+# Serves the ONNX artifact through models.inference with torch made unimportable
+TORCH_FREE_SERVE = """
+import sys
+class BlockTorch:
+    def find_spec(self, name, path=None, target=None):
+        if name.split('.')[0] == 'torch':
+            raise ImportError('torch is blocked')
+sys.meta_path.insert(0, BlockTorch())
+import numpy as np
+from models.inference import load_predictor
+predictor = load_predictor(sys.argv[1])
+np.save(sys.argv[3], predictor.predict(np.load(sys.argv[2])))
+assert 'torch' not in sys.modules
+"""
+
+class TestOnnxBackend(ExportedEnsembleTestCase):
+    export_format = 'onnx'
+    
+    def test_matches_eager_for_any_batch(self):
+        """Test onnxruntime matches the eager predictor at several batch sizes."""
+        predictor = load_predictor(self.path)
+        self.assertIsInstance(predictor, OnnxPredictor)
+        self.assertEqual(predictor.metadata['input_shape'], ['batch', 4, 2, 8, 8])
+        eager = TorchPredictor(self.ensemble)
+        for batch_size in (1, 5, 64):
+            x = np.random.randn(batch_size, 4, 2, 8, 8).astype(np.float32)
+            prediction = predictor.predict(x)
+            self.assertEqual(prediction.shape, (batch_size, 1))
+            self.assertEqual(prediction.dtype, np.float32)
+            np.testing.assert_allclose(prediction, eager.predict(x), rtol=1e-4, atol=1e-5)
+    
+    def test_serves_without_torch(self):
+        """Test the ONNX backend loads and predicts with torch unimportable."""
+        x = np.random.randn(3, 4, 2, 8, 8).astype(np.float32)
+        inputs, outputs = Path(self.tmpdir.name) / 'x.npy', Path(self.tmpdir.name) / 'y.npy'
+        np.save(inputs, x)
+        subprocess.run([sys.executable, '-c', TORCH_FREE_SERVE, str(self.path), str(inputs), str(outputs)],
+                       check=True, cwd=Path(__file__).resolve().parents[1])
+        np.testing.assert_allclose(np.load(outputs), TorchPredictor(self.ensemble).predict(x),
+                                   rtol=1e-4, atol=1e-5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+import pandas as pd
+from preprocessing.feature_engineering import TechnicalIndicators, PanelIndicators
+
+class TestPanelIndicators(unittest.TestCase):
+    def setUp(self):
+        dates = pd.date_range('2015-01-01', periods=600, freq='B')
+        self.frames = {}
+        
+        # Ragged histories: later listings and an early delisting
+        for symbol, (start, stop) in {'AAA': (0, 600), 'BBB': (150, 600), 'CCC': (40, 500)}.items():
+            n = stop - start
+            close = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, n)))
+            self.frames[symbol] = pd.DataFrame({
+                'open': close,
+                'high': close * (1 + np.random.uniform(0, 0.02, n)),
+                'low': close * (1 - np.random.uniform(0, 0.02, n)),
+                'close': close,
+                'volume': np.random.uniform(1e5, 1e6, n)
+            }, index=dates[start:stop])
+        
+        self.panel = PanelIndicators()
+        self.symbols, self.index, arrays = PanelIndicators.align(self.frames)
+        self.features = self.panel.calculate(
+            arrays['open'], arrays['high'], arrays['low'], arrays['close'], arrays['volume']
+        )
+    
+    def test_layout(self):
+        """Test the output is one contiguous (symbols, time, features) array."""
+        self.assertEqual(self.features.shape, (3, 600, len(self.panel.columns)))
+        self.assertTrue(self.features.flags['C_CONTIGUOUS'])
+    
+    def test_matches_per_symbol(self):
+        """Test each symbol matches per-symbol talib indicators on its own history."""
+        for i, symbol in enumerate(self.symbols):
+            df = self.frames[symbol]
+            basic = TechnicalIndicators.calculate_basic_indicators(df)
+            advanced = TechnicalIndicators.calculate_advanced_indicators(df, basic)
+            expected = pd.concat([df, basic, advanced], axis=1)[self.panel.columns]
+            
+            rows = self.index.get_indexer(df.index)
+            np.testing.assert_allclose(
+                self.features[i, rows], expected.to_numpy(dtype=np.float64),
+                rtol=1e-7, atol=1e-7, equal_nan=True, err_msg=symbol
+            )
+    
+    def test_missing_bars_are_masked(self):
+        """Test times before listing or after delisting are NaN."""
+        i = self.symbols.index('BBB')
+        self.assertTrue(np.isnan(self.features[i, :150]).all())
+        i = self.symbols.index('CCC')
+        self.assertTrue(np.isnan(self.features[i, 500:]).all())
+    
+    def test_skips_missing_bars(self):
+        """Test every column over a mid-history halt matches talib on the symbol's own bars."""
+        frames = dict(self.frames)
+        halted = frames['AAA'].index[[200, 201, 350]]
+        frames['AAA'] = frames['AAA'].drop(halted)
+        symbols, index, arrays = PanelIndicators.align(frames)
+        features = self.panel.calculate(
+            arrays['open'], arrays['high'], arrays['low'], arrays['close'], arrays['volume']
+        )
+        
+        df = frames['AAA']
+        basic = TechnicalIndicators.calculate_basic_indicators(df)
+        advanced = TechnicalIndicators.calculate_advanced_indicators(df, basic)
+        expected = pd.concat([df, basic, advanced], axis=1)[self.panel.columns]
+        i, rows = symbols.index('AAA'), index.get_indexer(df.index)
+        for k, column in enumerate(self.panel.columns):
+            np.testing.assert_allclose(features[i, rows, k], expected[column].to_numpy(dtype=np.float64),
+                                       rtol=1e-7, atol=1e-7, equal_nan=True, err_msg=column)
+        self.assertTrue(np.isnan(features[i, index.get_indexer(halted)]).all())
@@ -0,0 +1,69 @@
+import unittest
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from preprocessing.data_loader import StockDataLoader
+from preprocessing.parallel import ParallelPreprocessor
+from preprocessing.gaf import MultiChannelGAFBuilder
+from preprocessing.gaf_store import GAFStore
+
+def synthetic_bars(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'open': close,
+        'high': close * (1 + rng.uniform(0, 0.02, n)),
+        'low': close * (1 - rng.uniform(0, 0.02, n)),
+        'close': close,
+        'volume': rng.uniform(1e5, 1e6, n)
+    }, index=pd.date_range('2020-01-01', periods=n, freq='B'))
+
+class TestParallelPreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.loader = StockDataLoader('demo')
+        # Different lengths so completion order differs from input order
+        self.symbols = ['A', 'B', 'C']
+        self.frames = {s: synthetic_bars(n, i) for i, (s, n) in enumerate(zip(self.symbols, [600, 250, 400]))}
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_matches_serial_in_order(self):
+        """Test pooled output equals serial process_data, in symbol order."""
+        preprocessor = ParallelPreprocessor(self.loader, 2, str(Path(self.tmpdir.name) / 'out'))
+        results = preprocessor.run(self.frames, self.symbols)
+        
+        self.assertEqual(len(results), 3)
+        for symbol, result in zip(self.symbols, results):
+            expected = self.loader.process_data(self.frames[symbol])
+            self.assertIsInstance(result['gaf_data'], np.memmap)
+            for name in ('gaf_data', 'prices', 'features'):
+                np.testing.assert_array_equal(result[name], expected[name])
+    
+    def test_multichannel_builder(self):
+        """Test workers encode with the loader's multi-channel builder."""
+        builder = MultiChannelGAFBuilder(('close', 'volume'), ('gasf', 'gadf'), size=20)
+        loader = StockDataLoader('demo', gaf_builder=builder)
+        preprocessor = ParallelPreprocessor(loader, 2, str(Path(self.tmpdir.name) / 'out'))
+        results = preprocessor.run(self.frames, self.symbols)
+        
+        for symbol, result in zip(self.symbols, results):
+            expected = loader.process_data(self.frames[symbol])
+            self.assertEqual(result['gaf_data'].shape[1:], (4, 20, 20))
+            np.testing.assert_array_equal(result['gaf_data'], expected['gaf_data'])
+    
+    def test_failure_isolation_and_store(self):
+        """Test a failing symbol is skipped and others land in the GAF store."""
+        frames = dict(self.frames)
+        frames['B'] = frames['B'].drop(columns='high')
+        store = GAFStore(str(Path(self.tmpdir.name) / 'gaf'))
+        preprocessor = ParallelPreprocessor(self.loader, 2, str(Path(self.tmpdir.name) / 'out'),
+                                            store=store)
+        
+        self.assertEqual(preprocessor.run(frames, self.symbols), ['A', 'C'])
+        self.assertEqual(store.symbols(), ['A', 'C'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import BatchSampler, DataLoader, SubsetRandomSampler, TensorDataset
+from models.ensemble import GAFEWGANEnsemble
+from models.inference import load_predictor
+from training.parallel import ParallelMemberTrainer
+
+GENERATOR_KWARGS = {'input_channels': 1, 'image_size': 4, 'hidden_channels': 2}
+
+def regress_prices(model, loader, epochs, device, report):
+    """Fit the generator to the prices with plain MSE."""
+    optimizer = torch.optim.SGD(model.generator.parameters(), lr=1e-3)
+    for epoch in range(epochs):
+        total = 0.0
+        for data, price in loader:
+            loss = nn.MSELoss()(model.generator(data), price)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item()
+        report(epoch, total, 0.0)
+
+def check_batches(model, loader, epochs, device, report):
+    """Fail unless the worker sees batches of 4 drawn from the first 12 samples only."""
+    for data, price in loader:
+        if len(data) != 4 or price.max().item() >= 12:
+            raise ValueError(f"unexpected batch of {len(data)}, max target {price.max().item()}")
+    regress_prices(model, loader, epochs, device, report)
+
+def diverge_second_member(model, loader, epochs, device, report):
+    """Member seeded 1 reports a NaN loss; member seeded 2 dies outright."""
+    seed = torch.initial_seed()
+    if seed == 1:
+        report(0, float('nan'), 0.0)
+    if seed == 2:
+        os._exit(3)
+    regress_prices(model, loader, epochs, device, report)
+
+def fail_second_member(model, loader, epochs, device, report):
+    """Member seeded 1 raises; the others regress the prices."""
+    if torch.initial_seed() == 1:
+        raise ValueError("member seeded 1 cannot train")
+    regress_prices(model, loader, epochs, device, report)
+
+class TestParallelMemberTrainer(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.data = torch.randn(16, 2, 1, 4, 4)
+        self.prices = torch.randn(16, 1)
+        self.dataset = TensorDataset(self.data, self.prices)
+    
+    def test_members_train_in_workers(self):
+        """Test every member returns trained, distinct state dicts."""
+        trainer = ParallelMemberTrainer(2, threads_per_worker=1, train_fn=regress_prices)
+        states, failures = trainer.train(3, self.dataset, epochs=2, batch_size=8,
+                                         generator_kwargs=GENERATOR_KWARGS)
+        
+        self.assertEqual(failures, {})
+        self.assertEqual(sorted(states), [0, 1, 2])
+        weights = [states[i]['generator']['output.weight'] for i in range(3)]
+        self.assertFalse(torch.equal(weights[0], weights[1]))
+        self.assertIn('state', states[0]['g_optimizer'])
+    
+    def test_failure_isolation(self):
+        """Test a diverging and a crashing member do not stop the others."""
+        trainer = ParallelMemberTrainer(2, threads_per_worker=1, train_fn=diverge_second_member)
+        states, failures = trainer.train(4, self.dataset, epochs=1, batch_size=8,
+                                         generator_kwargs=GENERATOR_KWARGS)
+        
+        self.assertEqual(sorted(states), [0, 3])
+        self.assertEqual(sorted(failures), [1, 2])
+        self.assertIn('FloatingPointError', failures[1])
+        self.assertIn('code 3', failures[2])
+    
+    def test_batched_loader_split(self):
+        """Test workers train on a batched loader's split with its batch size."""
+        dataset = TensorDataset(self.data, torch.arange(16, dtype=torch.float32).reshape(-1, 1))
+        loader = DataLoader(dataset, sampler=BatchSampler(SubsetRandomSampler(range(12)), 4, False),
+                            batch_size=None)
+        training_set = ParallelMemberTrainer.training_set(loader)
+        self.assertEqual(training_set, (dataset, range(12), 4))
+        self.assertEqual(ParallelMemberTrainer.training_set(
+            DataLoader(dataset, batch_size=8, shuffle=True)), (dataset, None, 8))
+        
+        trainer = ParallelMemberTrainer(1, threads_per_worker=1, train_fn=check_batches)
+        states, failures = trainer.train(1, dataset, epochs=1, batch_size=4, indices=range(12),
+                                         generator_kwargs=GENERATOR_KWARGS)
+        self.assertEqual(failures, {})
+        self.assertEqual(sorted(states), [0])
+
+class TestParallelEnsemble(unittest.TestCase):
+    def test_failed_member_dropped(self):
+        """Test the ensemble trains, predicts and exports with the members that succeeded."""
+        torch.manual_seed(0)
+        ensemble = GAFEWGANEnsemble(n_models=3, device='cpu', generator_kwargs=GENERATOR_KWARGS)
+        survivors = [ensemble.base_models[0].generator, ensemble.base_models[2].generator]
+        data = torch.randn(8, 2, 1, 4, 4)
+        loader = DataLoader(TensorDataset(data, torch.randn(8, 1)), batch_size=4)
+        with self.assertLogs('models.ensemble', 'WARNING') as logs:
+            ensemble.train_base_models(loader, 1, n_workers=2, threads_per_worker=1,
+                                       train_fn=fail_second_member)
+        self.assertIn('[2] failed', logs.output[0])
+        
+        self.assertEqual(ensemble.n_models, 2)
+        self.assertEqual([model.generator for model in ensemble.base_models], survivors)
+        self.assertEqual(ensemble.meta_learner.network[0].in_features, 2)
+        ensemble.train_meta_learner(loader, 1)
+        ensemble.meta_learner.eval()
+        with torch.no_grad():
+            expected = ensemble.predict(data)
+        self.assertEqual(expected.shape, (8, 1))
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = ensemble.export(Path(tmpdir) / 'ensemble.pt2', data[:2], format='export')
+            np.testing.assert_allclose(load_predictor(path).predict(data.numpy()), expected.numpy(),
+                                       rtol=1e-5, atol=1e-6)
+            
+            ensemble.save(Path(tmpdir) / 'model.pt')
+            restored = GAFEWGANEnsemble(n_models=3, device='cpu', generator_kwargs=GENERATOR_KWARGS)
+            restored.load(Path(tmpdir) / 'model.pt')
+            restored.meta_learner.eval()
+            with torch.no_grad():
+                torch.testing.assert_close(restored.predict(data), expected)
+    
+    def test_every_member_failing_raises(self):
+        """Test an ensemble with no trainable member fails instead of staying untrained."""
+        torch.manual_seed(0)
+        ensemble = GAFEWGANEnsemble(n_models=2, device='cpu', generator_kwargs=GENERATOR_KWARGS)
+        # Images larger than the generators were built for fail every worker
+        loader = DataLoader(TensorDataset(torch.randn(4, 2, 1, 5, 5), torch.randn(4, 1)),
+                            batch_size=2)
+        with self.assertRaisesRegex(RuntimeError, 'Every base model failed'):
+            ensemble.train_base_models(loader, 1, n_workers=2, threads_per_worker=1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from pathlib import Path
+import numpy as np
+import torch
+from models.inference import OnnxPredictor, TorchPredictor, load_predictor
+from models.quantization import quantization_report, quantize_ensemble
+from export_fixtures import INPUT_SHAPE, ExportedEnsembleTestCase
+
+class TestQuantization(ExportedEnsembleTestCase):
+    export_format = 'onnx'
+    
+    def setUp(self):
+        super().setUp()
+        self.fit()
+        self.batches = [(torch.randn(8, *INPUT_SHAPE), torch.randn(8, 1)) for _ in range(4)]
+    
+    def test_static_and_dynamic_quantization(self):
+        """Test the calibrated int8 ensemble tracks eager predict across inputs."""
+        quantized = quantize_ensemble(self.path, Path(self.tmpdir.name) / 'int8.onnx', self.batches)
+        predictor = load_predictor(quantized)
+        self.assertIsInstance(predictor, OnnxPredictor)
+        self.assertEqual(predictor.metadata['quantization']['conv'], 'static int8')
+        x = np.random.randn(64, *INPUT_SHAPE).astype(np.float32)
+        prediction, expected = predictor.predict(x), TorchPredictor(self.ensemble).predict(x)
+        # Drift is measured against how much the predictions vary with the input
+        self.assertLess(np.abs(prediction - expected).max(), 0.1 * expected.std())
+        self.assertGreater(np.corrcoef(prediction.ravel(), expected.ravel())[0, 1], 0.99)
+    
+    def test_report(self):
+        """Test the report covers drift, size and latency of a dynamic-only quantization."""
+        quantized = quantize_ensemble(self.path, Path(self.tmpdir.name) / 'int8.onnx')
+        self.assertIsNone(load_predictor(quantized).metadata['quantization']['conv'])
+        report = quantization_report(self.path, quantized, self.batches)
+        self.assertLess(report['max_abs_drift'], 0.05 * report['float_mean_abs'])
+        self.assertLessEqual(report['mean_abs_drift'], report['max_abs_drift'])
+        self.assertLess(report['quantized_bytes'], report['float_bytes'])
+        self.assertGreater(report['quantized_ms_per_sample'], 0)
+        self.assertAlmostEqual(report['quantized_mse'], report['float_mse'],
+                               delta=0.01 * report['float_mse'])
+        
+        with self.assertRaisesRegex(ValueError, 'No report batches'):
+            quantization_report(self.path, quantized, iter([]))
+
+if __name__ == '__main__':
+    unittest.main()
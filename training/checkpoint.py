@@ -0,0 +1,165 @@
+# 
+
+import hashlib
+import logging
+import os
+import random
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+def rng_state() -> Dict[str, Any]:
+    """Snapshot of the Python, NumPy and torch random generators."""
+    state = {
+        'python': random.getstate(),
+        'numpy': np.random.get_state(),
+        'torch': torch.get_rng_state()
+    }
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+def set_rng_state(state: Dict[str, Any]):
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+def snapshot(obj):
+    """Copy the tensors of a (nested) state to CPU so training can go on mutating them."""
+    if torch.is_tensor(obj):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {k: snapshot(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(v) for v in obj)
+    return obj
+
+def fingerprint(*parts) -> str:
+    """Hex digest of configuration values and arrays/tensors, nested in lists and dicts."""
+    digest = hashlib.sha1()
+    
+    def update(obj):
+        if torch.is_tensor(obj):
+            obj = obj.detach().cpu().numpy()
+        if isinstance(obj, np.ndarray):
+            digest.update(f'{obj.dtype}{obj.shape}'.encode())
+            digest.update(np.ascontiguousarray(obj).tobytes())
+        elif isinstance(obj, dict):
+            for key in sorted(obj, key=str):
+                update(key)
+                update(obj[key])
+        elif isinstance(obj, (list, tuple)):
+            digest.update(b'[')
+            for value in obj:
+                update(value)
+            digest.update(b']')
+        else:
+            digest.update(repr(obj).encode())
+    
+    update(parts)
+    return digest.hexdigest()
+
+def atomic_save(obj, path: Path):
+    """``torch.save`` to a temporary file and rename it over ``path``."""
+    path = Path(path)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    with open(tmp, 'wb') as f:
+        torch.save(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(path)
+
+class CheckpointManager:
+    """Numbered checkpoints in one directory, written in the background.
+    
+    ``save`` copies the state to CPU on the calling thread and hands it to
+    a single writer thread, so training only waits for the copy (and for
+    the previous write, if it is still running). Each file is written to a
+    temporary name and renamed into place, so a crash never leaves a
+    truncated checkpoint. Only the newest ``keep_last`` files are kept.
+    
+    A ``fingerprint`` (see ``fingerprint``) identifies the run the
+    checkpoints belong to. It is stored in the directory, and checkpoints
+    left by a run with a different (or no) fingerprint are deleted on open,
+    so a rerun on new data or a new configuration starts over instead of
+    resuming stale weights.
+    """
+    
+    _pattern = re.compile(r'ckpt_(\d+)\.pt$')
+    
+    def __init__(self, directory: str, keep_last: int = 3, fingerprint: Optional[str] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep_last = keep_last
+        self.logger = logging.getLogger(__name__)
+        if fingerprint is not None:
+            self._check_fingerprint(fingerprint)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        self._pending: Optional[Future] = None
+        existing = self.checkpoints()
+        self._next = self._number(existing[-1]) + 1 if existing else 0
+    
+    def _check_fingerprint(self, fingerprint: str):
+        path = self.directory / 'fingerprint'
+        if path.exists() and path.read_text() == fingerprint:
+            return
+        stale = self.checkpoints()
+        if stale:
+            self.logger.warning(f"Checkpoints in {self.directory} belong to a different run "
+                                f"(data or configuration changed); starting over")
+            for old in stale:
+                old.unlink()
+        path.write_text(fingerprint)
+    
+    def _number(self, path: Path) -> int:
+        return int(self._pattern.match(path.name).group(1))
+    
+    def checkpoints(self) -> List[Path]:
+        """Complete checkpoints, oldest first."""
+        paths = [p for p in self.directory.iterdir() if self._pattern.match(p.name)]
+        return sorted(paths, key=self._number)
+    
+    def latest(self) -> Optional[Path]:
+        self.wait()
+        paths = self.checkpoints()
+        return paths[-1] if paths else None
+    
+    def load(self, path: Optional[Path] = None, map_location='cpu') -> Optional[Dict]:
+        """Load ``path`` or the newest checkpoint; None when there is none."""
+        path = path or self.latest()
+        if path is None:
+            return None
+        return torch.load(path, map_location=map_location, weights_only=False)
+    
+    def save(self, state: Dict, block: bool = False) -> Path:
+        """Queue ``state`` for writing; returns the path it will be written to."""
+        state = snapshot(state)
+        self.wait()
+        path = self.directory / f'ckpt_{self._next:08d}.pt'
+        self._next += 1
+        self._pending = self._executor.submit(self._write, state, path)
+        if block:
+            self.wait()
+        return path
+    
+    def _write(self, state: Dict, path: Path):
+        atomic_save(state, path)
+        for old in self.checkpoints()[:-self.keep_last]:
+            old.unlink(missing_ok=True)
+        self.logger.debug(f"Wrote checkpoint {path}")
+    
+    def wait(self):
+        """Block until the queued write (if any) is on disk; re-raises its error."""
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            pending.result()
+    
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
@@ -0,0 +1,173 @@
+# 
+
+import logging
+import math
+import queue
+import shutil
+import tempfile
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import torch
+import torch.multiprocessing as mp
+from torch.utils.data import BatchSampler, DataLoader, Dataset, SubsetRandomSampler, TensorDataset
+
+from models.generator import Generator
+from models.discriminator import Discriminator
+from models.gaf_wgan import GAFWGAN
+from training.trainer import GAFWGANTrainer
+
+def train_with_trainer(model: GAFWGAN, loader: DataLoader, epochs: int, device: str,
+                       report: Callable[[int, float, float], None]):
+    """Default member training: the usual GAFWGANTrainer epochs."""
+    trainer = GAFWGANTrainer(model, loader, None, device)
+    for epoch in range(epochs):
+        d_loss, g_loss = trainer.train_epoch()
+        report(epoch, d_loss, g_loss)
+
+def _train_member(index: int, seed: int, generator_kwargs: Dict, discriminator_kwargs: Dict,
+                  gan_kwargs: Dict, dataset: Dataset, indices: Sequence[int], batch_size: int,
+                  epochs: int, device: str, n_threads: int, train_fn: Callable, out_dir: str,
+                  messages):
+    """Worker entry point: train one member and save its state dicts."""
+    try:
+        torch.set_num_threads(n_threads)
+        torch.manual_seed(seed)
+        model = GAFWGAN(Generator(**generator_kwargs), Discriminator(**discriminator_kwargs), device,
+                        **gan_kwargs)
+        # Shuffled whole batches, indexed in one call like create_batched_dataloaders
+        loader = DataLoader(dataset, batch_size=None, sampler=BatchSampler(
+            SubsetRandomSampler(indices), batch_size, drop_last=False))
+        
+        def report(epoch, d_loss, g_loss):
+            if not (math.isfinite(d_loss) and math.isfinite(g_loss)):
+                raise FloatingPointError(f"non-finite loss at epoch {epoch + 1}")
+            messages.put(('progress', index, epoch, d_loss, g_loss))
+        
+        train_fn(model, loader, epochs, device, report)
+        
+        # Saved to a file rather than queued: shared-memory tensors in a
+        # message cannot be rebuilt once the sending worker has exited
+        path = Path(out_dir) / f'member_{index:03d}.pt'
+        torch.save(model.state_dict(), path)
+        messages.put(('done', index, str(path)))
+    except Exception:
+        messages.put(('failed', index, traceback.format_exc()))
+
+class ParallelMemberTrainer:
+    """Trains independent ensemble members in separate processes.
+    
+    Each member runs in its own spawned process with ``threads_per_worker``
+    intra-op threads; at most ``n_workers`` run at once. Workers receive
+    the training dataset itself rather than its samples: in-memory tensors
+    are moved to shared memory once and mapped by every worker, and a
+    packed GAF store is reopened as a memmap in each worker, so the
+    training set is never copied. Members report per-epoch losses and hand back
+    their state dicts through a scratch directory; a member that raises,
+    produces a non-finite loss or dies is recorded as failed while the
+    others keep training.
+    """
+    
+    def __init__(self, n_workers: int, threads_per_worker: Optional[int] = None,
+                 device: str = 'cpu', train_fn: Callable = train_with_trainer,
+                 seed: int = 0):
+        self.n_workers = n_workers
+        self.threads_per_worker = threads_per_worker or max(torch.get_num_threads() // n_workers, 1)
+        self.device = device
+        self.train_fn = train_fn
+        self.seed = seed
+        self.logger = logging.getLogger(__name__)
+    
+    @staticmethod
+    def training_set(train_loader: DataLoader):
+        """(dataset, sample indices, batch size) a training loader draws from.
+        
+        Handles both plain loaders and loaders whose ``sampler`` is a
+        ``BatchSampler`` (``batch_size=None``, as built by
+        ``create_batched_dataloaders``). Indices are None when the loader
+        covers the whole dataset.
+        """
+        sampler = train_loader.sampler
+        batch_size = train_loader.batch_size
+        if batch_size is None:
+            sampler, batch_size = sampler.sampler, sampler.batch_size
+        # A range is used directly as the sampler of unshuffled splits
+        indices = sampler if isinstance(sampler, range) else getattr(sampler, 'indices', None)
+        return train_loader.dataset, indices, batch_size
+    
+    def _handle(self, message, states: Dict, failures: Dict, epochs: int):
+        kind, index = message[0], message[1]
+        if kind == 'progress':
+            _, _, epoch, d_loss, g_loss = message
+            self.logger.info(f"Member {index + 1}: epoch {epoch + 1}/{epochs}, "
+                             f"D_loss: {d_loss:.4f}, G_loss: {g_loss:.4f}")
+        elif kind == 'done':
+            states[index] = torch.load(message[2], map_location='cpu')
+            self.logger.info(f"Member {index + 1} finished")
+        else:
+            failures[index] = message[2]
+            self.logger.error(f"Member {index + 1} failed:\n{message[2]}")
+    
+    def _drain(self, messages, states: Dict, failures: Dict, epochs: int):
+        while True:
+            try:
+                self._handle(messages.get(timeout=0.1), states, failures, epochs)
+            except queue.Empty:
+                return
+    
+    def train(self, n_models: int, dataset: Dataset, epochs: int, batch_size: int,
+              generator_kwargs: Dict = None, discriminator_kwargs: Dict = None,
+              members: Optional[List[int]] = None, gan_kwargs: Dict = None,
+              indices: Optional[Sequence[int]] = None):
+        """Train ``n_models`` members (or only the ``members`` indices).
+        
+        Every member trains on the samples ``indices`` of ``dataset`` (all
+        of them by default), which must accept a list of indices and return
+        a whole (data, prices) batch. Returns (states, failures) keyed by
+        member index.
+        """
+        if isinstance(dataset, TensorDataset):
+            for tensor in dataset.tensors:
+                tensor.share_memory_()
+        indices = range(len(dataset)) if indices is None else indices
+        out_dir = tempfile.mkdtemp(prefix='members_')
+        ctx = mp.get_context('spawn')
+        messages = ctx.Queue()
+        pending = list(range(n_models)) if members is None else list(members)
+        running: Dict[int, mp.Process] = {}
+        states, failures = {}, {}
+        
+        while pending or running:
+            while pending and len(running) < self.n_workers:
+                index = pending.pop(0)
+                process = ctx.Process(target=_train_member, args=(
+                    index, self.seed + index, generator_kwargs or {}, discriminator_kwargs or {},
+                    gan_kwargs or {}, dataset, indices, batch_size, epochs, self.device,
+                    self.threads_per_worker, self.train_fn, out_dir, messages
+                ))
+                process.start()
+                running[index] = process
+            
+            try:
+                self._handle(messages.get(timeout=0.5), states, failures, epochs)
+            except queue.Empty:
+                pass
+            
+            for index, process in list(running.items()):
+                if index not in states and index not in failures and not process.is_alive():
+                    # Anything it sent is in the pipe once it has exited
+                    self._drain(messages, states, failures, epochs)
+                if index in states or index in failures:
+                    process.join()
+                    del running[index]
+                elif not process.is_alive():
+                    # Died without reporting (e.g. killed or segfault)
+                    failures[index] = f"worker exited with code {process.exitcode}"
+                    self.logger.error(f"Member {index + 1} failed: {failures[index]}")
+                    del running[index]
+        
+        shutil.rmtree(out_dir, ignore_errors=True)
+        self.logger.info(f"Trained {len(states)}/{n_models if members is None else len(members)} "
+                         f"members, {len(failures)} failed")
+        return states, failures
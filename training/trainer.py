@@ -1,23 +1,59 @@
+import itertools
 
+import torch
+import torch.nn as nn
+
+from training.checkpoint import rng_state, set_rng_state
 
 class GAFWGANTrainer:
-    """Trainer for GAF-WGAN model."""
+    """Trainer for GAF-WGAN model.
+    
+    With a ``CheckpointManager`` the model, optimizers, step counter and RNG
+    state are checkpointed every ``checkpoint_every`` batches and at each
+    epoch end, and ``train`` resumes from the newest checkpoint, mid-epoch
+    included. A resumed epoch replays the same batch order: the RNG state
+    from the start of the epoch is restored before the loader is iterated
+    and the batches already trained on are skipped.
+    """
     
-    def __init__(self, model, train_loader, val_loader, device='cuda'):
+    def __init__(self, model, train_loader, val_loader, device='cuda',
+                 checkpoint=None, checkpoint_every=None):
         self.model = model
         self.train_loader = train_loader
         self.val_loader = val_loader
         self.device = device
-        
-    def train_epoch(self):
-        """Train for one epoch."""
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.epoch = 0
+    
+    def _save(self, batch, epoch_rng, totals):
+        self.checkpoint.save({
+            'model': self.model.state_dict(),
+            'epoch': self.epoch,
+            'batch': batch,
+            'epoch_rng': epoch_rng,
+            'rng': rng_state(),
+            'totals': totals
+        })
+    
+    def train_epoch(self, resume=None):
+        """Train for one epoch, optionally continuing a checkpointed one."""
         self.model.generator.train()
         self.model.discriminator.train()
         
-        total_d_loss = 0
-        total_g_loss = 0
+        if resume is not None:
+            set_rng_state(resume['epoch_rng'])
+        epoch_rng = rng_state() if self.checkpoint is not None else None
+        start = resume['batch'] if resume is not None else 0
+        total_d_loss, total_g_loss = resume['totals'] if resume is not None else (0, 0)
+        
+        batches = iter(self.train_loader)
+        if start:
+            # Same shuffle as the interrupted epoch; then continue its RNG stream
+            next(itertools.islice(batches, start - 1, start), None)
+            set_rng_state(resume['rng'])
         
-        for batch_idx, (data, price) in enumerate(self.train_loader):
+        for batch_idx, (data, price) in enumerate(batches, start):
             data = data.to(self.device)
             price = price.to(self.device)
             
@@ -25,6 +61,12 @@ class GAFWGANTrainer:
             total_d_loss += d_loss
             total_g_loss += g_loss
             
+            done = batch_idx + 1
+            if (self.checkpoint is not None and self.checkpoint_every
+                    and done % self.checkpoint_every == 0
+                    and done < len(self.train_loader)):
+                self._save(done, epoch_rng, (total_d_loss, total_g_loss))
+        
         return total_d_loss / len(self.train_loader), total_g_loss / len(self.train_loader)
     
     def validate(self):
@@ -39,17 +81,41 @@ class GAFWGANTrainer:
                 data = data.to(self.device)
                 price = price.to(self.device)
                 
-                pred_price = self.model.generator(data)
-                loss = nn.MSELoss()(pred_price, price)
+                with self.model.autocast():
+                    pred_price = self.model.generator(data)
+                loss = nn.MSELoss()(pred_price.float(), price)
                 total_loss += loss.item()
-                
+        
         return total_loss / len(self.val_loader)
     
+    def resume(self):
+        """Restore the newest checkpoint; returns the mid-epoch state, if any."""
+        state = self.checkpoint.load() if self.checkpoint is not None else None
+        if state is None:
+            return None
+        self.model.load_state_dict(state['model'])
+        self.epoch = state['epoch']
+        if state['batch'] == 0:
+            set_rng_state(state['rng'])
+            return None
+        return state
+    
     def train(self, epochs):
         """Full training loop."""
-        for epoch in range(epochs):
-            d_loss, g_loss = self.train_epoch()
-            val_loss = self.validate()
+        resume = self.resume()
+        while self.epoch < epochs:
+            d_loss, g_loss = self.train_epoch(resume)
+            resume = None
+            self.epoch += 1
+            if self.checkpoint is not None:
+                self._save(0, None, (0, 0))
             
-            print(f"Epoch {epoch+1}/{epochs}")
+            print(f"Epoch {self.epoch}/{epochs}")
+            if self.val_loader is None:
+                print(f"D_loss: {d_loss:.4f}, G_loss: {g_loss:.4f}")
+                continue
+            val_loss = self.validate()
             print(f"D_loss: {d_loss:.4f}, G_loss: {g_loss:.4f}, Val_loss: {val_loss:.4f}")
+        
+        if self.checkpoint is not None:
+            self.checkpoint.wait()
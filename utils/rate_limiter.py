@@ -0,0 +1,92 @@
+# 
+
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+class TokenBucket:
+    """Token-bucket rate limiter shared through a SQLite file.
+    
+    Every process (or thread) pointing at the same ``path`` and ``name``
+    draws from one bucket, so several monitors and training runs together
+    stay inside a single API quota. Each acquisition is one short
+    ``BEGIN IMMEDIATE`` transaction that refills the bucket for the elapsed
+    time and takes a token if one is available.
+    """
+    
+    def __init__(self, path: str, calls: int = 5, period: float = 60.0,
+                 capacity: Optional[int] = None, name: str = 'alpha_vantage'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rate = calls / period
+        self.capacity = float(capacity if capacity is not None else calls)
+        self.name = name
+        
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS buckets "
+                    "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)",
+                    (self.name, self.capacity, time.time())
+                )
+        finally:
+            conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30.0)
+    
+    def try_acquire(self) -> float:
+        """Take a token if one is available.
+        
+        Returns 0.0 on success, otherwise the number of seconds until a
+        token will be available (nothing is taken).
+        """
+        conn = self._connect()
+        try:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, updated = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(now - updated, 0.0) * self.rate)
+            
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / self.rate
+            conn.execute(
+                "UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?",
+                (tokens, now, self.name)
+            )
+            conn.execute("COMMIT")
+            return wait
+        finally:
+            conn.close()
+    
+    def acquire(self) -> float:
+        """Block until a token is taken; returns the total time waited."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+    
+    async def acquire_async(self) -> float:
+        """Like ``acquire`` but yields to the event loop while waiting."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait